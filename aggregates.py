@@ -0,0 +1,267 @@
+"""Cubo de agregação pré-calculado sobre a hierarquia de filtros do app.
+
+O cubo tem uma linha por combinação observada de (origem, MacroTrends,
+MicroTrends, nickName) com as métricas já somadas. Qualquer combinação de
+filtros da sidebar é respondida reagregando o cubo (O(grupos)) em vez de
+varrer as linhas de vídeo (O(linhas)).
+"""
+import numpy as np
+import pandas as pd
+
+CUBE_DIMS = ['origem', 'MacroTrends', 'MicroTrends', 'nickName']
+
+# Métrica do cubo -> (coluna de origem, agregação na construção, agregação no roll-up)
+CUBE_METRICS = {
+    'rows': ('_row', 'count', 'sum'),
+    'videos': ('video_id', 'count', 'sum'),
+    'engajamento': ('engajamento', 'sum', 'sum'),
+    'likes': ('likes', 'sum', 'sum'),
+    'shares': ('shares', 'sum', 'sum'),
+    'comentarios': ('comentarios', 'sum', 'sum'),
+    'followers': ('followers', 'sum', 'sum'),
+    'followers_max': ('followers', 'max', 'max'),
+    'audienceSizes': ('audienceSizes', 'sum', 'sum'),
+    'audience_max': ('audienceSizes', 'max', 'max'),
+    # Somas para as médias de Social/Media Power por influenciador (dividir por 'rows')
+    'socialPowers': ('socialPowers', 'sum', 'sum'),
+    'mediaPowers': ('mediaPowers', 'sum', 'sum'),
+    # Posição da primeira linha do grupo, para recuperar 'Desc'/'link' do vídeo
+    'first_row': ('_row', 'min', 'min'),
+}
+
+
+def build_cube(df):
+    """Agrega ``df`` uma única vez no nível mais fino da hierarquia."""
+    colunas = dict.fromkeys(col for col, _, _ in CUBE_METRICS.values() if col in df.columns)
+    work = df[CUBE_DIMS + list(colunas)]
+    # Agrega em int64/float64: as colunas de origem estão reduzidas para int32/float32
+    # (ver snapshot.compact_dtypes), e somas em float32 perdem precisão
+    work = work.astype({col: 'int64' if work[col].dtype.kind in 'iu' else 'float64' for col in colunas})
+    work = work.assign(_row=np.arange(len(df)))
+    aggs = {nome: (col, agg) for nome, (col, agg, _) in CUBE_METRICS.items()}
+    return work.groupby(CUBE_DIMS, observed=True, sort=False).agg(**aggs).reset_index()
+
+
+def subset_cube(df, rows):
+    """Cubo só das linhas ``rows`` de ``df``, com ``first_row`` nas posições de ``df``.
+
+    Para seleções que o cubo completo não responde (ex.: filtros de faceta).
+    """
+    rows = np.asarray(rows)
+    cube = build_cube(df.take(rows))
+    cube['first_row'] = rows[cube['first_row'].to_numpy()]
+    return cube
+
+
+def _partial_cube(df, rows):
+    """Cubo de ``df`` com ``first_row`` traduzido para as posições ``rows``.
+
+    ``rows`` pode vir fora de ordem (ex.: linhas atualizadas na ordem do
+    lote); ``df`` é reordenado junto para que o mínimo local seja o mínimo
+    das posições.
+    """
+    rows = np.asarray(rows)
+    ordem = np.argsort(rows, kind='stable')
+    parcial = build_cube(df.iloc[ordem])
+    parcial['first_row'] = rows[ordem][parcial['first_row'].to_numpy()]
+    return parcial.astype({dim: object for dim in CUBE_DIMS}).set_index(CUBE_DIMS)
+
+
+def update_cube(cube, df, added_rows, removed=None):
+    """Aplica ao cubo o delta de um lote, sem reagregar o histórico.
+
+    ``added_rows`` são as posições em ``df`` das linhas novas ou atualizadas
+    (já na versão nova) e ``removed`` traz a versão antiga das linhas
+    atualizadas, com a posição delas na coluna ``_row``. Somas e contagens
+    são ajustadas por delta; máximos e primeira linha só são recalculados a
+    partir de ``df`` nas células em que a linha antiga era o máximo ou a
+    primeira linha (o único caso em que o delta não basta).
+    """
+    base = cube.astype({dim: object for dim in CUBE_DIMS}).set_index(CUBE_DIMS)
+    somas = [nome for nome, (_, _, final) in CUBE_METRICS.items() if final == 'sum']
+    maximos = [nome for nome, (_, _, final) in CUBE_METRICS.items() if final == 'max']
+    novo = base[somas]
+    partes_max = [base[maximos]]
+    partes_min = [base['first_row']]
+    if len(added_rows):
+        adicionado = _partial_cube(df.iloc[added_rows], added_rows)
+        novo = novo.add(adicionado[somas], fill_value=0)
+        partes_max.append(adicionado[maximos])
+        partes_min.append(adicionado['first_row'])
+    recalcular = pd.Index([])
+    if removed is not None and len(removed):
+        removido = _partial_cube(removed.drop(columns='_row'), removed['_row'])
+        novo = novo.sub(removido[somas], fill_value=0)
+        antigo = base.reindex(removido.index)
+        recalcular = removido.index[
+            (removido[maximos] >= antigo[maximos]).any(axis=1)
+            | (removido['first_row'] == antigo['first_row'])
+        ]
+    for nome in maximos:
+        novo[nome] = pd.concat([parte[nome] for parte in partes_max], axis=1).max(axis=1)
+    novo['first_row'] = pd.concat(partes_min, axis=1).min(axis=1)
+
+    if len(recalcular):
+        chaves = pd.MultiIndex.from_frame(df[CUBE_DIMS].astype(object))
+        linhas = np.flatnonzero(chaves.isin(recalcular))
+        exato = _partial_cube(df.iloc[linhas], linhas)
+        novo.loc[exato.index, maximos + ['first_row']] = exato[maximos + ['first_row']]
+
+    # O alinhamento com fill_value passa por float; volta aos tipos do cubo
+    novo = novo[novo['rows'] > 0].reset_index()
+    tipos = {nome: cube[nome].dtype for nome in CUBE_METRICS}
+    tipos.update({dim: 'category' for dim in CUBE_DIMS})
+    return novo[CUBE_DIMS + list(CUBE_METRICS)].astype(tipos)
+
+
+def filter_cube(cube, filters=None):
+    """Linhas do cubo que atendem ``filters`` ({dimensão: valores aceitos}).
+
+    Dimensões ausentes ou com valor ``None`` não filtram.
+    """
+    mask = np.ones(len(cube), dtype=bool)
+    for dim, valores in (filters or {}).items():
+        if valores is not None:
+            mask &= cube[dim].isin(valores).to_numpy()
+    return cube[mask]
+
+
+def rollup(cube, by, filters=None, metrics=None):
+    """Reagrega o cubo filtrado pelas dimensões ``by``.
+
+    Devolve um DataFrame indexado por ``by`` com as métricas pedidas
+    (todas por padrão), no mesmo formato de um ``groupby`` nas linhas.
+    """
+    metrics = metrics or list(CUBE_METRICS)
+    sel = filter_cube(cube, filters)
+    aggs = {nome: CUBE_METRICS[nome][2] for nome in metrics}
+    return sel.groupby(by, observed=True)[metrics].agg(aggs)
+
+
+def totals(cube, filters=None):
+    """Totais (sem agrupamento) das métricas somáveis do cubo filtrado."""
+    sel = filter_cube(cube, filters)
+    return pd.Series({nome: sel[nome].agg(final) for nome, (_, _, final) in CUBE_METRICS.items()
+                      if nome != 'first_row'})
+
+
+def rank_values(cube, by, metric, filters=None):
+    """Valor de ``metric`` por categoria de ``by`` no cubo filtrado, sem groupby.
+
+    Devolve um array indexado pelo código da categoria (NaN onde a seleção
+    não tem linhas). Somas saem de um ``bincount`` e máximos de um
+    ``maximum.at``, ambos O(células).
+    """
+    sel = filter_cube(cube, filters)
+    codes = sel[by].cat.codes.to_numpy()
+    n = len(sel[by].cat.categories)
+    valores_metrica = sel[metric].to_numpy(dtype=float)
+    if CUBE_METRICS[metric][2] == 'sum':
+        # Sem linhas, o bincount devolve int64 (e o NaN abaixo não caberia)
+        valores = np.bincount(codes, weights=valores_metrica, minlength=n).astype(float)
+    else:
+        valores = np.full(n, -np.inf)
+        np.maximum.at(valores, codes, valores_metrica)
+    valores[np.bincount(codes, minlength=n) == 0] = np.nan
+    return valores
+
+
+def top_k_positions(valores, k):
+    """Posições dos ``k`` maiores ``valores`` (NaN ignorado), em ordem decrescente.
+
+    Usa seleção parcial (``np.partition``) e só ordena os ``k`` escolhidos.
+    Empates ficam na ordem das posições, como em uma ordenação estável.
+    """
+    validos = np.flatnonzero(~np.isnan(valores))
+    v = valores[validos]
+    if k <= 0:
+        return validos[:0]
+    if k < len(v):
+        corte = np.partition(v, len(v) - k)[len(v) - k]
+        acima = np.flatnonzero(v > corte)
+        empate = np.flatnonzero(v == corte)[:k - len(acima)]
+        escolhidos = np.concatenate([acima, empate])
+    else:
+        escolhidos = np.arange(len(v))
+    escolhidos = escolhidos[np.lexsort((escolhidos, -v[escolhidos]))]
+    return validos[escolhidos]
+
+
+def top_k_rollup(cube, by, metric, k, filters=None, metrics=None, positions=None):
+    """As ``k`` categorias de ``by`` com maior ``metric``, com as ``metrics`` pedidas.
+
+    Mesmo resultado de ``rollup(...).sort_values(metric).head(k)`` sem
+    reagregar e ordenar todos os grupos: só as células das ``k`` escolhidas
+    passam pelo groupby. ``positions`` (códigos de ``by`` já em ordem, ver
+    ``top_k_positions``) dispensa a seleção.
+    """
+    metrics = metrics or [metric]
+    if positions is None:
+        positions = top_k_positions(rank_values(cube, by, metric, filters), k)
+    positions = positions[:k]
+    sel = filter_cube(cube, filters)
+    sel = sel[np.isin(sel[by].cat.codes.to_numpy(), positions)]
+    aggs = {nome: CUBE_METRICS[nome][2] for nome in metrics}
+    resultado = sel.groupby(by, observed=True)[metrics].agg(aggs)
+    return resultado.reindex(pd.Index(sel[by].cat.categories[positions], name=by))
+
+
+def influencer_points(cube, filters=None):
+    """Um ponto por influenciador para o gráfico Social vs Media Power.
+
+    Social/Media Power viram médias dos vídeos, a audiência é a maior do
+    influenciador e a cor é a MicroTrend em que ele mais publicou. Sai das
+    células do cubo filtrado (já separadas por MicroTrend), sem passar pelas
+    linhas de vídeo.
+    """
+    sel = filter_cube(cube, filters)
+    pontos = sel.groupby('nickName', observed=True).agg(
+        socialPowers=('socialPowers', 'sum'),
+        mediaPowers=('mediaPowers', 'sum'),
+        audienceSizes=('audience_max', 'max'),
+        videos=('rows', 'sum'),
+    )
+    pontos['socialPowers'] /= pontos['videos']
+    pontos['mediaPowers'] /= pontos['videos']
+    dominante = (sel.groupby(['nickName', 'MicroTrends'], observed=True)['rows'].sum()
+                 .reset_index(name='n')
+                 .sort_values('n', ascending=False, kind='stable')
+                 .drop_duplicates('nickName')
+                 .set_index('nickName')['MicroTrends'])
+    pontos['MicroTrends'] = dominante.reindex(pontos.index)
+    return pontos.reset_index()
+
+
+def build_creators(cube):
+    """Tabela de influenciadores do snapshot, uma linha por ``nickName``.
+
+    O id do influenciador é a posição do ``nickName`` nas categorias do cubo.
+    Traz os atributos fixos (canal e MicroTrend predominantes), os totais de
+    ``influencer_points`` e ``followers_max``/``engajamento``/``first_row``,
+    para consultas sem filtro que não precisam reagregar o cubo.
+    """
+    creators = influencer_points(cube)
+    canais = (cube.groupby(['nickName', 'origem'], observed=True)['rows'].sum()
+              .reset_index()
+              .sort_values('rows', ascending=False, kind='stable')
+              .drop_duplicates('nickName')
+              .set_index('nickName')['origem'])
+    totais = cube.groupby('nickName', observed=True).agg(
+        engajamento=('engajamento', 'sum'), followers_max=('followers_max', 'max'),
+        first_row=('first_row', 'min'))
+    creators = creators.join(canais.rename('origem'), on='nickName').join(totais, on='nickName')
+    creators.index = pd.Index(cube['nickName'].cat.categories.get_indexer(creators['nickName']),
+                              name='creator_id')
+    return creators
+
+
+def density_grid(df, x='socialPowers', y='mediaPowers', bins=60):
+    """Contagem de vídeos por célula de uma grade ``bins`` x ``bins``.
+
+    Devolve ``(centros_x, centros_y, contagens)`` com as células vazias como
+    NaN, no formato que o ``go.Heatmap`` espera (linhas = eixo y).
+    """
+    contagens, bordas_x, bordas_y = np.histogram2d(df[x].to_numpy(), df[y].to_numpy(), bins=bins)
+    centros_x = (bordas_x[:-1] + bordas_x[1:]) / 2
+    centros_y = (bordas_y[:-1] + bordas_y[1:]) / 2
+    return centros_x, centros_y, np.where(contagens > 0, contagens, np.nan).T
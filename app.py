@@ -1,7 +1,19 @@
+import os
+import time
+from functools import partial
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+
+import cards
+import engine
+import figures
+from cards import COLORS
+from drill import DRILL_LABELS, DRILL_MAX_TILES, DRILL_TITLES, DrillPath
+from engine import FACET_LABELS, RANK_METRICS, SCATTER_MAX_POINTS, SCATTER_MODES, SEARCH_KEY
+from instrumentation import RerunTimer, StageMetrics, memory_tracing, set_memory_tracing
+from result_cache import ResultCache, make_key, normalize_filters
+from refresher import DatasetRefresher
 
 # 1. CONFIGURAÇÃO DE PÁGINA
 st.set_page_config(
@@ -10,76 +22,190 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 2. ESTILO E PALETA DE CORES (Samsung Corporate Identity)
-COLORS = {
-    'primary': '#034EA2',    # Azul Samsung
-    'secondary': '#000000',  # Preto
-    'accent': '#1428a0',     # Azul Royal
-    'background': '#F8F9FA', # Cinza muito claro
-    'card': '#FFFFFF',       # Branco
-    'text': '#333333'
-}
+# Tempo (e memória, se rastreada) de cada etapa do rerun, por processo
+@st.cache_resource
+def get_stage_metrics():
+    set_memory_tracing(os.environ.get('TRENDS_TRACE_MEMORY') == '1')
+    return StageMetrics()
+
+timer = RerunTimer(get_stage_metrics())
+
+# Seções com gráficos em abas que só são calculadas e montadas quando abertas;
+# TRENDS_LAZY_SECTIONS=0 volta a montar todas em sequência na página
+LAZY_SECTIONS = os.environ.get('TRENDS_LAZY_SECTIONS', '1') == '1'
 
+# 2. ESTILO E PALETA DE CORES (Samsung Corporate Identity; CSS em cards.py)
 def apply_custom_styles():
-    st.markdown(f"""
-        <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;700&display=swap');
-        .main {{ background-color: {COLORS['background']}; font-family: 'Inter', sans-serif; }}
-        
-        /* Estilização de KPI Cards */
-        .kpi-box {{
-            background: white;
-            padding: 20px;
-            border-radius: 12px;
-            border-top: 4px solid {COLORS['primary']};
-            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-            text-align: center;
-        }}
-        .kpi-value {{ font-size: 1.8rem; font-weight: bold; color: {COLORS['primary']}; margin: 5px 0; }}
-        .kpi-label {{ font-size: 0.8rem; color: #666; text-transform: uppercase; letter-spacing: 1px; }}
-        
-        /* Influencer Cards */
-        .influencer-card {{
-            background: white;
-            padding: 20px;
-            border-radius: 15px;
-            margin-bottom: 15px;
-            border: 1px solid #E0E0E0;
-            transition: 0.3s ease;
-        }}
-        .influencer-card:hover {{
-            box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-            transform: translateY(-3px);
-            border-color: {COLORS['primary']};
-        }}
-        
-        /* Botão de Link */
-        .btn-link {{
-            text-decoration: none;
-            color: white !important;
-            background: {COLORS['primary']};
-            padding: 8px 20px;
-            border-radius: 20px;
-            font-size: 0.8rem;
-            font-weight: bold;
-            display: inline-block;
-        }}
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(cards.page_styles(), unsafe_allow_html=True)
 
 # 3. CARREGAMENTO E LIMPEZA DE DADOS
-@st.cache_data
+# O Excel é convertido em um snapshot Arrow (ver snapshot.py) e só é relido
+# quando o hash do arquivo muda. Uma thread por processo (ver refresher.py)
+# verifica a origem e monta a versão nova em segundo plano; as sessões seguem
+# na versão publicada até a troca, sem esperar a recarga. O Dataset (snapshot
+# mapeado em memória, cubo, índices) é compartilhado entre sessões sem cópia
+# e nenhum trecho do app altera esses objetos.
+@st.cache_resource
+def get_refresher():
+    cache = get_result_cache()
+    # Resultados da versão antiga não serão mais pedidos: libera a memória na troca
+    return DatasetRefresher(on_swap=lambda antiga, nova: cache.discard_version(antiga)).start()
+
 def load_data():
     try:
-        df = pd.read_excel('Samsung_base_reclassificada_COM_descricao.xlsx')
-        numeric_cols = ['engajamento', 'followers', 'audienceSizes', 'socialPowers', 
-                        'mediaPowers', 'likes', 'shares', 'comentarios']
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        return df
+        return get_refresher().current()
     except Exception as e:
         st.error(f"Erro ao carregar o arquivo: {e}")
-        return pd.DataFrame()
+        return None
+
+# Cache de resultados compartilhado por todas as sessões do processo: agregados
+# e figuras de cada seção, por versão do snapshot + estado normalizado dos filtros
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+def cached_result(secao, filtros, calcular):
+    return get_result_cache().get_or_compute(make_key(ds.version, secao, filtros), calcular)
+
+# Painel de desempenho: abre com ?admin=1 na URL ou TRENDS_ADMIN=1
+def admin_panel(metrics):
+    with st.sidebar.expander("⚙️ Desempenho (admin)"):
+        rastrear = st.checkbox("Medir memória (tracemalloc)", value=memory_tracing(),
+                               help="Mede o pico de memória de cada etapa; deixa o app mais lento")
+        if rastrear != memory_tracing():
+            set_memory_tracing(rastrear)
+
+        resumo = pd.DataFrame.from_dict(metrics.summary(), orient='index')
+        if not resumo.empty:
+            tabela = pd.DataFrame({
+                'n': resumo['count'],
+                'p50 ms': resumo['p50_s'] * 1000,
+                'p90 ms': resumo['p90_s'] * 1000,
+                'p99 ms': resumo['p99_s'] * 1000,
+                'máx ms': resumo['max_s'] * 1000,
+            })
+            if 'peak_bytes_p90' in resumo:
+                tabela['mem p90 MB'] = resumo['peak_bytes_p90'] / 2**20
+            st.dataframe(tabela.sort_values('p90 ms', ascending=False).round(1))
+
+        base = get_refresher().status()
+        if base['version']:
+            st.caption(f"Base: versão {base['version'][:12]}, carregada às "
+                       f"{time.strftime('%H:%M:%S', time.localtime(base['loaded_at']))}"
+                       + (" · compartilhada" if base['attached'] else "")
+                       + (" · recarregando..." if base['refreshing'] else ""))
+        if base['last_error']:
+            st.warning(f"Falha na última recarga (a versão atual segue publicada): {base['last_error']}")
+
+        cache = get_result_cache().stats()
+        st.caption(f"Cache de resultados: {cache['entries']} entradas, "
+                   f"{cache['bytes'] / 2**20:.1f} MB, acerto {cache['hit_rate']:.0%}")
+        col_exportar, col_zerar = st.columns(2)
+        if col_exportar.button("Exportar"):
+            metrics.export()
+            st.caption("Gravado em .metrics/stages.json e .metrics/stages.prom")
+        if col_zerar.button("Zerar"):
+            metrics.reset()
+
+# Listas de cards: um único st.markdown com os itens até o limite atual e um
+# botão "Carregar mais". O limite volta ao início quando os filtros mudam.
+def _mais_cards(chave):
+    estado, limite = st.session_state[chave]
+    st.session_state[chave] = (estado, limite + cards.CARDS_PAGE_SIZE)
+
+def paginated_cards(secao, filtros, itens, montar_html):
+    chave = f'cards_{secao}'
+    estado = make_key(ds.version, secao, filtros)
+    if st.session_state.get(chave, (None,))[0] != estado:
+        st.session_state[chave] = (estado, cards.CARDS_PAGE_SIZE)
+    limite = st.session_state[chave][1]
+    st.markdown(montar_html(itens.iloc[:limite]), unsafe_allow_html=True)
+    if len(itens) > limite:
+        st.button(f"Carregar mais ({len(itens) - limite} restantes)", key=f'{chave}_mais',
+                  on_click=_mais_cards, args=(chave,))
+
+# Busca textual (índice invertido do snapshot, ver search.py): as linhas
+# encontradas viram o ponto de partida da cascata de filtros das páginas
+def search_box():
+    consulta = st.sidebar.text_input(
+        "🔎 Buscar", key='busca',
+        placeholder="Vídeos, influenciadores ou tendências",
+        help="Busca nas descrições dos vídeos, nos nomes dos influenciadores e nas tendências (sem diferenciar acentos)"
+    ).strip()
+    if not consulta:
+        return None, None
+    achados = ds.search.search(consulta)
+    if not len(achados['rows']):
+        st.sidebar.warning(f"Nenhum vídeo encontrado para \"{consulta}\"; a busca foi ignorada.")
+        return None, None
+    resumo = [f"{len(achados['rows'])} vídeo(s)"]
+    if len(achados['influencers']):
+        resumo.append("Influenciadores: " + ", ".join(achados['influencers']['nickName'].head(3).str.strip()))
+    if len(achados['trends']):
+        resumo.append("Tendências: " + ", ".join(achados['trends']['trend'].head(3)))
+    st.sidebar.caption(" · ".join(resumo))
+    return consulta, achados['rows']
+
+# Seções da página: abas com carga sob demanda (só a aberta roda no rerun)
+# ou, com LAZY_SECTIONS desligado, contêineres em sequência sempre montados
+def page_sections(chave, titulos):
+    if LAZY_SECTIONS:
+        return st.tabs(titulos, key=chave, on_change='rerun')
+    return [st.container() for _ in titulos]
+
+def section_open(secao):
+    return not LAZY_SECTIONS or secao.open
+
+# Drill-down da página 1 (ver drill.py): a sessão guarda só o caminho
+# ((dimensão, valor), ...), que volta à raiz quando a seleção da sidebar muda.
+# Os roll-ups de cada nível ficam no cache de resultados da versão atual, com
+# chave na seleção + caminho, e os passos que não valem mais são ignorados.
+def drill_path(filtros):
+    estado = normalize_filters(filtros)
+    if st.session_state.get('p1_drill', (None,))[0] != estado:
+        st.session_state['p1_drill'] = (estado, ())
+    def nivel(passo, by):
+        selecao = dict(filtros, **passo)
+        return cached_result('p1_drill', dict(selecao, nivel=[by]), lambda: engine.drill_rollup(ds, selecao, by))
+    caminho = DrillPath(nivel, st.session_state['p1_drill'][1])
+    st.session_state['p1_drill'] = (estado, caminho.path)
+    return caminho
+
+def _drill_push(dim, valor):
+    estado, caminho = st.session_state['p1_drill']
+    st.session_state['p1_drill'] = (estado, caminho + ((dim, valor),))
+
+def _drill_click(chave, dim, campo):
+    # Barra clicada: o valor de ``dim`` está em customdata[campo]
+    pontos = st.session_state[chave]['selection']['points']
+    if pontos and 'customdata' in pontos[0]:
+        _drill_push(dim, pontos[0]['customdata'][campo])
+
+def _drill_select(chave, dim):
+    # Valor escolhido na caixa de detalhamento do nível
+    if st.session_state[chave] is not None:
+        _drill_push(dim, st.session_state[chave])
+
+def _drill_up(profundidade):
+    estado, caminho = st.session_state['p1_drill']
+    st.session_state['p1_drill'] = (estado, caminho[:profundidade])
+
+def drill_breadcrumb(caminho):
+    if caminho.depth:
+        with st.container(horizontal=True):
+            st.button("🏠 Todas", key='p1_drill_0', on_click=_drill_up, args=(0,))
+            for profundidade, (dim, valor) in enumerate(caminho.path, start=1):
+                st.button(f"› {DRILL_LABELS[dim]}: {str(valor).strip()}", key=f'p1_drill_{profundidade}',
+                          on_click=_drill_up, args=(profundidade,), disabled=profundidade == caminho.depth)
+    if caminho.dim is not None:
+        # Uma caixa por profundidade: ao voltar a um nível ela começa vazia de novo
+        chave = f'p1_drill_sel_{caminho.depth}'
+        valores = caminho.rollup(caminho.dim).sort_values('engajamento', ascending=False).index
+        st.selectbox(f"🔎 Detalhar {DRILL_LABELS[caminho.dim]}", valores, index=None, key=chave,
+                     format_func=lambda valor: str(valor).strip(), placeholder="Escolha para descer um nível",
+                     on_change=_drill_select, args=(chave, caminho.dim),
+                     help="MacroTrend → MicroTrend → Influenciador; uma barra de MicroTrend "
+                          "no gráfico de Top Microtrends também detalha.")
 
 def format_num(num):
     if num >= 1_000_000: return f"{num/1_000_000:.1f}M"
@@ -87,18 +213,23 @@ def format_num(num):
     return f"{int(num)}"
 
 # --- INÍCIO DO APP ---
-df = load_data()
+ds = load_data()
 apply_custom_styles()
+timer.lap('load_data')
 
-# Remover categoria "Outros/Sem Categoria" e valores vazios
-if not df.empty:
-    df = df[df['MacroTrends'] != 'Outros/Sem Categoria']
-    df = df[df['MacroTrends'].notna()]  # Remover valores NaN
+if ds is not None and not ds.df.empty:
+    index, trend_meta, facets = ds.index, ds.trend_meta, ds.facets
 
-if not df.empty:
     # Sidebar
     st.sidebar.title("Trends Dashboard")
     page = st.sidebar.radio("Navegação", ["Macro & Micro Trends", "Microtrends & Influencers"])
+    consulta, rows_busca = search_box()
+    filtro_busca = {SEARCH_KEY: [consulta] if consulta else None}
+    # Distintos (influenciadores, vídeos) aproximados pelos sketches, ver sketches.py
+    contagem_exata = st.sidebar.toggle(
+        "Contagem exata de distintos", value=False,
+        help="Desligado, influenciadores e vídeos distintos são estimados (erro típico de ~2%) sem percorrer os vídeos"
+    )
 
     # --- PÁGINA 1: MACRO & MICRO TRENDS ---
     if page == "Macro & Micro Trends":
@@ -107,24 +238,20 @@ if not df.empty:
         # Filtros na Sidebar (responsivos em cascata)
         st.sidebar.markdown("---")
         
-        # Criar dicionário de descrições para MacroTrends
-        macro_descricoes_p1 = {}
-        if 'Descricao Macrotrends' in df.columns:
-            for macro in df['MacroTrends'].dropna().unique():
-                desc = df[df['MacroTrends'] == macro]['Descricao Macrotrends'].iloc[0]
-                if pd.notna(desc) and str(desc) != 'nan':
-                    macro_descricoes_p1[macro] = desc
+        # Descrições das MacroTrends (metadados pré-calculados do snapshot)
+        macro_descricoes_p1 = trend_meta.descriptions('MacroTrends')
         
         # 1. Filtro de MacroTrend
+        macros_disponiveis_p1 = index.options('MacroTrends', rows_busca)
         f_macro_p1 = st.sidebar.multiselect(
             "Filtrar MacroTrend", 
-            options=df['MacroTrends'].unique(), 
-            default=df['MacroTrends'].unique(),
+            options=macros_disponiveis_p1, 
+            default=macros_disponiveis_p1,
             key='p1_macro'
         )
         
         # Mostrar descrições das MacroTrends SELECIONADAS
-        if f_macro_p1 and len(f_macro_p1) < len(df['MacroTrends'].unique()):
+        if f_macro_p1 and len(f_macro_p1) < len(macros_disponiveis_p1):
             for macro in f_macro_p1:
                 if macro in macro_descricoes_p1:
                     st.sidebar.markdown(f"""
@@ -135,26 +262,22 @@ if not df.empty:
                     """, unsafe_allow_html=True)
         
         # Aplicar filtro de MacroTrend
-        df_filtered_p1 = df[df['MacroTrends'].isin(f_macro_p1)]
+        rows_p1 = index.select({'MacroTrends': f_macro_p1}, rows=rows_busca)
         
-        # Criar dicionário de descrições para MicroTrends (filtrado)
-        micro_descricoes_p1 = {}
-        if 'Descricao Microtrends' in df.columns:
-            for micro in df_filtered_p1['MicroTrends'].dropna().unique():
-                desc = df_filtered_p1[df_filtered_p1['MicroTrends'] == micro]['Descricao Microtrends'].iloc[0]
-                if pd.notna(desc) and str(desc) != 'nan':
-                    micro_descricoes_p1[micro] = desc
+        # Descrições das MicroTrends (metadados pré-calculados do snapshot)
+        micro_descricoes_p1 = trend_meta.descriptions('MicroTrends')
         
         # 2. Filtro de MicroTrend (responsivo a MacroTrend)
+        micros_disponiveis_p1 = index.options('MicroTrends', rows_p1)
         f_micro_p1 = st.sidebar.multiselect(
             "Filtrar MicroTrend", 
-            options=df_filtered_p1['MicroTrends'].unique(), 
-            default=df_filtered_p1['MicroTrends'].unique(),
+            options=micros_disponiveis_p1, 
+            default=micros_disponiveis_p1,
             key='p1_micro'
         )
         
         # Mostrar descrições das MicroTrends SELECIONADAS
-        if f_micro_p1 and len(f_micro_p1) < len(df_filtered_p1['MicroTrends'].unique()):
+        if f_micro_p1 and len(f_micro_p1) < len(micros_disponiveis_p1):
             for micro in f_micro_p1:
                 if micro in micro_descricoes_p1:
                     st.sidebar.markdown(f"""
@@ -164,161 +287,90 @@ if not df.empty:
                         </div>
                     """, unsafe_allow_html=True)
         
-        # Aplicação final dos filtros
-        dff = df_filtered_p1[df_filtered_p1['MicroTrends'].isin(f_micro_p1)]
-
-        # 1. Tree Map Reativo
-        st.subheader("Distribuição: Macrotrends por Engajamento (Views)")
-        macro_plot = dff.groupby('MacroTrends')['engajamento'].sum().reset_index()
-        
-        # Quebra de texto para caber nas caixas
-        def quebrar_texto(texto, max_chars=20):
-            palavras = str(texto).split()
-            linhas = []
-            linha_atual = []
-            tam_atual = 0
-            
-            for palavra in palavras:
-                if tam_atual + len(palavra) + 1 <= max_chars:
-                    linha_atual.append(palavra)
-                    tam_atual += len(palavra) + 1
-                else:
-                    if linha_atual:
-                        linhas.append(' '.join(linha_atual))
-                    linha_atual = [palavra]
-                    tam_atual = len(palavra)
-            
-            if linha_atual:
-                linhas.append(' '.join(linha_atual))
-            
-            return '<br>'.join(linhas)
-        
-        # Adicionar engajamento em MM ao label
-        def criar_label_com_engajamento(row):
-            texto_quebrado = quebrar_texto(row['MacroTrends'])
-            engajamento_mm = f"({row['engajamento']/1_000_000:.1f}MM)"
-            return f"{texto_quebrado}<br>{engajamento_mm}"
-        
-        macro_plot['MacroTrends_Quebrado'] = macro_plot.apply(criar_label_com_engajamento, axis=1)
-        
-        fig_tree = px.treemap(macro_plot, path=['MacroTrends_Quebrado'], values='engajamento',
-                              color='engajamento', color_continuous_scale='Blues')
-        fig_tree.update_traces(
-            textfont=dict(size=13, family='Inter', color='black'),
-            textposition='middle center',
-            marker=dict(line=dict(width=2, color='white'))
-        )
-        fig_tree.update_layout(
-            height=700,
-            uniformtext=dict(minsize=8, mode='show')
-        )
-        st.plotly_chart(fig_tree, use_container_width=True)
+        # Aplicação final dos filtros (sobre o cubo agregado)
+        filtros_p1 = {'MacroTrends': f_macro_p1, 'MicroTrends': f_micro_p1, **filtro_busca}
+        timer.lap('p1.filtros')
+        macro_agg_p1, micro_agg_p1 = cached_result(
+            'p1_agg', filtros_p1, lambda: engine.trend_engagement(ds, filtros_p1))
+        timer.lap('p1.agregados')
 
-        # 1.5. Lista de MacroTrends com Descrições
-        st.subheader("Macrotrends Identificadas")
-        
-        # Obter MacroTrends únicas e suas descrições
-        if 'Descricao Macrotrends' in dff.columns:
-            macros_info = dff.groupby('MacroTrends').agg({
-                'Descricao Macrotrends': 'first',
-                'engajamento': 'sum'
-            }).sort_values('engajamento', ascending=False).reset_index()
+        # Caminho do drill-down: cada nível sai das células do nível de cima
+        caminho = drill_path(filtros_p1)
+        filtros_drill = dict(filtros_p1, **caminho.filters())
+        if caminho.depth:
+            n_macros, n_micros = len(caminho.rollup('MacroTrends')), len(caminho.rollup('MicroTrends'))
         else:
-            macros_info = dff.groupby('MacroTrends').agg({
-                'engajamento': 'sum'
-            }).sort_values('engajamento', ascending=False).reset_index()
-            macros_info['Descricao Macrotrends'] = 'Descrição não disponível'
-        
-        # Criar cards para cada MacroTrend
-        for idx, row in macros_info.iterrows():
-            descricao = str(row.get('Descricao Macrotrends', 'Descrição não disponível'))
-            if pd.isna(descricao) or descricao == 'nan':
-                descricao = 'Descrição não disponível'
-            
-            st.markdown(f"""
-                <div style="
-                    background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
-                    border-left: 5px solid {COLORS['primary']};
-                    border-radius: 10px;
-                    padding: 12px 18px;
-                    margin-bottom: 12px;
-                    box-shadow: 0 2px 6px rgba(0,0,0,0.06);
-                    transition: all 0.3s ease;
-                ">
-                    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 6px;">
-                        <h4 style="color: {COLORS['primary']}; margin: 0; font-size: 1.1rem; font-weight: 700;">
-                            {row['MacroTrends']}
-                        </h4>
-                        <span style="
-                            background: {COLORS['primary']};
-                            color: white;
-                            padding: 5px 14px;
-                            border-radius: 20px;
-                            font-size: 0.8rem;
-                            font-weight: 600;
-                        ">
-                            {format_num(row['engajamento'])} views
-                        </span>
-                    </div>
-                    <p style="
-                        color: #555;
-                        margin: 0;
-                        line-height: 1.5;
-                        font-size: 0.9rem;
-                    ">
-                        {descricao}
-                    </p>
-                </div>
-            """, unsafe_allow_html=True)
-
-        # 2. Campo de Texto Dinâmico
+            n_macros, n_micros = len(macro_agg_p1), len(micro_agg_p1)
+        timer.lap('p1.drill')
+
+        # 1. Campo de Texto Dinâmico (antes dos gráficos: é o primeiro resumo na tela)
+        distintos_p1, aproximado_p1 = cached_result(
+            'p1_distintos', dict(filtros_drill, exata=[contagem_exata]),
+            lambda: engine.distinct_counts(ds, filtros_drill, contagem_exata))
         st.markdown(f"""
             <div style="background:#034EA2; color:white; padding:20px; border-radius:12px; margin-bottom:25px;">
-                <b>Análise Ativa:</b> Exibindo dados de {len(dff['MacroTrends'].unique())} Macrotrends 
-                e {len(dff['MicroTrends'].unique())} Microtrends baseadas na sua seleção.
+                <b>Análise Ativa:</b> Exibindo dados de {n_macros} Macrotrends 
+                e {n_micros} Microtrends baseadas na sua seleção, com
+                {"≈" if aproximado_p1 else ""}{format_num(distintos_p1.loc['Total', 'influenciadores'])} influenciadores.
             </div>
         """, unsafe_allow_html=True)
+        timer.lap('p1.distintos')
+
+        drill_breadcrumb(caminho)
+
+        sec_tree, sec_macros, sec_bar = page_sections(
+            'p1_secoes', ["🗺️ Distribuição", "📌 Macrotrends", "📊 Top Microtrends"])
+
+        # 2. Tree Map Reativo (áreas do nível atual do drill-down)
+        with sec_tree:
+            if section_open(sec_tree):
+                if caminho.dim is None:
+                    # Último nível: o card do influenciador escolhido
+                    st.subheader("Influenciador Selecionado")
+                    st.markdown(cards.influencer_cards_html(engine.drill_influencers(ds, caminho)),
+                                unsafe_allow_html=True)
+                else:
+                    st.subheader(f"Distribuição: {DRILL_TITLES[caminho.dim]} por Engajamento (Views)")
+                    # Na raiz, o agregado da seleção; abaixo dela, o roll-up das células do nível
+                    areas = caminho.rollup(caminho.dim) if caminho.depth else macro_agg_p1
+                    if len(areas) > DRILL_MAX_TILES:
+                        st.caption(f"As {DRILL_MAX_TILES} de maior engajamento, de {len(areas)}.")
+                    fig_tree = cached_result('p1_treemap', dict(filtros_drill, nivel=[caminho.dim]), lambda: figures.treemap_figure(
+                        areas.nlargest(DRILL_MAX_TILES, 'engajamento') if len(areas) > DRILL_MAX_TILES else areas,
+                        trend_meta.label_cache))
+                    st.plotly_chart(fig_tree, use_container_width=True, key='p1_treemap')
+                timer.lap('p1.treemap')
+
+        # 2.5. Lista de MacroTrends com Descrições
+        with sec_macros:
+            if section_open(sec_macros):
+                st.subheader("Macrotrends Identificadas")
+
+                # Obter MacroTrends únicas e suas descrições
+                macros_info = cached_result('p1_macros_info', filtros_drill,
+                                            lambda: engine.macro_summary(ds, filtros_drill))
+                timer.lap('p1.descricoes')
+
+                # Cards das MacroTrends (um bloco HTML por página visível)
+                paginated_cards('p1_macros', filtros_drill, macros_info, cards.macro_cards_html)
+                timer.lap('p1.cards')
 
         # 3. Bar Chart Reativo com Descrições
-        st.subheader("Top Microtrends por Visualizações")
-        
-        # Obter MicroTrends com descrições
-        if 'Descricao Microtrends' in dff.columns:
-            micro_plot = dff.groupby('MicroTrends').agg({
-                'engajamento': 'sum',
-                'Descricao Microtrends': 'first'
-            }).sort_values('engajamento', ascending=False).head(15).reset_index()
-        else:
-            micro_plot = dff.groupby('MicroTrends')['engajamento'].sum().sort_values(ascending=False).head(15).reset_index()
-            micro_plot['Descricao Microtrends'] = 'Descrição não disponível'
-        
-        # Tratar descrições vazias
-        micro_plot['Descricao Microtrends'] = micro_plot['Descricao Microtrends'].apply(
-            lambda x: x if pd.notna(x) and str(x) != 'nan' else 'Descrição não disponível'
-        )
-        
-        fig_bar = px.bar(micro_plot, x='engajamento', y='MicroTrends', orientation='h',
-                         color='engajamento', color_continuous_scale='GnBu',
-                         custom_data=['Descricao Microtrends'])
-        
-        fig_bar.update_traces(
-            hovertemplate='<b>%{y}</b><br>' +
-                         'Engajamento: %{x:,.0f}<br>' +
-                         '<i>%{customdata[0]}</i><br>' +
-                         '<extra></extra>'
-        )
-        
-        fig_bar.update_layout(
-            yaxis={'categoryorder':'total ascending'}, 
-            showlegend=False,
-            height=600,
-            hoverlabel=dict(
-                bgcolor="white",
-                font_size=13,
-                font_family="Inter"
-            )
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        with sec_bar:
+            if section_open(sec_bar):
+                st.subheader("Top Microtrends por Visualizações")
+
+                if caminho.fixed('MicroTrends') is not None:
+                    st.caption(f"Detalhando a MicroTrend {caminho.fixed('MicroTrends')}; "
+                               "volte pelo caminho acima para ver as demais.")
+                else:
+                    fig_bar = cached_result('p1_bar', filtros_drill, lambda: figures.top_microtrends_figure(
+                        engine.drill_top_microtrends(ds, caminho, filtros_p1, 15) if caminho.depth
+                        else engine.top_microtrends(ds, filtros_p1, 15)))
+                    st.plotly_chart(fig_bar, use_container_width=True, key='p1_bar_sel',
+                                    on_select=partial(_drill_click, 'p1_bar_sel', 'MicroTrends', 1),
+                                    selection_mode='points')
+                timer.lap('p1.barras')
 
     # --- PÁGINA 2: MICROTRENDS & INFLUENCERS ---
     else:
@@ -328,28 +380,25 @@ if not df.empty:
         st.sidebar.markdown("---")
         
         # 1. Filtro de Canal
-        f_origem = st.sidebar.multiselect("Filtrar Canal", options=df['origem'].unique(), default=df['origem'].unique())
+        origens_disponiveis = index.options('origem', rows_busca)
+        f_origem = st.sidebar.multiselect("Filtrar Canal", options=origens_disponiveis, default=origens_disponiveis)
         
-        # Aplicar filtro de Canal
-        df_filtered_origem = df[df['origem'].isin(f_origem)]
+        # Aplicar filtro de Canal (posições das linhas, sem copiar o DataFrame)
+        rows_origem = index.select({'origem': f_origem}, rows=rows_busca)
         
-        # Criar dicionário de descrições para MacroTrends
-        macro_descricoes = {}
-        if 'Descricao Macrotrends' in df.columns:
-            for macro in df_filtered_origem['MacroTrends'].dropna().unique():
-                desc = df_filtered_origem[df_filtered_origem['MacroTrends'] == macro]['Descricao Macrotrends'].iloc[0]
-                if pd.notna(desc) and str(desc) != 'nan':
-                    macro_descricoes[macro] = desc
+        # Descrições das MacroTrends do(s) canal(is) selecionado(s)
+        macro_descricoes = trend_meta.descriptions('MacroTrends', f_origem)
         
         # 2. Filtro de MacroTrend (responsivo a Canal)
+        macros_disponiveis = index.options('MacroTrends', rows_origem)
         f_macro = st.sidebar.multiselect(
             "Filtrar MacroTrend", 
-            options=df_filtered_origem['MacroTrends'].unique(), 
-            default=df_filtered_origem['MacroTrends'].unique()
+            options=macros_disponiveis, 
+            default=macros_disponiveis
         )
         
         # Mostrar descrições das MacroTrends SELECIONADAS
-        if f_macro and len(f_macro) < len(df_filtered_origem['MacroTrends'].unique()):
+        if f_macro and len(f_macro) < len(macros_disponiveis):
             for macro in f_macro:
                 if macro in macro_descricoes:
                     st.sidebar.markdown(f"""
@@ -360,25 +409,21 @@ if not df.empty:
                     """, unsafe_allow_html=True)
         
         # Aplicar filtros de Canal + MacroTrend
-        df_filtered_macro = df_filtered_origem[df_filtered_origem['MacroTrends'].isin(f_macro)]
+        rows_macro = index.select({'MacroTrends': f_macro}, rows=rows_origem)
         
-        # Criar dicionário de descrições para MicroTrends (filtrado)
-        micro_descricoes = {}
-        if 'Descricao Microtrends' in df.columns:
-            for micro in df_filtered_macro['MicroTrends'].dropna().unique():
-                desc = df_filtered_macro[df_filtered_macro['MicroTrends'] == micro]['Descricao Microtrends'].iloc[0]
-                if pd.notna(desc) and str(desc) != 'nan':
-                    micro_descricoes[micro] = desc
+        # Descrições das MicroTrends do(s) canal(is) selecionado(s)
+        micro_descricoes = trend_meta.descriptions('MicroTrends', f_origem)
         
         # 3. Filtro de MicroTrend (responsivo a Canal + MacroTrend)
+        micros_disponiveis = index.options('MicroTrends', rows_macro)
         f_micro = st.sidebar.multiselect(
             "Filtrar MicroTrend", 
-            options=df_filtered_macro['MicroTrends'].unique(), 
-            default=df_filtered_macro['MicroTrends'].unique()
+            options=micros_disponiveis, 
+            default=micros_disponiveis
         )
         
         # Mostrar descrições das MicroTrends SELECIONADAS
-        if f_micro and len(f_micro) < len(df_filtered_macro['MicroTrends'].unique()):
+        if f_micro and len(f_micro) < len(micros_disponiveis):
             for micro in f_micro:
                 if micro in micro_descricoes:
                     st.sidebar.markdown(f"""
@@ -389,228 +434,187 @@ if not df.empty:
                     """, unsafe_allow_html=True)
         
         # Aplicar filtros de Canal + MacroTrend + MicroTrend
-        df_filtered = df_filtered_macro[df_filtered_macro['MicroTrends'].isin(f_micro)]
+        rows_filtered = index.select({'MicroTrends': f_micro}, rows=rows_macro)
+
+        # Facetas (Tags, Trends, Marca, Sentimento): vazio = sem filtro.
+        # Opções em ordem de frequência na seleção, cada uma responsiva às anteriores
+        f_facetas = {}
+        with st.sidebar.expander("🏷️ Tags, Marcas e Sentimento"):
+            for col, rotulo in FACET_LABELS.items():
+                contagem = facets.counts(col, rows_filtered)
+                escolhidos = st.multiselect(
+                    f"Filtrar {rotulo}",
+                    options=contagem.index.tolist(),
+                    format_func=lambda valor, contagem=contagem: f"{valor} ({contagem[valor]})"
+                )
+                f_facetas[col] = escolhidos or None
+                if escolhidos:
+                    rows_filtered = facets.select({col: escolhidos}, rows_filtered)
         
         # 4. Filtro de Influenciador (responsivo a todos os filtros acima)
         st.sidebar.markdown("---")
-        influencers_disponiveis = sorted(df_filtered['nickName'].dropna().unique().tolist())
+        influencers_disponiveis = sorted(index.options('nickName', rows_filtered))
         f_influencer = st.sidebar.selectbox(
             "Filtrar Influenciador",
             options=["Todos"] + influencers_disponiveis,
             help="Digite para buscar um influenciador específico"
         )
+        modo_bolhas = st.sidebar.selectbox(
+            "Gráfico Social vs Media Power",
+            options=SCATTER_MODES,
+            help=f"No modo automático, seleções com mais de {SCATTER_MAX_POINTS:,} vídeos "
+                 "são agregadas por influenciador ou em grade de densidade"
+        )
+        metrica_ranking = st.sidebar.selectbox(
+            "Ranking de influenciadores por",
+            options=list(RANK_METRICS),
+            format_func=RANK_METRICS.get
+        )
+        k_ranking = st.sidebar.number_input("Tamanho do ranking", min_value=1, max_value=500, value=10, step=5)
         
         # Aplicação final de todos os filtros
-        dff = df_filtered.copy()
-        if f_influencer != "Todos":
-            dff = dff[dff['nickName'] == f_influencer]
+        filtros = {
+            'origem': f_origem, 'MacroTrends': f_macro, 'MicroTrends': f_micro,
+            'nickName': None if f_influencer == "Todos" else [f_influencer],
+            **f_facetas, **filtro_busca
+        }
+        timer.lap('p2.filtros')
 
         # 1. Coluna de Indicadores (KPIs)
         k_cols = st.columns(6)
+        kpis = cached_result('p2_kpis', filtros, lambda: engine.kpis(ds, filtros))
         k_metrics = [
-            ("Vídeos", len(dff)),
-            ("Views", dff['engajamento'].sum()),
-            ("Followers", dff['followers'].sum()),
-            ("Likes", dff['likes'].sum()),
-            ("Shares", dff['shares'].sum()),
-            ("Comments", dff['comentarios'].sum())
+            ("Vídeos", kpis['videos']),
+            ("Views", kpis['engajamento']),
+            ("Followers", kpis['followers']),
+            ("Likes", kpis['likes']),
+            ("Shares", kpis['shares']),
+            ("Comments", kpis['comentarios'])
         ]
         
         for col, (label, val) in zip(k_cols, k_metrics):
             with col:
-                st.markdown(f"""<div class="kpi-box"><div class="kpi-label">{label}</div><div class="kpi-value">{format_num(val)}</div></div>""", unsafe_allow_html=True)
+                st.markdown(cards.kpi_html(label, format_num(val)), unsafe_allow_html=True)
+
+        # Influenciadores e vídeos distintos por canal (sketches ou contagem exata)
+        distintos, aproximado = cached_result(
+            'p2_distintos', dict(filtros, exata=[contagem_exata]),
+            lambda: engine.distinct_counts(ds, filtros, contagem_exata))
+        sinal = "≈" if aproximado else ""
+        st.caption(" · ".join(
+            f"**{origem.strip()}**: {sinal}{format_num(linha['influenciadores'])} influenciadores, "
+            f"{sinal}{format_num(linha['videos'])} vídeos distintos"
+            for origem, linha in distintos.iterrows()
+        ))
+        timer.lap('p2.kpis')
 
         st.markdown("---")
         
+        sec_freq, sec_facetas, sec_bolhas, sec_ranking = page_sections(
+            'p2_secoes', ["📊 Frequência", "🏷️ Tags, Marcas e Sentimento", "⭕ Social vs Media Power", "🏆 Ranking"])
+
         # 2. Gráfico de Frequência de Microtrends (Otimizado)
-        st.subheader("Frequência de Microtrends")
-        
-        # Preparar dados com descrições e engajamento
-        if 'Descricao Microtrends' in dff.columns:
-            micro_freq = dff.groupby('MicroTrends').agg({
-                'video_id': 'count',
-                'engajamento': 'sum',
-                'Descricao Microtrends': 'first'
-            }).reset_index()
-            micro_freq.columns = ['MicroTrends', 'count', 'engajamento', 'descricao']
-        else:
-            micro_freq = dff.groupby('MicroTrends').agg({
-                'video_id': 'count',
-                'engajamento': 'sum'
-            }).reset_index()
-            micro_freq.columns = ['MicroTrends', 'count', 'engajamento']
-            micro_freq['descricao'] = 'Sem descrição'
-        
-        # Tratar descrições vazias
-        micro_freq['descricao'] = micro_freq['descricao'].apply(
-            lambda x: x if pd.notna(x) and str(x) != 'nan' else 'Sem descrição'
-        )
-        
-        # Calcular percentual
-        total_videos = micro_freq['count'].sum()
-        micro_freq['percentual'] = (micro_freq['count'] / total_videos * 100).round(1)
-        
-        # Top 10
-        micro_freq = micro_freq.nlargest(10, 'count')
-        
-        # Truncar labels longos para melhor visualização
-        micro_freq['MicroTrends_Display'] = micro_freq['MicroTrends'].apply(
-            lambda x: x[:40] + '...' if len(str(x)) > 40 else x
-        )
-        
-        # Criar gráfico com tooltips ricos
-        fig_f = px.bar(
-            micro_freq, 
-            x='count', 
-            y='MicroTrends_Display', 
-            orientation='h',
-            color='count',
-            color_continuous_scale='Purples',
-            custom_data=['MicroTrends', 'descricao', 'engajamento', 'percentual']
-        )
-        
-        # Configurar tooltip rico
-        fig_f.update_traces(
-            hovertemplate='<b>%{customdata[0]}</b><br><br>' +
-                         '<i>%{customdata[1]}</i><br><br>' +
-                         '📊 Vídeos: <b>%{x}</b> (%{customdata[3]}%)<br>' +
-                         '👁️ Engajamento: <b>%{customdata[2]:,.0f}</b> views<br>' +
-                         '<extra></extra>',
-            texttemplate='%{x}',
-            textposition='outside'
-        )
-        
-        # Layout otimizado
-        fig_f.update_layout(
-            yaxis={'categoryorder': 'total ascending', 'title': None},
-            xaxis={'title': 'Número de Vídeos'},
-            showlegend=False,
-            height=700,
-            hoverlabel=dict(
-                bgcolor="white",
-                font_size=13,
-                font_family="Inter"
-            ),
-            margin=dict(l=0, r=40, t=10, b=40)
-        )
-        
-        st.plotly_chart(fig_f, use_container_width=True)
-        
+        with sec_freq:
+            if section_open(sec_freq):
+                st.subheader("Frequência de Microtrends")
+
+                # Top 10 com descrições, engajamento e percentual
+                fig_f = cached_result('p2_frequencia', filtros, lambda: figures.frequency_figure(
+                    engine.microtrend_frequency(ds, filtros, 10)))
+                st.plotly_chart(fig_f, use_container_width=True)
+                timer.lap('p2.frequencia')
+
+        # Sentimento e facetas mais frequentes por MicroTrend (postings do FacetIndex)
+        with sec_facetas:
+            if section_open(sec_facetas):
+                st.subheader("Tags, Marcas e Sentimento por MicroTrend")
+                col_sent, col_tags = st.columns([3, 2])
+                with col_sent:
+                    fig_s = cached_result('p2_sentimento', filtros, lambda: figures.sentiment_figure(
+                        engine.sentiment_split(ds, filtros, 'MicroTrends', 10)))
+                    st.plotly_chart(fig_s, use_container_width=True)
+                with col_tags:
+                    faceta_top = st.radio("Mais frequentes", ['Tags', 'brands', 'Trends'],
+                                          format_func=FACET_LABELS.get, horizontal=True)
+                    top = cached_result('p2_top_facetas', dict(filtros, faceta=[faceta_top]),
+                                        lambda: engine.top_facets(ds, faceta_top, filtros, 'MicroTrends', 3, 10))
+                    st.dataframe(
+                        top.rename(columns={'MicroTrends': 'MicroTrend', faceta_top: FACET_LABELS[faceta_top],
+                                            'videos': 'Vídeos', 'percentual': '% da MicroTrend'}),
+                        hide_index=True, use_container_width=True, height=500
+                    )
+                timer.lap('p2.facetas')
+
         # 3. Gráfico de Bolhas (Social vs Media Power)
-        st.subheader("Social vs Media Power")
-        
-        # Legenda explicativa visual
-        st.markdown(f"""
-            <div style="background: linear-gradient(135deg, {COLORS['background']} 0%, #ffffff 100%); border: 2px solid {COLORS['primary']}; border-radius: 12px; padding: 20px; margin-bottom: 20px;">
-                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(280px, 1fr)); gap: 15px;">
-                    <div style="background: white; padding: 12px; border-radius: 8px; border-left: 4px solid #9C27B0;">
-                        <div style="display: flex; align-items: center; margin-bottom: 8px;">
-                            <span style="font-size: 1.5rem; margin-right: 10px;">⭕</span>
-                            <strong style="color: {COLORS['primary']}; font-size: 0.95rem;">Tamanho das Bolhas</strong>
-                        </div>
-                        <p style="margin: 0; font-size: 0.85rem; color: #555; line-height: 1.4;">
-                            <strong>Audience Size:</strong> Número de seguidores do influenciador
-                        </p>
-                    </div>
-                    <div style="background: white; padding: 12px; border-radius: 8px; border-left: 4px solid #2196F3;">
-                        <div style="display: flex; align-items: center; margin-bottom: 8px;">
-                            <span style="font-size: 1.5rem; margin-right: 10px;">↔️</span>
-                            <strong style="color: {COLORS['primary']}; font-size: 0.95rem;">Eixo Horizontal (X)</strong>
+        with sec_bolhas:
+            if section_open(sec_bolhas):
+                st.subheader("Social vs Media Power")
+
+                # Legenda explicativa visual
+                st.markdown(f"""
+                    <div style="background: linear-gradient(135deg, {COLORS['background']} 0%, #ffffff 100%); border: 2px solid {COLORS['primary']}; border-radius: 12px; padding: 20px; margin-bottom: 20px;">
+                        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(280px, 1fr)); gap: 15px;">
+                            <div style="background: white; padding: 12px; border-radius: 8px; border-left: 4px solid #9C27B0;">
+                                <div style="display: flex; align-items: center; margin-bottom: 8px;">
+                                    <span style="font-size: 1.5rem; margin-right: 10px;">⭕</span>
+                                    <strong style="color: {COLORS['primary']}; font-size: 0.95rem;">Tamanho das Bolhas</strong>
+                                </div>
+                                <p style="margin: 0; font-size: 0.85rem; color: #555; line-height: 1.4;">
+                                    <strong>Audience Size:</strong> Número de seguidores do influenciador
+                                </p>
+                            </div>
+                            <div style="background: white; padding: 12px; border-radius: 8px; border-left: 4px solid #2196F3;">
+                                <div style="display: flex; align-items: center; margin-bottom: 8px;">
+                                    <span style="font-size: 1.5rem; margin-right: 10px;">↔️</span>
+                                    <strong style="color: {COLORS['primary']}; font-size: 0.95rem;">Eixo Horizontal (X)</strong>
+                                </div>
+                                <p style="margin: 0; font-size: 0.85rem; color: #555; line-height: 1.4;">
+                                    <strong>Social Power:</strong> Mede interação e engajamento com seguidores. Identifica influenciadores populares em <em>nichos específicos</em>
+                                </p>
+                            </div>
+                            <div style="background: white; padding: 12px; border-radius: 8px; border-left: 4px solid #FF9800;">
+                                <div style="display: flex; align-items: center; margin-bottom: 8px;">
+                                    <span style="font-size: 1.5rem; margin-right: 10px;">↕️</span>
+                                    <strong style="color: {COLORS['primary']}; font-size: 0.95rem;">Eixo Vertical (Y)</strong>
+                                </div>
+                                <p style="margin: 0; font-size: 0.85rem; color: #555; line-height: 1.4;">
+                                    <strong>Media Power:</strong> Poder de broadcast. Mede quantas pessoas são alcançadas simultaneamente. Destaca <em>grande alcance</em>
+                                </p>
+                            </div>
                         </div>
-                        <p style="margin: 0; font-size: 0.85rem; color: #555; line-height: 1.4;">
-                            <strong>Social Power:</strong> Mede interação e engajamento com seguidores. Identifica influenciadores populares em <em>nichos específicos</em>
-                        </p>
-                    </div>
-                    <div style="background: white; padding: 12px; border-radius: 8px; border-left: 4px solid #FF9800;">
-                        <div style="display: flex; align-items: center; margin-bottom: 8px;">
-                            <span style="font-size: 1.5rem; margin-right: 10px;">↕️</span>
-                            <strong style="color: {COLORS['primary']}; font-size: 0.95rem;">Eixo Vertical (Y)</strong>
+                        <div style="background: {COLORS['primary']}; color: white; padding: 10px 15px; border-radius: 8px; margin-top: 15px; font-size: 0.85rem; text-align: center;">
+                            💡 <strong>Insight:</strong> Influenciadores no <strong>canto superior direito</strong> possuem tanto alcance quanto engajamento alto
                         </div>
-                        <p style="margin: 0; font-size: 0.85rem; color: #555; line-height: 1.4;">
-                            <strong>Media Power:</strong> Poder de broadcast. Mede quantas pessoas são alcançadas simultaneamente. Destaca <em>grande alcance</em>
-                        </p>
                     </div>
-                </div>
-                <div style="background: {COLORS['primary']}; color: white; padding: 10px 15px; border-radius: 8px; margin-top: 15px; font-size: 0.85rem; text-align: center;">
-                    💡 <strong>Insight:</strong> Influenciadores no <strong>canto superior direito</strong> possuem tanto alcance quanto engajamento alto
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        # Ajustar tamanho das bolhas dinamicamente baseado na quantidade de dados
-        num_influencers = len(dff['nickName'].unique())
-        # Quanto menos influenciadores, maior o tamanho máximo das bolhas
-        size_max_dynamic = max(50, min(80, 150 - (num_influencers * 2)))
-        
-        fig_b = px.scatter(dff, x='socialPowers', y='mediaPowers', size='audienceSizes', 
-                           color='MicroTrends', hover_name='nickName', size_max=size_max_dynamic)
-        
-        # Configurar layout otimizado
-        fig_b.update_layout(
-            height=700,
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.15,
-                xanchor="center",
-                x=0.5,
-                font=dict(size=11)
-            ),
-            xaxis_title="Social Power",
-            yaxis_title="Media Power",
-            margin=dict(l=50, r=50, t=30, b=120),
-            # Ajustar escala dos eixos para melhor visualização
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.2)',
-                zeroline=True,
-                zerolinecolor='rgba(200,200,200,0.5)'
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(200,200,200,0.2)',
-                zeroline=True,
-                zerolinecolor='rgba(200,200,200,0.5)'
-            )
-        )
-        
-        # Melhorar o hover template
-        fig_b.update_traces(
-            hovertemplate='<b>%{hovertext}</b><br><br>' +
-                         'Social Power: %{x:.4f}<br>' +
-                         'Media Power: %{y:.0f}<br>' +
-                         'Audiência: %{marker.size:,.0f}<br>' +
-                         '<extra></extra>'
-        )
-        
-        st.plotly_chart(fig_b, use_container_width=True)
+                """, unsafe_allow_html=True)
+
+                # Representação escolhida conforme o volume de pontos (ver engine.scatter_data)
+                fig_b, aviso_bolhas = cached_result(
+                    'p2_bolhas', dict(filtros, modo=[modo_bolhas], limite=[SCATTER_MAX_POINTS]),
+                    lambda: figures.scatter_figure(*engine.scatter_data(ds, filtros, modo_bolhas,
+                                                                        max_points=SCATTER_MAX_POINTS)))
+                if aviso_bolhas:
+                    st.caption(aviso_bolhas)
+                st.plotly_chart(fig_b, use_container_width=True)
+                timer.lap('p2.bolhas')
 
         # 4. Lista de Influenciadores (Ranking Reativo)
-        st.markdown("---")
-        st.subheader("Top 10 Influenciadores por Alcance")
-        
-        ranking = dff.groupby('nickName').agg({
-            'video_id': 'count', 'audienceSizes': 'sum', 'engajamento': 'sum',
-            'followers': 'max', 'Desc': 'first', 'link': 'first'
-        }).sort_values('followers', ascending=False).head(10)
-
-        for nick, row in ranking.iterrows():
-            st.markdown(f"""
-                <div class="influencer-card">
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <span style="font-size: 1.3rem; font-weight: bold; color: {COLORS['primary']};">{nick}</span>
-                        <a href="{row['link']}" target="_blank" class="btn-link">VER VÍDEO</a>
-                    </div>
-                    <div style="display: flex; gap: 30px; margin-top: 15px;">
-                        <div><small>VIEWS</small><br><b>{format_num(row['engajamento'])}</b></div>
-                        <div><small>SEGUIDORES</small><br><b>{format_num(row['followers'])}</b></div>
-                        <div><small>AUDIÊNCIA</small><br><b>{format_num(row['audienceSizes'])}</b></div>
-                        <div><small>VÍDEOS</small><br><b>{int(row['video_id'])}</b></div>
-                    </div>
-                    <div style="margin-top: 15px; color: #555; font-size: 0.9rem; border-top: 1px solid #f0f0f0; padding-top: 10px;">
-                        {str(row['Desc'])[:300]}...
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
+        with sec_ranking:
+            if section_open(sec_ranking):
+                st.subheader(f"Top {k_ranking} Influenciadores por {RANK_METRICS[metrica_ranking]}")
+
+                # Top-K por seleção parcial; 'Desc' e 'link' vêm do primeiro vídeo de cada influenciador
+                filtros_ranking = dict(filtros, ranking=[metrica_ranking, k_ranking])
+                ranking = cached_result('p2_ranking', filtros_ranking, lambda: engine.influencer_ranking(
+                    ds, filtros, k_ranking, metrica_ranking))
+                timer.lap('p2.ranking')
+
+                paginated_cards('p2_ranking', filtros_ranking, ranking, cards.influencer_cards_html)
+                timer.lap('p2.cards')
 else:
-    st.error("Base de dados não encontrada ou vazia.")
\ No newline at end of file
+    st.error("Base de dados não encontrada ou vazia.")
+
+timer.finish()
+get_stage_metrics().maybe_export()
+if st.query_params.get('admin') == '1' or os.environ.get('TRENDS_ADMIN') == '1':
+    admin_panel(get_stage_metrics())
\ No newline at end of file
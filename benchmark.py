@@ -0,0 +1,353 @@
+"""Benchmark do dashboard com bases sintéticas de tamanho crescente.
+
+Gera bases com o mesmo esquema do Excel (ver ``synthetic_frame``), grava
+cada uma como snapshot e mede as etapas que um rerun do app executa: carga
+do snapshot, filtros em cascata, dicionários de descrição, agregações de
+cada gráfico, montagem das figuras e do HTML dos cards. O resultado vai para um relatório
+JSON, que pode ser comparado com um relatório anterior para achar
+regressões.
+
+Uso pela linha de comando::
+
+    python benchmark.py                                # 10k, 100k, 1M e 10M linhas
+    python benchmark.py --rows 10000 100000 --repeat 3
+    python benchmark.py --baseline benchmark_anterior.json
+
+O custo de leitura do Excel só é medido na base real (``--workbook``): o
+formato não comporta as escalas maiores.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+import cards
+import engine
+import figures
+from aggregates import build_creators, build_cube
+from drill import DRILL_MAX_TILES
+from indexes import FACET_COLS, FacetIndex, FilterIndex, TrendMetadata
+from search import SearchIndex
+from shared import attach_dataset, publish_dataset
+from sketches import DistinctSketches
+from snapshot import EXCEL_PATH, load_snapshot, parse_excel, split_descriptions, write_snapshot
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_REPEAT = 5
+# Tempo máximo de um rerun (soma das etapas da página) para ela seguir interativa
+DEFAULT_BUDGET = 1.0
+# Etapa mais lenta que a do relatório de referência por este fator é regressão
+DEFAULT_TOLERANCE = 1.25
+
+ORIGENS = [' Tiktok ', ' Youtube ', ' Instagram ']
+SENTIMENTOS = [' positivo ', ' neutro ', ' negativo ', ' misto ']
+N_MACROS = 9
+MICROS_POR_MACRO = 4
+# Textos livres (Desc, sumario, Tags...) vêm de um conjunto limitado para a
+# geração de 10M de linhas caber em memória
+TEXT_POOL = 50_000
+
+
+def synthetic_frame(n_rows, seed=0):
+    """Base sintética de ``n_rows`` vídeos com o esquema e as proporções do Excel.
+
+    Cada influenciador publica em um só canal e tem seguidores/audiência
+    fixos; as métricas de engajamento seguem distribuições log-normais.
+    """
+    rng = np.random.default_rng(seed)
+    n_influencers = int(min(max(50, n_rows // 5), 500_000))
+    n_texts = min(n_rows, TEXT_POOL)
+
+    macros = np.array([f'MacroTrend {i + 1:02d}' for i in range(N_MACROS)], dtype=object)
+    micros = np.array([f'MicroTrend {i + 1:02d}.{j + 1}' for i in range(N_MACROS)
+                       for j in range(MICROS_POR_MACRO)], dtype=object)
+    micro = rng.integers(0, len(micros), n_rows)
+
+    influencer = rng.zipf(1.3, n_rows) % n_influencers
+    nicks = np.array([f' perfil_{i} ' for i in range(n_influencers)], dtype=object)
+    origem_influencer = rng.integers(0, len(ORIGENS), n_influencers)
+    followers_influencer = rng.lognormal(11, 2, n_influencers).astype(np.int64)
+    audiencia_influencer = (followers_influencer * rng.uniform(0.8, 1.5, n_influencers)).astype(np.int64)
+
+    textos = np.array([f'Texto sintético {i}' for i in range(n_texts)], dtype=object)
+    texto = rng.integers(0, n_texts, n_rows)
+    engajamento = rng.lognormal(9, 2, n_rows).astype(np.int64)
+    followers = followers_influencer[influencer]
+
+    return pd.DataFrame({
+        'video_id': np.arange(n_rows, dtype=np.int64),
+        'Tags': textos[texto],
+        'Trends': textos[(texto + 1) % n_texts],
+        'sumario': textos[(texto + 2) % n_texts],
+        'engajamento': engajamento,
+        'viralPotential': rng.lognormal(9, 1.5, n_rows),
+        'audienceSizes': audiencia_influencer[influencer],
+        'socialPowers': engajamento / np.maximum(followers, 1),
+        'mediaPowers': rng.lognormal(13, 2, n_rows),
+        'followers': followers,
+        'brands': np.array([f'Marca {i}' for i in range(40)], dtype=object)[rng.integers(0, 40, n_rows)],
+        'sentimental': np.array(SENTIMENTOS, dtype=object)[rng.integers(0, len(SENTIMENTOS), n_rows)],
+        'MacroTrends': macros[micro // MICROS_POR_MACRO],
+        'MicroTrends': micros[micro],
+        'Desc': textos[(texto + 3) % n_texts],
+        'nickName': nicks[influencer],
+        'origem': np.array(ORIGENS, dtype=object)[origem_influencer[influencer]],
+        'link': np.char.add(' https://example.com/video/', texto.astype(str)).astype(object),
+        'comentarios': (engajamento * rng.uniform(0, 0.05, n_rows)).astype(np.int64),
+        'shares': (engajamento * rng.uniform(0, 0.1, n_rows)).astype(np.int64),
+        'likes': (engajamento * rng.uniform(0, 0.2, n_rows)).astype(np.int64),
+        'Descricao Macrotrends': np.char.add('Descrição de ', macros[micro // MICROS_POR_MACRO].astype(str)).astype(object),
+        'Descricao Microtrends': np.char.add('Descrição de ', micros[micro].astype(str)).astype(object),
+    })
+
+
+def medir(resultados, nome, fn, repeat=DEFAULT_REPEAT):
+    """Executa ``fn`` ``repeat`` vezes, guarda os tempos em ``resultados[nome]``
+    e devolve o valor da última execução.
+
+    A primeira execução fica separada (``first_s``): é a que paga caches
+    frios, como na primeira sessão depois de um snapshot novo.
+    """
+    tempos = []
+    for _ in range(max(1, repeat)):
+        inicio = time.perf_counter()
+        valor = fn()
+        tempos.append(time.perf_counter() - inicio)
+    resultados[nome] = {
+        'first_s': tempos[0],
+        'median_s': statistics.median(tempos),
+        'min_s': min(tempos),
+        'repeat': len(tempos),
+    }
+    return valor
+
+
+def _cascata_p2(ds, resultados, repeat):
+    index = ds.index
+    origens = medir(resultados, 'p2.options.origem', lambda: index.options('origem'), repeat)
+    rows_origem = medir(resultados, 'p2.select.origem', lambda: index.select({'origem': origens}), repeat)
+    macros = medir(resultados, 'p2.options.MacroTrends',
+                   lambda: index.options('MacroTrends', rows_origem), repeat)
+    rows_macro = medir(resultados, 'p2.select.MacroTrends',
+                       lambda: index.select({'MacroTrends': macros}, rows=rows_origem), repeat)
+    micros = medir(resultados, 'p2.options.MicroTrends',
+                   lambda: index.options('MicroTrends', rows_macro), repeat)
+    rows_micro = medir(resultados, 'p2.select.MicroTrends',
+                       lambda: index.select({'MicroTrends': micros}, rows=rows_macro), repeat)
+    medir(resultados, 'p2.options.nickName',
+          lambda: sorted(index.options('nickName', rows_micro)), repeat)
+    return {'origem': origens, 'MacroTrends': macros, 'MicroTrends': micros, 'nickName': None}
+
+
+def bench_dataset(ds, repeat=DEFAULT_REPEAT):
+    """Tempos das etapas de um rerun de cada página sobre ``ds``, sem cache de resultados."""
+    r = {}
+    index = ds.index
+
+    # Página 1: cascata Macro -> Micro, descrições, agregados e figuras
+    macros = medir(r, 'p1.options.MacroTrends', lambda: index.options('MacroTrends'), repeat)
+    rows = medir(r, 'p1.select.MacroTrends', lambda: index.select({'MacroTrends': macros}), repeat)
+    micros = medir(r, 'p1.options.MicroTrends', lambda: index.options('MicroTrends', rows), repeat)
+    filtros_p1 = {'MacroTrends': macros, 'MicroTrends': micros}
+    medir(r, 'p1.descriptions.MacroTrends', lambda: ds.trend_meta.descriptions('MacroTrends'), repeat)
+    medir(r, 'p1.descriptions.MicroTrends', lambda: ds.trend_meta.descriptions('MicroTrends'), repeat)
+    macro_agg, _ = medir(r, 'p1.trend_engagement', lambda: engine.trend_engagement(ds, filtros_p1), repeat)
+    macros_info = medir(r, 'p1.macro_summary', lambda: engine.macro_summary(ds, filtros_p1), repeat)
+    medir(r, 'p1.cards_html', lambda: cards.macro_cards_html(macros_info.iloc[:cards.CARDS_PAGE_SIZE]), repeat)
+    micro_plot = medir(r, 'p1.top_microtrends', lambda: engine.top_microtrends(ds, filtros_p1, 15), repeat)
+    fig = medir(r, 'p1.figure.treemap',
+                lambda: figures.treemap_figure(macro_agg, ds.trend_meta.label_cache), repeat)
+    medir(r, 'p1.serialize.treemap', lambda: pio.to_json(fig, validate=False), repeat)
+    fig = medir(r, 'p1.figure.top_microtrends', lambda: figures.top_microtrends_figure(micro_plot), repeat)
+    medir(r, 'p1.serialize.top_microtrends', lambda: pio.to_json(fig, validate=False), repeat)
+
+    # Página 2: cascata Canal -> Macro -> Micro -> Influenciador e seções
+    filtros = _cascata_p2(ds, r, repeat)
+    origem = filtros['origem']
+    medir(r, 'p2.descriptions.MacroTrends', lambda: ds.trend_meta.descriptions('MacroTrends', origem), repeat)
+    medir(r, 'p2.descriptions.MicroTrends', lambda: ds.trend_meta.descriptions('MicroTrends', origem), repeat)
+    medir(r, 'p2.kpis', lambda: engine.kpis(ds, filtros), repeat)
+    medir(r, 'p2.distinct_counts', lambda: engine.distinct_counts(ds, filtros), repeat)
+    medir(r, 'p2.distinct_counts.exact', lambda: engine.distinct_counts(ds, filtros, exact=True), repeat)
+    micro_freq = medir(r, 'p2.microtrend_frequency', lambda: engine.microtrend_frequency(ds, filtros, 10), repeat)
+    fig = medir(r, 'p2.figure.frequency', lambda: figures.frequency_figure(micro_freq), repeat)
+    medir(r, 'p2.serialize.frequency', lambda: pio.to_json(fig, validate=False), repeat)
+    rows = engine.select_rows(ds, filtros)
+    medir(r, 'p2.options.facets', lambda: [ds.facets.counts(col, rows) for col in FACET_COLS], repeat)
+    split = medir(r, 'p2.sentiment_split', lambda: engine.sentiment_split(ds, filtros), repeat)
+    fig = medir(r, 'p2.figure.sentiment', lambda: figures.sentiment_figure(split), repeat)
+    medir(r, 'p2.serialize.sentiment', lambda: pio.to_json(fig, validate=False), repeat)
+    medir(r, 'p2.top_facets', lambda: engine.top_facets(ds, 'Tags', filtros), repeat)
+    for modo in engine.SCATTER_MODES[1:]:
+        chave = modo.split()[0].lower()
+        dados = medir(r, f'p2.scatter_data.{chave}', lambda: engine.scatter_data(ds, filtros, modo), repeat)
+        fig, _ = medir(r, f'p2.figure.scatter.{chave}', lambda: figures.scatter_figure(*dados), repeat)
+        medir(r, f'p2.serialize.scatter.{chave}', lambda: pio.to_json(fig, validate=False), repeat)
+    dados = medir(r, 'p2.scatter_data.auto', lambda: engine.scatter_data(ds, filtros), repeat)
+    fig, _ = medir(r, 'p2.figure.scatter.auto', lambda: figures.scatter_figure(*dados), repeat)
+    medir(r, 'p2.serialize.scatter.auto', lambda: pio.to_json(fig, validate=False), repeat)
+    ranking = medir(r, 'p2.influencer_ranking', lambda: engine.influencer_ranking(ds, filtros, 10), repeat)
+    medir(r, 'p2.cards_html', lambda: cards.influencer_cards_html(ranking.iloc[:cards.CARDS_PAGE_SIZE]), repeat)
+
+    # Busca textual (fora dos totais das páginas: só roda com a caixa de busca preenchida).
+    # As repetições saem do memo de consultas; a primeira é a consulta nova
+    medir(r, 'search.query', lambda: engine.search(ds, 'texto sintético 12', filtros), repeat)
+    medir(r, 'search.kpis', lambda: engine.kpis(ds, dict(filtros, **{engine.SEARCH_KEY: ['sintético 12']})), repeat)
+
+    # Drill-down da página 1 (fora dos totais: só roda depois de escolher um nível).
+    # Cada nível é um roll-up da seleção + caminho; a MacroTrend e a MicroTrend são as maiores
+    macro = macro_agg['engajamento'].idxmax()
+    filtros_macro = dict(filtros_p1, MacroTrends=[macro])
+    micros_macro = medir(r, 'drill.macro.rollup',
+                         lambda: engine.drill_rollup(ds, filtros_macro, 'MicroTrends'), repeat)
+    micro = micros_macro['engajamento'].idxmax()
+    filtros_micro = dict(filtros_macro, MicroTrends=[micro])
+    medir(r, 'drill.micro.rollup', lambda: engine.drill_rollup(ds, filtros_micro, 'nickName'), repeat)
+    caminho = engine.drill_path(ds, filtros_p1, (('MacroTrends', macro), ('MicroTrends', micro)))
+    medir(r, 'drill.micro.influencers', lambda: engine.drill_influencers(ds, caminho, DRILL_MAX_TILES), repeat)
+    return r
+
+
+def bench_load(df, snapshot_dir, source, repeat=DEFAULT_REPEAT):
+    """Tempos de gravação e carga do snapshot e das estruturas derivadas."""
+    r = {}
+    manifest = medir(r, 'load.write_snapshot', lambda: write_snapshot(df, source, snapshot_dir), 1)
+    gravado = medir(r, 'load.load_snapshot', lambda: load_snapshot(snapshot_dir, manifest), repeat)
+    compacto, descricoes = medir(r, 'load.split_descriptions', lambda: split_descriptions(gravado), repeat)
+    cube = medir(r, 'load.build_cube', lambda: build_cube(compacto), repeat)
+    medir(r, 'load.creators', lambda: build_creators(cube), repeat)
+    medir(r, 'load.filter_index', lambda: FilterIndex(compacto), repeat)
+    medir(r, 'load.trend_metadata', lambda: TrendMetadata(compacto, descricoes), repeat)
+    medir(r, 'load.facet_index', lambda: FacetIndex(compacto), repeat)
+    indice = FilterIndex(compacto)
+    medir(r, 'load.search_index', lambda: SearchIndex(compacto, TrendMetadata(compacto, descricoes), indice),
+          repeat)
+    medir(r, 'load.sketches', lambda: DistinctSketches(compacto), repeat)
+    # Equivalente ao load_data do app com o cache vazio
+    ds = medir(r, 'load.load_data', lambda: engine.load_dataset(snapshot_dir, manifest), repeat)
+    # Processo do app com TRENDS_SHARED=1: conecta ao Dataset publicado em vez de montar
+    medir(r, 'load.publish_shared', lambda: publish_dataset(ds, snapshot_dir), 1)
+    medir(r, 'load.attach_shared', lambda: attach_dataset(ds.version, snapshot_dir), repeat)
+    return ds, r
+
+
+def page_totals(etapas):
+    """Soma das medianas das etapas de cada página (um rerun sem cache de resultados).
+
+    No gráfico de bolhas entra só o modo automático, que é o padrão.
+    """
+    totais = {}
+    for pagina in ('p1', 'p2'):
+        totais[pagina] = sum(
+            t['median_s'] for nome, t in etapas.items()
+            if nome.startswith(pagina + '.') and ('scatter' not in nome or nome.endswith('.auto'))
+        )
+    totais['load'] = etapas['load.load_data']['median_s']
+    return totais
+
+
+def run(scales=DEFAULT_SCALES, repeat=DEFAULT_REPEAT, seed=0, budget=DEFAULT_BUDGET, workbook=None, log=print):
+    relatorio = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'repeat': repeat,
+        'seed': seed,
+        'budget_s': budget,
+        'scales': [],
+    }
+    if workbook is not None and Path(workbook).exists():
+        r = {}
+        medir(r, 'load.parse_excel', lambda: parse_excel(workbook), 1)
+        relatorio['workbook'] = {'source': str(workbook), 'stages': r}
+
+    for n_rows in scales:
+        inicio = time.perf_counter()
+        df = synthetic_frame(n_rows, seed)
+        geracao = time.perf_counter() - inicio
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / 'base.parquet'
+            df.to_parquet(source)
+            ds, etapas = bench_load(df, Path(tmp) / 'snapshot', source, repeat)
+            del df
+            etapas.update(bench_dataset(ds, repeat))
+            del ds
+        totais = page_totals(etapas)
+        relatorio['scales'].append({
+            'rows': n_rows,
+            'generate_s': geracao,
+            'pages_s': totais,
+            'stages': etapas,
+        })
+        log(f"{n_rows:>12,} linhas | carga {totais['load']:.3f}s | "
+            f"página 1 {totais['p1']:.3f}s | página 2 {totais['p2']:.3f}s")
+
+    # Maior escala medida em que o rerun de cada página cabe no orçamento
+    relatorio['interactive_up_to'] = {
+        pagina: max((s['rows'] for s in relatorio['scales'] if s['pages_s'][pagina] <= budget), default=None)
+        for pagina in ('p1', 'p2')
+    }
+    return relatorio
+
+
+def compare(relatorio, referencia, tolerance=DEFAULT_TOLERANCE):
+    """Etapas mais lentas que em ``referencia`` por mais de ``tolerance`` vezes."""
+    anteriores = {s['rows']: s['stages'] for s in referencia.get('scales', [])}
+    regressoes = []
+    for escala in relatorio['scales']:
+        for nome, tempo in escala['stages'].items():
+            antes = anteriores.get(escala['rows'], {}).get(nome)
+            if antes and antes['median_s'] > 0 and tempo['median_s'] > tolerance * antes['median_s']:
+                regressoes.append({
+                    'rows': escala['rows'],
+                    'stage': nome,
+                    'baseline_s': antes['median_s'],
+                    'current_s': tempo['median_s'],
+                    'ratio': tempo['median_s'] / antes['median_s'],
+                })
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do dashboard com bases sintéticas.")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_SCALES, help="Tamanhos das bases sintéticas")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Execuções por etapa")
+    parser.add_argument('--seed', type=int, default=0, help="Semente do gerador")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help="Segundos por rerun para a página ser considerada interativa")
+    parser.add_argument('--workbook', default=str(EXCEL_PATH), help="Excel real para medir a leitura")
+    parser.add_argument('--out', default='benchmark_report.json', help="Arquivo JSON do relatório")
+    parser.add_argument('--baseline', help="Relatório anterior para comparar")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Fator de lentidão (vs. --baseline) considerado regressão")
+    args = parser.parse_args(argv)
+
+    relatorio = run(args.rows, args.repeat, args.seed, args.budget, args.workbook)
+    regressoes = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressoes = compare(relatorio, json.load(f), args.tolerance)
+        relatorio['regressions'] = regressoes
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    print(f"Interativo (<= {args.budget:.1f}s) até: {relatorio['interactive_up_to']} -> {args.out}")
+    for reg in regressoes:
+        print(f"REGRESSÃO {reg['rows']:,} linhas | {reg['stage']}: "
+              f"{reg['baseline_s']:.4f}s -> {reg['current_s']:.4f}s ({reg['ratio']:.2f}x)")
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""HTML das listas de cards (MacroTrends e ranking de influenciadores).
+
+Cada lista vira um único bloco HTML montado coluna a coluna, sem percorrer
+as linhas em Python: o app envia um só ``st.markdown`` por lista, com
+apenas os cards da página visível. O visual dos cards fica nas classes CSS
+de ``page_styles``, usadas pelo app e pelos relatórios estáticos (export.py).
+"""
+import numpy as np
+import pandas as pd
+
+# Cards exibidos por vez; "Carregar mais" acrescenta outra página
+CARDS_PAGE_SIZE = 10
+
+# Paleta (Samsung Corporate Identity)
+COLORS = {
+    'primary': '#034EA2',    # Azul Samsung
+    'secondary': '#000000',  # Preto
+    'accent': '#1428a0',     # Azul Royal
+    'background': '#F8F9FA', # Cinza muito claro
+    'card': '#FFFFFF',       # Branco
+    'text': '#333333'
+}
+
+
+def page_styles(colors=COLORS):
+    """Bloco ``<style>`` dos KPIs, cards e botões (fonte Inter, paleta ``colors``)."""
+    return f"""
+        <style>
+        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;700&display=swap');
+        .main {{ background-color: {colors['background']}; font-family: 'Inter', sans-serif; }}
+        
+        /* Estilização de KPI Cards */
+        .kpi-box {{
+            background: white;
+            padding: 20px;
+            border-radius: 12px;
+            border-top: 4px solid {colors['primary']};
+            box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+            text-align: center;
+        }}
+        .kpi-value {{ font-size: 1.8rem; font-weight: bold; color: {colors['primary']}; margin: 5px 0; }}
+        .kpi-label {{ font-size: 0.8rem; color: #666; text-transform: uppercase; letter-spacing: 1px; }}
+        
+        /* MacroTrend Cards */
+        .macro-card {{
+            background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
+            border-left: 5px solid {colors['primary']};
+            border-radius: 10px;
+            padding: 12px 18px;
+            margin-bottom: 12px;
+            box-shadow: 0 2px 6px rgba(0,0,0,0.06);
+            transition: all 0.3s ease;
+        }}
+        .macro-card-header {{ display: flex; justify-content: space-between; align-items: center; margin-bottom: 6px; }}
+        .macro-card h4 {{ color: {colors['primary']}; margin: 0; font-size: 1.1rem; font-weight: 700; }}
+        .macro-card p {{ color: #555; margin: 0; line-height: 1.5; font-size: 0.9rem; }}
+        .macro-badge {{
+            background: {colors['primary']};
+            color: white;
+            padding: 5px 14px;
+            border-radius: 20px;
+            font-size: 0.8rem;
+            font-weight: 600;
+        }}
+        
+        /* Influencer Cards */
+        .influencer-card {{
+            background: white;
+            padding: 20px;
+            border-radius: 15px;
+            margin-bottom: 15px;
+            border: 1px solid #E0E0E0;
+            transition: 0.3s ease;
+        }}
+        .influencer-card:hover {{
+            box-shadow: 0 10px 20px rgba(0,0,0,0.1);
+            transform: translateY(-3px);
+            border-color: {colors['primary']};
+        }}
+        .influencer-card-header {{ display: flex; justify-content: space-between; align-items: center; }}
+        .influencer-name {{ font-size: 1.3rem; font-weight: bold; color: {colors['primary']}; }}
+        .influencer-stats {{ display: flex; gap: 30px; margin-top: 15px; }}
+        .influencer-desc {{ margin-top: 15px; color: #555; font-size: 0.9rem; border-top: 1px solid #f0f0f0; padding-top: 10px; }}
+        
+        /* Botão de Link */
+        .btn-link {{
+            text-decoration: none;
+            color: white !important;
+            background: {colors['primary']};
+            padding: 8px 20px;
+            border-radius: 20px;
+            font-size: 0.8rem;
+            font-weight: bold;
+            display: inline-block;
+        }}
+        </style>
+    """
+
+
+def kpi_html(label, valor):
+    return f"""<div class="kpi-box"><div class="kpi-label">{label}</div><div class="kpi-value">{valor}</div></div>"""
+
+
+def format_nums(valores):
+    """``format_num`` do app aplicado a um array inteiro (1.2M, 3.4K, 56)."""
+    valores = np.asarray(valores, dtype=float)
+    return np.where(
+        valores >= 1_000_000, np.char.mod('%.1fM', valores / 1_000_000),
+        np.where(valores >= 1_000, np.char.mod('%.1fK', valores / 1_000),
+                 np.char.mod('%d', valores.astype(np.int64)))
+    )
+
+
+def _texto(serie):
+    # str() de cada valor, com 'nan' para vazios, como no f-string original
+    return serie.astype(object).where(serie.notna(), 'nan').astype(str)
+
+
+def macro_cards_html(macros):
+    """Cards de ``engine.macro_summary`` (MacroTrend, views e descrição)."""
+    if macros.empty:
+        return ''
+    html = (
+        '<div class="macro-card"><div class="macro-card-header"><h4>'
+        + _texto(macros['MacroTrends'])
+        + '</h4><span class="macro-badge">'
+        + format_nums(macros['engajamento'])
+        + ' views</span></div><p>'
+        + _texto(macros['Descricao Macrotrends'])
+        + '</p></div>'
+    )
+    return ''.join(html)
+
+
+def influencer_cards_html(ranking):
+    """Cards de ``engine.influencer_ranking`` (indexado por nickName)."""
+    if ranking.empty:
+        return ''
+    html = (
+        '<div class="influencer-card"><div class="influencer-card-header"><span class="influencer-name">'
+        + _texto(pd.Series(ranking.index, index=ranking.index))
+        + '</span><a href="'
+        + _texto(ranking['link'])
+        + '" target="_blank" class="btn-link">VER VÍDEO</a></div><div class="influencer-stats">'
+        + '<div><small>VIEWS</small><br><b>' + format_nums(ranking['engajamento']) + '</b></div>'
+        + '<div><small>SEGUIDORES</small><br><b>' + format_nums(ranking['followers_max']) + '</b></div>'
+        + '<div><small>AUDIÊNCIA</small><br><b>' + format_nums(ranking['audienceSizes']) + '</b></div>'
+        + '<div><small>VÍDEOS</small><br><b>' + ranking['videos'].astype(np.int64).astype(str) + '</b></div>'
+        + '</div><div class="influencer-desc">'
+        + _texto(ranking['Desc']).str.slice(0, 300)
+        + '...</div></div>'
+    )
+    return ''.join(html)
@@ -0,0 +1,82 @@
+"""Drill-down da página 1: MacroTrend → MicroTrend → influenciador.
+
+A escolha de um valor na caixa de detalhamento (ou de uma barra de
+MicroTrend) desce um nível no caminho; o caminho de botões acima dos gráficos
+volta a qualquer nível. Cada nível é a seleção da sidebar mais os valores já
+fixados, e os agregados exibidos são roll-ups das células do cubo (ver
+aggregates.py) dentro dela, sem voltar às linhas de vídeo.
+
+A sessão guarda só o caminho de (dimensão, valor); ``DrillPath`` o valida a
+cada rerun contra os roll-ups da versão atual da base. Os roll-ups vêm de uma
+função passada pelo chamador: no app, o cache de resultados, com chave na
+seleção e no caminho. Eles são DataFrames pequenos e nunca alterados, então
+podem ser divididos entre sessões e medidos pelo limite de memória do cache.
+"""
+
+# Hierarquia do drill-down, do nível mais alto ao mais baixo
+DRILL_LEVELS = ['MacroTrends', 'MicroTrends', 'nickName']
+DRILL_LABELS = {'MacroTrends': 'MacroTrend', 'MicroTrends': 'MicroTrend', 'nickName': 'Influenciador'}
+DRILL_TITLES = {'MacroTrends': 'Macrotrends', 'MicroTrends': 'Microtrends', 'nickName': 'Influenciadores'}
+# Áreas do treemap por nível (as de maior engajamento); um nível pode ter milhares de influenciadores
+DRILL_MAX_TILES = 60
+# Métricas dos roll-ups de cada nível (as do card de influenciador)
+DRILL_METRICS = ['videos', 'audienceSizes', 'engajamento', 'followers_max', 'first_row']
+
+
+class DrillPath:
+    """Caminho ((dimensão, valor), ...) a partir da raiz (a seleção da sidebar).
+
+    ``rollup(filters, by)`` devolve ``DRILL_METRICS`` por ``by`` nas células
+    de ``filters`` (os valores fixados no caminho, {dimensão: [valor]}).
+    ``path`` é o caminho a refazer; passos que não valem mais (ex.: valor
+    ausente numa versão nova da base) são ignorados, e ``path`` passa a ser o
+    caminho efetivo.
+    """
+
+    def __init__(self, rollup, path=()):
+        self._rollup = rollup
+        self.path = ()
+        for dim, valor in path:
+            self.drill(dim, valor)
+
+    @property
+    def dim(self):
+        """Dimensão dos filhos do nível atual (``None`` no influenciador)."""
+        fixas = [DRILL_LEVELS.index(dim) for dim, _ in self.path]
+        proxima = max(fixas, default=-1) + 1
+        return DRILL_LEVELS[proxima] if proxima < len(DRILL_LEVELS) else None
+
+    @property
+    def depth(self):
+        return len(self.path)
+
+    def fixed(self, dim):
+        """Valor de ``dim`` no caminho (``None`` se ainda não foi escolhido)."""
+        return dict(self.path).get(dim)
+
+    def filters(self):
+        """O caminho como filtros de dimensão ({dimensão: [valor]})."""
+        return {dim: [valor] for dim, valor in self.path}
+
+    def rollup(self, by):
+        """``DRILL_METRICS`` por ``by`` no nível atual."""
+        return self._rollup(self.filters(), by)
+
+    def drill(self, dim, valor):
+        """Desce do nível atual para ``valor`` em ``dim`` e devolve se desceu.
+
+        ``dim`` pode pular um nível (uma barra de MicroTrend clicada na raiz
+        desce direto para a MicroTrend); dimensões já fixadas no caminho, ou
+        valores ausentes no nível, são ignorados.
+        """
+        if self.dim is None or DRILL_LEVELS.index(dim) < DRILL_LEVELS.index(self.dim):
+            return False
+        if valor not in self.rollup(dim).index:
+            return False
+        self.path += ((dim, valor),)
+        return True
+
+    def up(self, depth=None):
+        """Volta ao nível ``depth`` (0 = raiz; ``None`` = um acima), descartando os de baixo."""
+        depth = self.depth - 1 if depth is None else depth
+        self.path = self.path[:max(depth, 0)]
@@ -0,0 +1,383 @@
+"""Consultas do dashboard sem dependência do Streamlit.
+
+Cada função recebe um ``Dataset`` (snapshot carregado + cubo, índice e
+metadados) e um dicionário de filtros ``{dimensão: valores ou None}`` e
+devolve DataFrames prontos para os gráficos. O único estado fica em memos
+do próprio ``Dataset`` (válidos enquanto o snapshot não muda), então as
+mesmas funções servem ao app, a jobs em lote e a benchmarks::
+
+    from engine import load_dataset, top_microtrends
+    ds = load_dataset()
+    top_microtrends(ds, {'MacroTrends': ['Sustentabilidade']})
+
+Os filtros também aceitam as colunas de faceta (``indexes.FACET_COLS``) e
+a busca textual (``SEARCH_KEY``): com alguma delas ativa, as linhas vêm do
+``FacetIndex``/``SearchIndex`` e o cubo da seleção é montado só com elas.
+
+As figuras Plotly e o HTML continuam no app; aqui só entram os dados.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregates import (CUBE_DIMS, build_creators, build_cube, density_grid, filter_cube, influencer_points,
+                        rank_values, rollup, subset_cube, top_k_positions, top_k_rollup, totals)
+from drill import DRILL_METRICS, DrillPath
+from indexes import FacetIndex, FilterIndex, TrendMetadata
+from search import SearchIndex
+from sketches import DISTINCT_COLS, PARTITION_DIMS, DistinctSketches
+from labels import fill_descriptions
+from snapshot import SNAPSHOT_DIR, load_snapshot, load_stored_cube, read_manifest, split_descriptions
+
+# Gráfico Social vs Media Power: no modo automático, seleções com mais vídeos
+# que o limite viram 1 ponto por influenciador e, se ainda passarem do limite,
+# uma grade de densidade. TRENDS_SCATTER_MAX_POINTS muda o limite.
+SCATTER_MAX_POINTS = int(os.environ.get('TRENDS_SCATTER_MAX_POINTS', 3000))
+SCATTER_DENSITY_BINS = 60
+SCATTER_MODES = ["Automático", "Pontos (exato)", "Por influenciador", "Densidade"]
+SCATTER_COLS = ['socialPowers', 'mediaPowers', 'audienceSizes', 'MicroTrends', 'nickName']
+# Colunas de aggregates.influencer_points (modo "Por influenciador")
+POINT_COLS = ['nickName', 'socialPowers', 'mediaPowers', 'audienceSizes', 'videos', 'MicroTrends']
+
+# Métricas do ranking de influenciadores -> rótulo na tela
+RANK_METRICS = {'followers_max': 'Alcance', 'engajamento': 'Views',
+                'audienceSizes': 'Audiência', 'videos': 'Vídeos'}
+RANKING_COLS = ['videos', 'audienceSizes', 'engajamento', 'followers_max', 'first_row']
+
+# Facetas -> rótulo na tela
+FACET_LABELS = {'Tags': 'Tags', 'Trends': 'Trends', 'brands': 'Marca', 'sentimental': 'Sentimento'}
+NO_SENTIMENT = 'Sem sentimento'
+# Chave da busca textual nos filtros: ``{SEARCH_KEY: [consulta]}``
+SEARCH_KEY = 'busca'
+
+
+class Dataset:
+    """Uma versão do snapshot com as estruturas derivadas dela.
+
+    Os dados não mudam depois de montado (só os memos são preenchidos sob
+    demanda): pode ser compartilhado entre sessões e threads sem cópia.
+    """
+
+    def __init__(self, version, df, descricoes, cube=None):
+        self.version = version
+        self.df = df
+        self.cube = build_cube(df) if cube is None else cube
+        self.index = FilterIndex(df)
+        self.trend_meta = TrendMetadata(df, descricoes)
+        self.facets = FacetIndex(df)
+        self.search = SearchIndex(df, self.trend_meta, self.index)
+        self.sketches = DistinctSketches(df)
+        # Um influenciador por linha, com os totais do snapshot inteiro (ver aggregates.build_creators)
+        self.creators = build_creators(self.cube)
+        # Valores presentes de cada dimensão, para reconhecer o filtro "tudo selecionado"
+        self.dim_values = {dim: frozenset(self.cube[dim].unique()) for dim in CUBE_DIMS}
+        # Ordem completa de cada ranking sem filtro: (dimensão, métrica) -> códigos
+        self.rank_orders = {}
+        # Último cubo montado para filtros de faceta: (chave dos filtros, cubo)
+        self.facet_cube = (None, None)
+
+
+def load_dataset(snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """Carrega o snapshot (gravado em modo compacto), com o cubo gravado (se houver)."""
+    manifest = manifest or read_manifest(snapshot_dir)
+    df, descricoes = split_descriptions(load_snapshot(snapshot_dir, manifest))
+    return Dataset(manifest['version'], df, descricoes, load_stored_cube(snapshot_dir, manifest))
+
+
+def _descriptions(ds, level, filters):
+    return ds.trend_meta.descriptions(level, (filters or {}).get('origem'))
+
+
+def _split_filters(ds, filters):
+    """Separa ``filters`` em (dimensões do cubo, facetas e busca ativas)."""
+    dims, facetas = {}, {}
+    for col, valores in (filters or {}).items():
+        if col not in ds.facets.labels and col != SEARCH_KEY:
+            dims[col] = valores
+        elif valores:
+            facetas[col] = valores
+    return dims, facetas
+
+
+def select_rows(ds, filters=None):
+    """Posições das linhas que atendem ``filters`` (dimensões, facetas e busca)."""
+    dims, facetas = _split_filters(ds, filters)
+    rows = ds.index.select(dims)
+    busca = facetas.pop(SEARCH_KEY, None)
+    if busca:
+        rows = np.intersect1d(rows, ds.search.rows(busca[0]), assume_unique=True)
+    return ds.facets.select(facetas, rows)
+
+
+def search(ds, query, filters=None):
+    """Busca ``query`` dentro da seleção ``filters`` (ver ``search.SearchIndex.search``).
+
+    Os influenciadores ficam só com os que têm vídeos na seleção e as
+    tendências só com as presentes nela.
+    """
+    resultado = ds.search.search(query)
+    rows = select_rows(ds, dict(filters or {}, **{SEARCH_KEY: [query]}))
+    influencers = resultado['influencers']
+    presentes = set(ds.index.options('nickName', rows))
+    influencers = influencers[influencers['nickName'].isin(presentes)]
+    trends = resultado['trends']
+    ativas = {level: set(ds.index.options(level, rows)) for level in trends['level'].unique()}
+    trends = trends[[trend in ativas[level] for level, trend in zip(trends['level'], trends['trend'])]]
+    return {'rows': rows, 'influencers': influencers.reset_index(drop=True),
+            'trends': trends.reset_index(drop=True)}
+
+
+def _cube(ds, filters):
+    """``(cubo, filtros)`` para consultar ``filters`` no cubo.
+
+    Sem facetas nem busca ativas é o cubo do snapshot com os filtros de
+    dimensão; com elas, o cubo só das linhas selecionadas (sem filtros
+    restantes).
+    """
+    dims, facetas = _split_filters(ds, filters)
+    if not facetas:
+        return ds.cube, dims
+    chave = tuple(sorted((col, tuple(sorted(map(str, valores))))
+                         for col, valores in {**dims, **facetas}.items() if valores is not None))
+    memo_chave, cube = ds.facet_cube
+    if memo_chave != chave:
+        cube = subset_cube(ds.df, select_rows(ds, filters))
+        ds.facet_cube = (chave, cube)
+    return cube, None
+
+
+def _selects_all(ds, filters):
+    return all(valores is None or ds.dim_values[dim] <= set(valores)
+               for dim, valores in (filters or {}).items())
+
+
+def top_k(ds, by, metric, k, filters=None, metrics=None):
+    """As ``k`` categorias de ``by`` com maior ``metric`` (ver ``aggregates.top_k_rollup``).
+
+    Sem filtro efetivo, a ordem completa é calculada uma vez por snapshot e
+    qualquer ``k`` vira um recorte dela.
+    """
+    cube, filters = _cube(ds, filters)
+    if cube is not ds.cube or not _selects_all(ds, filters):
+        return top_k_rollup(cube, by, metric, k, filters, metrics)
+    if (by, metric) not in ds.rank_orders:
+        valores = rank_values(ds.cube, by, metric)
+        ds.rank_orders[(by, metric)] = top_k_positions(valores, len(valores))
+    return top_k_rollup(ds.cube, by, metric, k, None, metrics, positions=ds.rank_orders[(by, metric)])
+
+
+# --- Página 1: Macro & Micro Trends ---
+
+def trend_engagement(ds, filters=None):
+    """Engajamento por MacroTrend e por MicroTrend: ``(macro_agg, micro_agg)``."""
+    cube, filters = _cube(ds, filters)
+    return (rollup(cube, 'MacroTrends', filters, ['engajamento']),
+            rollup(cube, 'MicroTrends', filters, ['engajamento']))
+
+
+def macro_summary(ds, filters=None):
+    """MacroTrends por engajamento (decrescente) com a descrição de cada uma."""
+    macro_agg, _ = trend_engagement(ds, filters)
+    macros = macro_agg.sort_values('engajamento', ascending=False).reset_index()
+    macros['Descricao Macrotrends'] = fill_descriptions(
+        macros['MacroTrends'].map(_descriptions(ds, 'MacroTrends', filters)), 'Descrição não disponível')
+    return macros
+
+
+def top_microtrends(ds, filters=None, n=15):
+    """As ``n`` MicroTrends de maior engajamento, com descrição."""
+    micros = top_k(ds, 'MicroTrends', 'engajamento', n, filters).reset_index()
+    micros['Descricao Microtrends'] = fill_descriptions(
+        micros['MicroTrends'].map(_descriptions(ds, 'MicroTrends', filters)), 'Descrição não disponível')
+    return micros
+
+
+def drill_rollup(ds, filters=None, by='MacroTrends'):
+    """Roll-up de um nível do drill-down (ver drill.py): ``DRILL_METRICS`` por
+    ``by`` nas células da seleção ``filters`` (sidebar + caminho)."""
+    cube, dims = _cube(ds, filters)
+    return rollup(cube, by, dims, DRILL_METRICS)
+
+
+def drill_path(ds, filters=None, path=()):
+    """Caminho de drill-down com raiz na seleção ``filters``, refazendo ``path``."""
+    return DrillPath(lambda passo, by: drill_rollup(ds, dict(filters or {}, **passo), by), path)
+
+
+def drill_top_microtrends(ds, drill, filters=None, n=15):
+    """``top_microtrends`` no nível atual do drill-down, a partir do roll-up dele."""
+    micros = drill.rollup('MicroTrends').nlargest(n, 'engajamento')[['engajamento']].reset_index()
+    micros['Descricao Microtrends'] = fill_descriptions(
+        micros['MicroTrends'].map(_descriptions(ds, 'MicroTrends', filters)), 'Descrição não disponível')
+    return micros
+
+
+def drill_influencers(ds, drill, n=None):
+    """Influenciadores do nível atual do drill-down (os ``n`` de maior engajamento,
+    ou todos), no formato de ``influencer_ranking``."""
+    influencers = drill.rollup('nickName')
+    influencers = influencers.copy() if n is None else influencers.nlargest(n, 'engajamento')
+    return _with_first_video(ds, influencers)
+
+
+# --- Página 2: Microtrends & Influencers ---
+
+def kpis(ds, filters=None):
+    """Totais da seleção (vídeos, views, followers, likes, shares, comentários)."""
+    return totals(*_cube(ds, filters))
+
+
+def microtrend_frequency(ds, filters=None, n=10):
+    """As ``n`` MicroTrends com mais vídeos, com engajamento, descrição e percentual."""
+    cube, filtros_cubo = _cube(ds, filters)
+    freq = rollup(cube, 'MicroTrends', filtros_cubo, ['videos', 'engajamento']).reset_index()
+    freq.columns = ['MicroTrends', 'count', 'engajamento']
+    freq['descricao'] = fill_descriptions(
+        freq['MicroTrends'].map(_descriptions(ds, 'MicroTrends', filters)), 'Sem descrição')
+    # Percentual sobre todas as MicroTrends da seleção, não só as n primeiras
+    freq['percentual'] = (freq['count'] / freq['count'].sum() * 100).round(1)
+    return freq.nlargest(n, 'count')
+
+
+def scatter_data(ds, filters=None, mode="Automático", max_points=SCATTER_MAX_POINTS,
+                 bins=SCATTER_DENSITY_BINS):
+    """Dados do gráfico Social vs Media Power.
+
+    Devolve ``(modo, dados, n_videos)``. ``modo`` é o modo efetivo (o
+    automático já resolvido); ``dados`` é um DataFrame com as colunas de
+    ``SCATTER_COLS`` nos modos de pontos ou ``(centros_x, centros_y,
+    contagens)`` no modo ``"Densidade"``.
+    """
+    # Contagens e pontos por influenciador saem do cubo; só os modos de
+    # pontos e de densidade materializam as linhas de vídeo
+    cube, filtros_cubo = _cube(ds, filters)
+    sel = filter_cube(cube, filtros_cubo)
+    n_videos = int(sel['rows'].sum())
+    if mode == "Automático":
+        if n_videos <= max_points:
+            mode = "Pontos (exato)"
+        elif sel['nickName'].nunique() <= max_points:
+            mode = "Por influenciador"
+        else:
+            mode = "Densidade"
+
+    if mode == "Por influenciador":
+        if cube is ds.cube and _selects_all(ds, filtros_cubo):
+            return mode, ds.creators[POINT_COLS].reset_index(drop=True), n_videos
+        return mode, influencer_points(sel), n_videos
+    dff = FilterIndex.take(ds.df, select_rows(ds, filters), SCATTER_COLS)
+    if mode == "Densidade":
+        return mode, density_grid(dff, bins=bins), n_videos
+    return mode, dff, n_videos
+
+
+def influencer_ranking(ds, filters=None, n=10, metric='followers_max'):
+    """Os ``n`` influenciadores com maior ``metric`` (ver ``RANK_METRICS``), com
+    'Desc' e 'link' do primeiro vídeo."""
+    return _with_first_video(ds, top_k(ds, 'nickName', metric, n, filters, RANKING_COLS))
+
+
+def _with_first_video(ds, influencers):
+    """Acrescenta 'Desc' e 'link' do vídeo em ``first_row`` de cada influenciador."""
+    primeiros_videos = ds.df.iloc[influencers['first_row']]
+    influencers['Desc'] = primeiros_videos['Desc'].to_numpy()
+    influencers['link'] = primeiros_videos['link'].to_numpy()
+    return influencers
+
+
+def distinct_counts(ds, filters=None, exact=False):
+    """Influenciadores e vídeos (``link``) distintos da seleção, por canal e no total.
+
+    Devolve ``(contagens, aproximado)``: ``contagens`` tem uma linha por canal
+    presente e a linha ``'Total'``, com as colunas de ``DISTINCT_COLS``. Com
+    ``exact`` falso e filtros só de ``PARTITION_DIMS``, os valores saem da
+    união dos sketches das partições (``aproximado`` verdadeiro, custo
+    O(partições)); nos demais casos são contados nas linhas selecionadas.
+    """
+    sketches = ds.sketches
+    dims, facetas = _split_filters(ds, filters)
+    aproximado = not exact and not facetas and dims.get('nickName') is None
+    if aproximado:
+        mask = sketches.partition_mask({dim: dims.get(dim) for dim in PARTITION_DIMS})
+        origens = sketches.partitions['origem'].to_numpy()
+        grupos = {origem: mask & (origens == origem) for origem in pd.unique(origens[mask])}
+        grupos['Total'] = mask
+
+        def contar(col, selecao):
+            return int(round(sketches.estimate(col, selecao)))
+    else:
+        rows = select_rows(ds, filters)
+        codes = ds.index.codes['origem'][rows]
+        grupos = {ds.index.categories['origem'][codigo - 1]: rows[codes == codigo]
+                  for codigo in pd.unique(codes) if codigo > 0}
+        grupos['Total'] = rows
+        contar = sketches.exact
+    contagens = pd.DataFrame({nome: [contar(col, selecao) for selecao in grupos.values()]
+                              for col, nome in DISTINCT_COLS.items()},
+                             index=pd.Index(list(grupos), name='origem'))
+    return contagens, aproximado
+
+
+# --- Facetas (Tags, Trends, Marca, Sentimento) ---
+
+def facet_counts(ds, col, filters=None):
+    """Vídeos da seleção com cada valor da faceta ``col``, em ordem decrescente."""
+    return ds.facets.counts(col, select_rows(ds, filters))
+
+
+def _top_groups(ds, by, rows, n):
+    """Códigos (em ``FilterIndex``) dos ``n`` grupos de ``by`` com mais vídeos em ``rows``."""
+    contagem = np.bincount(ds.index.codes[by][rows], minlength=len(ds.index.categories[by]) + 1)
+    contagem[0] = 0
+    grupos = np.argsort(-contagem, kind='stable')[:n]
+    return grupos[contagem[grupos] > 0], contagem
+
+
+def top_facets(ds, col, filters=None, by='MicroTrends', k=3, n=10):
+    """Os ``k`` valores mais frequentes da faceta ``col`` em cada um dos ``n``
+    grupos de ``by`` com mais vídeos.
+
+    Devolve um DataFrame com ``by``, ``col``, ``videos`` (vídeos do grupo com
+    o valor) e ``percentual`` (sobre os vídeos do grupo), em ordem de grupo.
+    """
+    rows = select_rows(ds, filters)
+    grupos, contagem = _top_groups(ds, by, rows, n)
+    g, valores, videos = ds.facets.pairs(col, ds.index.codes[by], rows)
+    posicao = np.full(len(contagem), len(grupos))
+    posicao[grupos] = np.arange(len(grupos))
+    pares = pd.DataFrame({'ordem': posicao[g], 'grupo': g, 'valor': valores, 'videos': videos})
+    pares = pares[pares['ordem'] < len(grupos)]
+    # Empates seguem a ordem alfabética dos valores
+    pares = pares.sort_values(['ordem', 'videos', 'valor'], ascending=[True, False, True], kind='stable')
+    pares = pares.groupby('ordem', sort=False).head(k)
+    return pd.DataFrame({
+        by: ds.index.categories[by].take(pares['grupo'].to_numpy() - 1),
+        col: ds.facets.labels[col].take(pares['valor'].to_numpy()),
+        'videos': pares['videos'].to_numpy(),
+        'percentual': (pares['videos'].to_numpy() / contagem[pares['grupo'].to_numpy()] * 100).round(1),
+    })
+
+
+def sentiment_split(ds, filters=None, by='MicroTrends', n=10):
+    """Vídeos, views e potencial viral médio por sentimento nos ``n`` grupos
+    de ``by`` com mais vídeos.
+
+    Formato longo (uma linha por grupo e sentimento), em ordem de grupo.
+    """
+    rows = select_rows(ds, filters)
+    grupos, _ = _top_groups(ds, by, rows, n)
+    rows = rows[np.isin(ds.index.codes[by][rows], grupos)]
+    sentimento = ds.facets.row_values('sentimental')[rows]
+    rotulos = np.append(ds.facets.labels['sentimental'].to_numpy(dtype=object), NO_SENTIMENT)
+    dados = pd.DataFrame({
+        by: pd.Categorical(ds.index.categories[by].take(ds.index.codes[by][rows] - 1),
+                           categories=ds.index.categories[by].take(grupos - 1)),
+        'sentimental': rotulos[sentimento],
+        'engajamento': ds.df['engajamento'].to_numpy()[rows],
+        'viralPotential': ds.df['viralPotential'].to_numpy(dtype=float)[rows],
+    })
+    return (dados.groupby([by, 'sentimental'], observed=True, sort=True)
+            .agg(videos=('engajamento', 'size'), engajamento=('engajamento', 'sum'),
+                 viralPotential=('viralPotential', 'mean'))
+            .reset_index())
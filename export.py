@@ -0,0 +1,288 @@
+"""Relatórios HTML estáticos das visões do dashboard.
+
+Gera, para a visão padrão e para cada filtro salvo (``--presets``), um HTML
+autocontido com as duas páginas do dashboard: gráficos Plotly embutidos,
+cards e KPIs. Os arquivos podem ser servidos por qualquer servidor de
+arquivos estáticos, sem uma sessão do Streamlit por acesso.
+
+Cada relatório é montado num processo do pool (o snapshot é mapeado em
+memória uma vez por processo). O ``export.json`` da pasta de saída guarda a
+versão do snapshot e o hash dos filtros salvos: enquanto nenhum dos dois
+mudar, rodar de novo não regera nada.
+
+Uso pela linha de comando::
+
+    python export.py                                  # visão padrão em exports/
+    python export.py --presets filtros_salvos.json --workers 4
+    python export.py --force                          # regera mesmo sem mudança
+
+O arquivo de filtros salvos é uma lista JSON de relatórios::
+
+    [{"name": "tiktok", "title": "Só TikTok", "filters": {"origem": [" Tiktok "]}},
+     {"name": "camera", "filters": {"busca": "câmera", "sentimental": ["positivo"]}}]
+
+As chaves de ``filters`` são as dimensões do cubo (``origem``,
+``MacroTrends``, ``MicroTrends``, ``nickName``), as facetas (``Tags``,
+``Trends``, ``brands``, ``sentimental``) e a busca (``busca``).
+"""
+import argparse
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import plotly.io as pio
+
+import cards
+import engine
+import figures
+from aggregates import CUBE_DIMS
+from indexes import FACET_COLS
+from snapshot import DEFAULT_SOURCE, SNAPSHOT_DIR, ensure_snapshot, read_manifest
+
+BASE_DIR = Path(__file__).resolve().parent
+EXPORT_DIR = BASE_DIR / 'exports'
+EXPORT_MANIFEST = 'export.json'
+DEFAULT_PRESETS = [{'name': 'padrao', 'title': 'Visão geral', 'filters': {}}]
+FILTER_KEYS = CUBE_DIMS + list(FACET_COLS) + [engine.SEARCH_KEY]
+# Mesmos tamanhos das seções do app
+TOP_MICROTRENDS = 15
+TOP_FREQUENCY = 10
+TOP_INFLUENCERS = 10
+
+REPORT_CSS = """
+<style>
+body { margin: 0; background: #F8F9FA; font-family: 'Inter', sans-serif; color: #333; }
+.report { max-width: 1200px; margin: 0 auto; padding: 24px; }
+.report-header { border-bottom: 3px solid #034EA2; margin-bottom: 24px; }
+.report-header small { color: #666; }
+.kpi-row { display: grid; grid-template-columns: repeat(6, 1fr); gap: 12px; margin-bottom: 24px; }
+.facet-table { border-collapse: collapse; width: 100%; font-size: 0.85rem; }
+.facet-table th, .facet-table td { border-bottom: 1px solid #E0E0E0; padding: 6px; text-align: left; }
+</style>
+"""
+
+
+def load_presets(path=None):
+    """Filtros salvos de ``path`` (lista JSON) ou a visão padrão.
+
+    Valida nomes (viram nomes de arquivo) e chaves de filtro; a busca pode
+    vir como texto e os demais filtros como lista de valores.
+    """
+    if path is None:
+        return DEFAULT_PRESETS
+    with open(path, encoding='utf-8') as f:
+        presets = json.load(f)
+    nomes = set()
+    for preset in presets:
+        nome = preset.get('name', '')
+        if not nome or not all(c.isalnum() or c in '-_' for c in nome) or nome in nomes:
+            raise ValueError(f"Nome de relatório inválido ou repetido: {nome!r} (use letras, números, '-' e '_')")
+        nomes.add(nome)
+        desconhecidas = set(preset.get('filters', {})) - set(FILTER_KEYS)
+        if desconhecidas:
+            raise ValueError(f"Filtro(s) desconhecido(s) em '{nome}': {', '.join(sorted(desconhecidas))} "
+                             f"(válidos: {', '.join(FILTER_KEYS)})")
+    return presets
+
+
+def preset_filters(preset):
+    """Filtros do preset no formato de ``engine`` ({chave: lista ou None})."""
+    filtros = {}
+    for chave, valores in preset.get('filters', {}).items():
+        if isinstance(valores, str):
+            valores = [valores]
+        filtros[chave] = list(valores) if valores else None
+    return filtros
+
+
+def _figure_html(fig, include_plotlyjs):
+    return pio.to_html(fig, full_html=False, include_plotlyjs=include_plotlyjs,
+                       config={'displaylogo': False}, validate=False)
+
+
+def render_report(ds, preset, plotlyjs=True):
+    """HTML completo do relatório de ``preset`` sobre ``ds``.
+
+    ``plotlyjs`` segue o ``include_plotlyjs`` do Plotly: ``True`` embute a
+    biblioteca (arquivo autocontido), ``'cdn'`` aponta para a CDN.
+    """
+    filtros = preset_filters(preset)
+    titulo = html.escape(preset.get('title') or preset['name'])
+    partes = []
+
+    # Página 1: Macro & Micro Trends
+    macro_agg, _ = engine.trend_engagement(ds, filtros)
+    partes.append('<h2>Insights de Tendências</h2>')
+    partes.append(_figure_html(figures.treemap_figure(macro_agg, ds.trend_meta.label_cache), plotlyjs))
+    partes.append('<h3>Descrição das MacroTrends</h3>')
+    partes.append(cards.macro_cards_html(engine.macro_summary(ds, filtros)))
+    partes.append(f'<h3>Top {TOP_MICROTRENDS} MicroTrends por Engajamento</h3>')
+    partes.append(_figure_html(figures.top_microtrends_figure(
+        engine.top_microtrends(ds, filtros, TOP_MICROTRENDS)), False))
+
+    # Página 2: Microtrends & Influencers
+    kpis = engine.kpis(ds, filtros)
+    valores = cards.format_nums([kpis['videos'], kpis['engajamento'], kpis['followers'],
+                                 kpis['likes'], kpis['shares'], kpis['comentarios']])
+    rotulos = ["Vídeos", "Views", "Followers", "Likes", "Shares", "Comments"]
+    partes.append('<h2>Detalhamento de Influenciadores</h2>')
+    partes.append('<div class="kpi-row">' + ''.join(cards.kpi_html(r, v) for r, v in zip(rotulos, valores))
+                  + '</div>')
+    partes.append('<h3>Frequência de Microtrends</h3>')
+    partes.append(_figure_html(figures.frequency_figure(
+        engine.microtrend_frequency(ds, filtros, TOP_FREQUENCY)), False))
+    partes.append('<h3>Tags, Marcas e Sentimento por MicroTrend</h3>')
+    partes.append(_figure_html(figures.sentiment_figure(engine.sentiment_split(ds, filtros)), False))
+    top_tags = engine.top_facets(ds, 'Tags', filtros).rename(
+        columns={'MicroTrends': 'MicroTrend', 'videos': 'Vídeos', 'percentual': '% da MicroTrend'})
+    partes.append(top_tags.to_html(index=False, classes='facet-table', border=0))
+    partes.append('<h3>Social vs Media Power</h3>')
+    fig_b, aviso = figures.scatter_figure(*engine.scatter_data(ds, filtros))
+    if aviso:
+        partes.append(f'<p><small>{html.escape(aviso)}</small></p>')
+    partes.append(_figure_html(fig_b, False))
+    partes.append(f'<h3>Top {TOP_INFLUENCERS} Influenciadores por Alcance</h3>')
+    partes.append(cards.influencer_cards_html(engine.influencer_ranking(ds, filtros, TOP_INFLUENCERS)))
+
+    resumo = '; '.join(f"{chave}: {', '.join(map(str, valores))}"
+                       for chave, valores in filtros.items() if valores) or 'sem filtros'
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{titulo} | Samsung Social Trends</title>
+{cards.page_styles()}
+{REPORT_CSS}
+</head>
+<body>
+<div class="report">
+<div class="report-header">
+<h1>{titulo}</h1>
+<small>Filtros: {html.escape(resumo)} · snapshot {ds.version[:12]} ·
+gerado em {datetime.now(timezone.utc).isoformat(timespec='seconds')}</small>
+</div>
+{''.join(partes)}
+</div>
+</body>
+</html>
+"""
+
+
+def _write_text(path, texto):
+    # Troca atômica: o servidor de arquivos nunca entrega um relatório pela metade
+    tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+    tmp.write_text(texto, encoding='utf-8')
+    os.replace(tmp, path)
+
+
+# Dataset de cada processo do pool (carregado uma vez no initializer)
+_DATASET = None
+
+
+def _init_worker(snapshot_dir):
+    global _DATASET
+    _DATASET = engine.load_dataset(snapshot_dir)
+
+
+def _export_preset(preset, out_dir, plotlyjs):
+    inicio = time.perf_counter()
+    _write_text(Path(out_dir) / f"{preset['name']}.html", render_report(_DATASET, preset, plotlyjs))
+    return {'name': preset['name'], 'title': preset.get('title') or preset['name'],
+            'file': f"{preset['name']}.html", 'seconds': time.perf_counter() - inicio}
+
+
+def _index_html(relatorios, version):
+    itens = ''.join(f'<li><a href="{html.escape(r["file"])}">{html.escape(r["title"])}</a></li>'
+                    for r in relatorios)
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head><meta charset="utf-8"><title>Samsung Social Trends | Relatórios</title>{REPORT_CSS}</head>
+<body><div class="report">
+<div class="report-header"><h1>Relatórios</h1><small>snapshot {version[:12]}</small></div>
+<ul>{itens}</ul>
+</div></body>
+</html>
+"""
+
+
+def export_reports(presets=DEFAULT_PRESETS, out_dir=EXPORT_DIR, snapshot_dir=SNAPSHOT_DIR,
+                   max_workers=None, force=False, plotlyjs=True):
+    """Gera os relatórios de ``presets`` em ``out_dir`` e devolve o manifest da exportação.
+
+    Sem mudança na versão do snapshot, nos presets ou no modo do plotly.js
+    (e com os arquivos no lugar), devolve o manifest anterior sem regerar.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    version = read_manifest(snapshot_dir)['version']
+    presets_hash = hashlib.sha256(json.dumps([presets, plotlyjs], sort_keys=True).encode()).hexdigest()
+
+    anterior = None
+    if (out_dir / EXPORT_MANIFEST).exists():
+        with open(out_dir / EXPORT_MANIFEST, encoding='utf-8') as f:
+            anterior = json.load(f)
+    if (not force and anterior is not None
+            and anterior['version'] == version and anterior['presets_sha256'] == presets_hash
+            and all((out_dir / r['file']).exists() for r in anterior['reports'])):
+        return dict(anterior, skipped=True)
+
+    workers = min(max_workers or os.cpu_count() or 1, len(presets))
+    if workers <= 1:
+        _init_worker(snapshot_dir)
+        relatorios = [_export_preset(preset, out_dir, plotlyjs) for preset in presets]
+    else:
+        # spawn: cada processo mapeia o snapshot por conta própria
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(str(snapshot_dir),)) as pool:
+            relatorios = list(pool.map(_export_preset, presets, [out_dir] * len(presets),
+                                       [plotlyjs] * len(presets)))
+
+    _write_text(out_dir / 'index.html', _index_html(relatorios, version))
+    manifest = {
+        'version': version,
+        'presets_sha256': presets_hash,
+        'reports': relatorios,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    _write_text(out_dir / EXPORT_MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
+    # Relatórios de presets removidos não ficam para trás
+    atuais = {r['file'] for r in relatorios} | {'index.html'}
+    for antigo in (anterior or {}).get('reports', []):
+        if antigo['file'] not in atuais:
+            (out_dir / antigo['file']).unlink(missing_ok=True)
+    return dict(manifest, skipped=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera relatórios HTML estáticos do dashboard.")
+    parser.add_argument('--presets', help="JSON com a lista de filtros salvos (padrão: só a visão geral)")
+    parser.add_argument('--out', default=str(EXPORT_DIR), help="Pasta de saída dos relatórios")
+    parser.add_argument('--source', default=str(DEFAULT_SOURCE), help="Excel de origem, pasta ou glob")
+    parser.add_argument('--snapshot-dir', default=str(SNAPSHOT_DIR), help="Pasta do snapshot")
+    parser.add_argument('--workers', type=int, default=None, help="Relatórios gerados em paralelo")
+    parser.add_argument('--cdn', action='store_true',
+                        help="Carrega o plotly.js da CDN em vez de embuti-lo (arquivos menores)")
+    parser.add_argument('--force', action='store_true', help="Regera mesmo sem mudança no snapshot")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    ensure_snapshot(args.source, args.snapshot_dir)
+    manifest = export_reports(load_presets(args.presets), args.out, args.snapshot_dir,
+                              args.workers, args.force, 'cdn' if args.cdn else True)
+    if manifest['skipped']:
+        print(f"Relatórios já atualizados para o snapshot {manifest['version'][:12]} -> {args.out}")
+        return
+    for relatorio in manifest['reports']:
+        print(f"  {relatorio['file']}: {relatorio['seconds']:.2f}s")
+    print(f"{len(manifest['reports'])} relatório(s) | snapshot {manifest['version'][:12]} | "
+          f"{time.perf_counter() - inicio:.2f}s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""Figuras Plotly do dashboard, montadas a partir dos dados de ``engine``.
+
+Funções puras (dados in, figura out), sem Streamlit: o app guarda o
+resultado no cache de resultados e o benchmark mede o custo de montagem.
+
+O plotly só é importado na primeira figura montada, e processos que não
+montam figuras (jobs em lote, carregador de shared.py) não o pagam. No app o
+Streamlit já carrega ``plotly.io`` e ``plotly.graph_objects``; o que fica
+para a primeira figura é o ``plotly.express``.
+"""
+from labels import engagement_labels, truncate_labels
+
+# Acima de SCATTER_WEBGL_MIN_POINTS pontos o gráfico de bolhas usa WebGL (scattergl)
+SCATTER_WEBGL_MIN_POINTS = 1000
+# Cor de cada sentimento (chave em minúsculas); os demais ficam em cinza
+SENTIMENT_COLORS = {'positivo': '#2E7D32', 'neutro': '#9E9E9E', 'negativo': '#C62828'}
+# Template registrado no plotly com o layout comum a todas as figuras
+TEMPLATE_NAME = 'trends'
+TEMPLATE_LAYOUT = dict(
+    hoverlabel=dict(
+        bgcolor="white",
+        font_size=13,
+        font_family="Inter"
+    )
+)
+
+
+def _plotly():
+    """``(plotly.express, plotly.graph_objects)``, importados no primeiro uso."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    return px, go
+
+
+def figure_template():
+    """Nome do template das figuras, registrado uma vez por processo.
+
+    Parte do template padrão do plotly no momento do registro (no app, o do
+    Streamlit) com ``TEMPLATE_LAYOUT`` aplicado: cada figura só referencia o
+    template em vez de repetir esse layout.
+    """
+    import plotly.io as pio
+    if TEMPLATE_NAME not in pio.templates:
+        _, go = _plotly()
+        base = pio.templates[pio.templates.default] if pio.templates.default else None
+        template = go.layout.Template(base)
+        template.layout.update(TEMPLATE_LAYOUT)
+        pio.templates[TEMPLATE_NAME] = template
+    return TEMPLATE_NAME
+
+
+def treemap_figure(macro_agg, label_cache=None):
+    """Treemap de engajamento por MacroTrend (``engine.trend_engagement``).
+
+    Serve a qualquer nível do drill-down: as áreas são o índice de ``macro_agg``.
+    """
+    dim = macro_agg.index.name
+    macro_plot = macro_agg.reset_index()
+    # Rótulo quebrado + engajamento em MM (quebra memorizada por tendência)
+    macro_plot['Rotulo_Quebrado'] = engagement_labels(
+        macro_plot[dim], macro_plot['engajamento'], label_cache)
+
+    px, _ = _plotly()
+    fig_tree = px.treemap(macro_plot, path=['Rotulo_Quebrado'], values='engajamento',
+                          color='engajamento', color_continuous_scale='Blues',
+                          template=figure_template())
+    fig_tree.update_traces(
+        textfont=dict(size=13, family='Inter', color='black'),
+        textposition='middle center',
+        marker=dict(line=dict(width=2, color='white'))
+    )
+    fig_tree.update_layout(
+        height=700,
+        uniformtext=dict(minsize=8, mode='show')
+    )
+    return fig_tree
+
+
+def top_microtrends_figure(micro_plot):
+    """Barras das MicroTrends de maior engajamento (``engine.top_microtrends``)."""
+    px, _ = _plotly()
+    fig_bar = px.bar(micro_plot, x='engajamento', y='MicroTrends', orientation='h',
+                     color='engajamento', color_continuous_scale='GnBu',
+                     custom_data=['Descricao Microtrends', 'MicroTrends'], template=figure_template())
+
+    fig_bar.update_traces(
+        hovertemplate='<b>%{y}</b><br>' +
+                     'Engajamento: %{x:,.0f}<br>' +
+                     '<i>%{customdata[0]}</i><br>' +
+                     '<extra></extra>'
+    )
+
+    fig_bar.update_layout(
+        yaxis={'categoryorder':'total ascending'},
+        showlegend=False,
+        height=600
+    )
+    return fig_bar
+
+
+def frequency_figure(micro_freq):
+    """Barras de frequência de MicroTrends (``engine.microtrend_frequency``)."""
+    micro_freq = micro_freq.copy()
+    # Truncar labels longos para melhor visualização
+    micro_freq['MicroTrends_Display'] = truncate_labels(micro_freq['MicroTrends'], 40)
+
+    # Criar gráfico com tooltips ricos
+    px, _ = _plotly()
+    fig_f = px.bar(
+        micro_freq,
+        x='count',
+        y='MicroTrends_Display',
+        orientation='h',
+        color='count',
+        color_continuous_scale='Purples',
+        custom_data=['MicroTrends', 'descricao', 'engajamento', 'percentual'],
+        template=figure_template()
+    )
+
+    # Configurar tooltip rico
+    fig_f.update_traces(
+        hovertemplate='<b>%{customdata[0]}</b><br><br>' +
+                     '<i>%{customdata[1]}</i><br><br>' +
+                     '📊 Vídeos: <b>%{x}</b> (%{customdata[3]}%)<br>' +
+                     '👁️ Engajamento: <b>%{customdata[2]:,.0f}</b> views<br>' +
+                     '<extra></extra>',
+        texttemplate='%{x}',
+        textposition='outside'
+    )
+
+    # Layout otimizado
+    fig_f.update_layout(
+        yaxis={'categoryorder': 'total ascending', 'title': None},
+        xaxis={'title': 'Número de Vídeos'},
+        showlegend=False,
+        height=700,
+        margin=dict(l=0, r=40, t=10, b=40)
+    )
+
+    return fig_f
+
+
+def sentiment_figure(split):
+    """Barras empilhadas de vídeos por sentimento em cada MicroTrend (``engine.sentiment_split``)."""
+    split = split.copy()
+    split['MicroTrends_Display'] = truncate_labels(split['MicroTrends'].astype(str), 40)
+    cores = {rotulo: SENTIMENT_COLORS.get(rotulo.casefold(), '#BDBDBD')
+             for rotulo in split['sentimental'].unique()}
+
+    px, _ = _plotly()
+    fig_s = px.bar(
+        split,
+        x='videos',
+        y='MicroTrends_Display',
+        color='sentimental',
+        orientation='h',
+        color_discrete_map=cores,
+        custom_data=['MicroTrends', 'sentimental', 'engajamento', 'viralPotential'],
+        template=figure_template()
+    )
+    fig_s.update_traces(
+        hovertemplate='<b>%{customdata[0]}</b><br>' +
+                     'Sentimento: %{customdata[1]}<br>' +
+                     '📊 Vídeos: <b>%{x}</b><br>' +
+                     '👁️ Engajamento: <b>%{customdata[2]:,.0f}</b> views<br>' +
+                     '🚀 Potencial viral médio: %{customdata[3]:,.0f}<br>' +
+                     '<extra></extra>'
+    )
+    fig_s.update_layout(
+        barmode='stack',
+        yaxis={'categoryorder': 'total ascending', 'title': None},
+        xaxis={'title': 'Número de Vídeos'},
+        legend=dict(title=None, orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        height=500,
+        margin=dict(l=0, r=20, t=30, b=40)
+    )
+    return fig_s
+
+
+def scatter_figure(modo, dados, n_videos):
+    """Gráfico Social vs Media Power a partir de ``engine.scatter_data``.
+
+    Devolve ``(figura, aviso)``; ``aviso`` explica a agregação aplicada nos
+    modos por influenciador e de densidade (``None`` no modo exato).
+    """
+    px, go = _plotly()
+    if modo == "Densidade":
+        centros_x, centros_y, contagens = dados
+        fig_b = go.Figure(go.Heatmap(
+            x=centros_x, y=centros_y, z=contagens, colorscale='Blues',
+            colorbar=dict(title='Vídeos'),
+            hovertemplate='Social Power: %{x:.4f}<br>' +
+                          'Media Power: %{y:.0f}<br>' +
+                          'Vídeos: %{z:,.0f}<br>' +
+                          '<extra></extra>'
+        ), layout=dict(template=figure_template()))
+        aviso = (f"Densidade de {n_videos:,} vídeos em uma grade "
+                 f"{len(centros_x)}x{len(centros_y)}.")
+    else:
+        pontos = dados
+        aviso = None
+        if modo == "Por influenciador":
+            aviso = (f"{len(pontos):,} influenciadores (média de Social/Media Power "
+                     f"de {n_videos:,} vídeos, cor pela MicroTrend predominante).")
+
+        # Ajustar tamanho das bolhas dinamicamente baseado na quantidade de dados
+        num_influencers = len(pontos['nickName'].unique())
+        # Quanto menos influenciadores, maior o tamanho máximo das bolhas
+        size_max_dynamic = max(50, min(80, 150 - (num_influencers * 2)))
+
+        fig_b = px.scatter(pontos, x='socialPowers', y='mediaPowers', size='audienceSizes',
+                           color='MicroTrends', hover_name='nickName', size_max=size_max_dynamic,
+                           render_mode='webgl' if len(pontos) > SCATTER_WEBGL_MIN_POINTS else 'svg',
+                           template=figure_template())
+
+        # Melhorar o hover template
+        fig_b.update_traces(
+            hovertemplate='<b>%{hovertext}</b><br><br>' +
+                         'Social Power: %{x:.4f}<br>' +
+                         'Media Power: %{y:.0f}<br>' +
+                         'Audiência: %{marker.size:,.0f}<br>' +
+                         '<extra></extra>'
+        )
+
+    # Configurar layout otimizado
+    fig_b.update_layout(
+        height=700,
+        legend=dict(
+            orientation="h",
+            yanchor="top",
+            y=-0.15,
+            xanchor="center",
+            x=0.5,
+            font=dict(size=11)
+        ),
+        xaxis_title="Social Power",
+        yaxis_title="Media Power",
+        margin=dict(l=50, r=50, t=30, b=120),
+        # Ajustar escala dos eixos para melhor visualização
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.2)',
+            zeroline=True,
+            zerolinecolor='rgba(200,200,200,0.5)'
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(200,200,200,0.2)',
+            zeroline=True,
+            zerolinecolor='rgba(200,200,200,0.5)'
+        )
+    )
+    return fig_b, aviso
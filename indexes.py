@@ -0,0 +1,274 @@
+"""Índices de linhas construídos uma vez por snapshot.
+
+``FilterIndex`` guarda, para cada coluna de filtro da sidebar, as posições
+das linhas de cada valor (listas ordenadas, no formato CSR). A seleção em
+cascata vira uma interseção de posições e o DataFrame só é materializado no
+fim, com as colunas que o gráfico precisa.
+
+``FacetIndex`` faz o mesmo para as colunas de texto com vários valores por
+linha (``Tags``, ``Trends``) e para as de valor único mas grafia irregular
+(``brands``, ``sentimental``): os valores são normalizados uma vez e cada
+valor guarda as posições das linhas em que aparece.
+"""
+import csv
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLS = ['origem', 'MacroTrends', 'MicroTrends', 'nickName']
+# Coluna de faceta -> tem vários valores por linha (separados por vírgula)
+FACET_COLS = {'Tags': True, 'Trends': True, 'brands': False, 'sentimental': False}
+
+
+class FilterIndex:
+    def __init__(self, df, columns=INDEX_COLS):
+        self.n_rows = len(df)
+        self.categories = {}
+        self.codes = {}
+        self._order = {}
+        self._offsets = {}
+        self._counts = {}
+        row_dtype = np.int32 if self.n_rows < 2**31 else np.int64
+        for col in columns:
+            cat = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype('category')
+            # Código 0 reservado para nulos; valores começam em 1
+            codes = cat.cat.codes.to_numpy().astype(row_dtype) + 1
+            counts = np.bincount(codes, minlength=len(cat.cat.categories) + 1)
+            self.categories[col] = cat.cat.categories
+            self.codes[col] = codes
+            # Ordenação estável: dentro de cada valor as linhas ficam em ordem crescente
+            self._order[col] = np.argsort(codes, kind='stable').astype(row_dtype)
+            self._offsets[col] = np.concatenate([[0], np.cumsum(counts)])
+            self._counts[col] = counts
+
+    def _value_codes(self, col, values):
+        codes = self.categories[col].get_indexer(list(values)) + 1
+        return np.unique(codes[codes > 0])
+
+    def postings(self, col, value):
+        """Posições (ordenadas) das linhas com ``col == value``."""
+        codes = self._value_codes(col, [value])
+        if not len(codes):
+            return np.empty(0, dtype=self._order[col].dtype)
+        offsets = self._offsets[col]
+        return self._order[col][offsets[codes[0]]:offsets[codes[0] + 1]]
+
+    def select(self, filters, rows=None):
+        """Posições das linhas que atendem todos os ``filters`` ({coluna: valores}).
+
+        ``rows`` restringe a busca a uma seleção anterior, o que permite
+        refinar a cascata de filtros sem recomeçar do zero. Colunas com
+        valor ``None`` não filtram.
+        """
+        ativos = {col: self._value_codes(col, valores)
+                  for col, valores in filters.items() if valores is not None}
+        if rows is None:
+            if not ativos:
+                return np.arange(self.n_rows)
+            # Começa pela coluna mais seletiva: une as listas dos valores pedidos
+            col = min(ativos, key=lambda c: self._counts[c][ativos[c]].sum())
+            codes = ativos.pop(col)
+            offsets = self._offsets[col]
+            partes = [self._order[col][offsets[c]:offsets[c + 1]] for c in codes]
+            rows = np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=self._order[col].dtype)
+        # As demais colunas só verificam os candidatos restantes
+        for col, codes in ativos.items():
+            permitido = np.zeros(len(self._counts[col]), dtype=bool)
+            permitido[codes] = True
+            rows = rows[permitido[self.codes[col][rows]]]
+        return rows
+
+    def options(self, col, rows=None):
+        """Valores de ``col`` presentes em ``rows``, na ordem de aparição."""
+        codes = self.codes[col] if rows is None else self.codes[col][rows]
+        codes = pd.unique(codes)
+        return self.categories[col].take(codes[codes > 0] - 1).tolist()
+
+    @staticmethod
+    def take(df, rows, columns=None):
+        """Materializa só as linhas ``rows`` (e as ``columns`` pedidas) de ``df``."""
+        if columns is not None:
+            df = df[columns]
+        return df.take(rows)
+
+
+def split_values(texto, multi=True):
+    """Valores de uma célula de faceta, sem aspas, espaços ou ponto final.
+
+    ``' smartphone,"durabilidade","tela de 6,75 pol" '`` vira
+    ``['smartphone', 'durabilidade', 'tela de 6,75 pol']``: a vírgula só
+    separa fora das aspas.
+    """
+    if not isinstance(texto, str):
+        return [] if texto is None or pd.isna(texto) else [str(texto)]
+    partes = next(csv.reader([texto.strip()], skipinitialspace=True, escapechar='\\')) if multi else [texto]
+    valores = (parte.strip().strip('"\'').strip().rstrip('.;').strip() for parte in partes)
+    return [valor for valor in valores if valor]
+
+
+class FacetIndex:
+    """Listas de posições por valor normalizado das colunas de ``FACET_COLS``.
+
+    Grafias que só diferem em maiúsculas/espaços viram um mesmo valor, rotulado
+    pela grafia mais frequente. Cada coluna guarda os pares (linha, valor) em
+    ordem de linha, para contagens, e as posições por valor (CSR), para filtros.
+    """
+
+    def __init__(self, df, columns=FACET_COLS):
+        self.n_rows = len(df)
+        self.labels = {}
+        self._keys = {}
+        self._rows = {}
+        self._values = {}
+        self._order = {}
+        self._offsets = {}
+        row_dtype = np.int32 if self.n_rows < 2**31 else np.int64
+        for col, multi in columns.items():
+            if col not in df.columns:
+                continue
+            # Cada texto distinto é quebrado uma vez só
+            codes, distintos = pd.factorize(df[col], use_na_sentinel=True)
+            grafias = {}
+            tokens = [[grafias.setdefault(v, len(grafias)) for v in split_values(t, multi)]
+                      for t in distintos]
+            tamanhos = np.array([len(t) for t in tokens] + [0], dtype=np.int64)
+            inicio_texto = np.concatenate([[0], np.cumsum(tamanhos)])
+            planos = np.fromiter((v for t in tokens for v in t), dtype=np.int64, count=int(tamanhos.sum()))
+
+            # Pares (linha, grafia) em ordem de linha; nulo aponta para o texto vazio do fim
+            codes = np.where(codes < 0, len(distintos), codes)
+            por_linha = tamanhos[codes]
+            linhas = np.repeat(np.arange(self.n_rows, dtype=row_dtype), por_linha)
+            deslocamento = np.arange(len(linhas)) - np.repeat(np.cumsum(por_linha) - por_linha, por_linha)
+            grafia = planos[np.repeat(inicio_texto[codes], por_linha) + deslocamento]
+
+            # Grafia -> valor normalizado, rotulado pela grafia mais frequente
+            nomes = np.array(list(grafias), dtype=object)
+            chaves, valor_da_grafia = np.unique([' '.join(n.split()).casefold() for n in nomes],
+                                                return_inverse=True)
+            frequencia = np.bincount(grafia, minlength=len(nomes))
+            ordem = np.lexsort((-frequencia, valor_da_grafia))
+            primeira = np.unique(valor_da_grafia[ordem], return_index=True)[1]
+            self.labels[col] = pd.Index(nomes[ordem[primeira]], name=col)
+            # Chaves normalizadas em ordem: a posição é o id do valor
+            self._keys[col] = pd.Index(chaves, name=col)
+
+            # Um par por (linha, valor), mesmo que o valor se repita na célula. Os
+            # pares já estão em ordem de linha: a ordenação estável (timsort) só
+            # reordena dentro de cada célula
+            valores = valor_da_grafia[grafia]
+            pares = np.sort(linhas.astype(np.int64) * len(chaves) + valores, kind='stable')
+            pares = pares[np.concatenate([[True], pares[1:] != pares[:-1]])]
+            self._rows[col] = (pares // max(len(chaves), 1)).astype(row_dtype)
+            self._values[col] = (pares % max(len(chaves), 1)).astype(np.int32)
+            # Ordenação estável: dentro de cada valor as linhas ficam em ordem crescente
+            self._order[col] = self._rows[col][np.argsort(self._values[col], kind='stable')]
+            self._offsets[col] = np.concatenate([[0], np.cumsum(np.bincount(self._values[col],
+                                                                            minlength=len(chaves)))])
+
+    @property
+    def columns(self):
+        return list(self.labels)
+
+    def _value_ids(self, col, values):
+        # Rótulo ou qualquer grafia: a forma normalizada leva à chave do valor
+        ids = self._keys[col].get_indexer([' '.join(str(v).split()).casefold() for v in values])
+        return sorted(set(ids[ids >= 0].tolist()))
+
+    def postings(self, col, value):
+        """Posições (ordenadas) das linhas que têm ``value`` em ``col``."""
+        ids = self._value_ids(col, [value])
+        if not ids:
+            return np.empty(0, dtype=self._order[col].dtype)
+        offsets = self._offsets[col]
+        return self._order[col][offsets[ids[0]]:offsets[ids[0] + 1]]
+
+    def select(self, filters, rows=None):
+        """Posições das linhas com algum dos valores pedidos em cada faceta.
+
+        Dentro de uma faceta os valores se somam (OU); entre facetas, e com
+        ``rows``, as posições se cruzam (E). Facetas com ``None`` não filtram.
+        """
+        for col, valores in filters.items():
+            if valores is None:
+                continue
+            offsets = self._offsets[col]
+            partes = [self._order[col][offsets[i]:offsets[i + 1]] for i in self._value_ids(col, valores)]
+            linhas = np.unique(np.concatenate(partes)) if partes else np.empty(0, dtype=self._order[col].dtype)
+            rows = linhas if rows is None else np.intersect1d(rows, linhas, assume_unique=True)
+        return np.arange(self.n_rows) if rows is None else rows
+
+    def _in_rows(self, col, rows):
+        if rows is None:
+            return slice(None)
+        marcadas = np.zeros(self.n_rows, dtype=bool)
+        marcadas[rows] = True
+        return marcadas[self._rows[col]]
+
+    def counts(self, col, rows=None):
+        """Linhas com cada valor de ``col`` dentro de ``rows``, em ordem decrescente."""
+        contagem = np.bincount(self._values[col][self._in_rows(col, rows)], minlength=len(self.labels[col]))
+        serie = pd.Series(contagem, index=self.labels[col], name='videos')
+        serie = serie[serie > 0]
+        # Ordem estável: empates seguem a ordem alfabética dos valores
+        return serie.iloc[np.argsort(-serie.to_numpy(), kind='stable')]
+
+    def options(self, col, rows=None):
+        """Valores de ``col`` presentes em ``rows``, do mais para o menos frequente."""
+        return self.counts(col, rows).index.tolist()
+
+    def pairs(self, col, group_codes, rows=None):
+        """Contagem de linhas por (grupo, valor) dentro de ``rows``.
+
+        ``group_codes`` é um código inteiro por linha (ex.: ``FilterIndex.codes``).
+        Devolve ``(grupos, valores, contagens)``, só com os pares presentes.
+        """
+        dentro = self._in_rows(col, rows)
+        n_valores = max(len(self.labels[col]), 1)
+        chave = group_codes[self._rows[col][dentro]].astype(np.int64) * n_valores + self._values[col][dentro]
+        chaves, contagens = np.unique(chave, return_counts=True)
+        return chaves // n_valores, chaves % n_valores, contagens
+
+    def row_values(self, col):
+        """Valor (posição em ``labels[col]``) de cada linha numa faceta de valor único; -1 se vazio."""
+        valores = np.full(self.n_rows, -1, dtype=np.int32)
+        valores[self._rows[col]] = self._values[col]
+        return valores
+
+
+class TrendMetadata:
+    """Hierarquia (origem, MacroTrend, MicroTrend) com as descrições de cada tendência.
+
+    Montada em uma única passada sobre o snapshot; responde às buscas de
+    descrição de qualquer subconjunto filtrado por canal sem voltar às linhas.
+    """
+
+    LEVELS = ('MacroTrends', 'MicroTrends')
+
+    def __init__(self, df, descricoes):
+        self.table = (df[['origem', 'MacroTrends', 'MicroTrends']]
+                      .drop_duplicates()
+                      .reset_index(drop=True))
+        self._descricoes = {}
+        for level in self.LEVELS:
+            serie = descricoes.get(level, pd.Series(dtype=object)).astype(str).str.strip()
+            self._descricoes[level] = serie[(serie != '') & (serie != 'nan')].to_dict()
+        self._memo = {}
+        # Rótulos quebrados por nome de tendência (ver labels.wrap_labels)
+        self.label_cache = {}
+
+    def description(self, level, trend):
+        return self._descricoes[level].get(trend)
+
+    def descriptions(self, level, origem=None):
+        """{tendência: descrição} das tendências de ``level`` presentes em ``origem``.
+
+        ``origem=None`` considera todos os canais. O resultado é memorizado
+        por combinação de canais, já que o snapshot é imutável.
+        """
+        chave = (level, None if origem is None else frozenset(origem))
+        if chave not in self._memo:
+            tabela = self.table if origem is None else self.table[self.table['origem'].isin(list(origem))]
+            todas = self._descricoes[level]
+            self._memo[chave] = {t: todas[t] for t in tabela[level].dropna().unique() if t in todas}
+        return self._memo[chave]
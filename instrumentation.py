@@ -0,0 +1,174 @@
+"""Tempo e memória por etapa de cada rerun do dashboard.
+
+O app marca o fim de cada etapa com ``RerunTimer.lap`` (sem precisar
+reindentar o script do Streamlit) e ``StageMetrics`` guarda as últimas
+amostras de cada etapa para calcular percentis móveis. Os números vão para
+o painel de administração da sidebar e para arquivos JSON/Prometheus em
+``.metrics/``.
+
+O pico de memória usa o ``tracemalloc``, que tem custo: só é medido
+enquanto o rastreamento estiver ligado (painel de administração ou
+``TRENDS_TRACE_MEMORY=1``). O rastreamento é do processo inteiro, então
+sessões simultâneas somam as alocações umas das outras.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+METRICS_DIR = Path(__file__).resolve().parent / '.metrics'
+WINDOW = 500
+PERCENTILES = (50, 90, 99)
+# Intervalo mínimo entre duas exportações automáticas para arquivo
+EXPORT_INTERVAL = 30.0
+
+
+def memory_tracing():
+    return tracemalloc.is_tracing()
+
+
+def set_memory_tracing(ligado):
+    if ligado and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not ligado and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _memory_mark():
+    if not tracemalloc.is_tracing():
+        return None
+    tracemalloc.reset_peak()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _peak_since(marca):
+    if marca is None or not tracemalloc.is_tracing():
+        return None
+    return max(0, tracemalloc.get_traced_memory()[1] - marca)
+
+
+class StageMetrics:
+    """Amostras recentes (tempo, pico de memória) por etapa, seguras entre threads."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._tempos = {}
+        self._memoria = {}
+        self._totais = {}
+        self._lock = threading.Lock()
+        self._ultima_exportacao = 0.0
+
+    def record(self, stage, seconds, peak_bytes=None):
+        with self._lock:
+            if stage not in self._tempos:
+                self._tempos[stage] = deque(maxlen=self.window)
+                self._memoria[stage] = deque(maxlen=self.window)
+                self._totais[stage] = [0, 0.0]
+            self._tempos[stage].append(seconds)
+            if peak_bytes is not None:
+                self._memoria[stage].append(peak_bytes)
+            self._totais[stage][0] += 1
+            self._totais[stage][1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._tempos.clear()
+            self._memoria.clear()
+            self._totais.clear()
+
+    def summary(self):
+        """{etapa: estatísticas} com percentis da janela e totais desde o início."""
+        with self._lock:
+            copia = {stage: (list(self._tempos[stage]), list(self._memoria[stage]), tuple(self._totais[stage]))
+                     for stage in self._tempos}
+        resumo = {}
+        for stage, (tempos, memoria, (count, soma)) in copia.items():
+            tempos = np.asarray(tempos)
+            item = {
+                'count': count,
+                'sum_s': soma,
+                'window': len(tempos),
+                'last_s': float(tempos[-1]),
+                'max_s': float(tempos.max()),
+                **{f'p{p}_s': float(v) for p, v in zip(PERCENTILES, np.percentile(tempos, PERCENTILES))},
+            }
+            if memoria:
+                memoria = np.asarray(memoria)
+                item['peak_bytes_max'] = int(memoria.max())
+                item.update({f'peak_bytes_p{p}': float(v)
+                             for p, v in zip(PERCENTILES, np.percentile(memoria, PERCENTILES))})
+            resumo[stage] = item
+        return resumo
+
+    def to_json(self):
+        return {'generated_at': time.time(), 'window': self.window, 'stages': self.summary()}
+
+    def to_prometheus(self):
+        """Resumo no formato texto do Prometheus (coletor de arquivos do node_exporter)."""
+        resumo = self.summary()
+        linhas = [
+            '# HELP dashboard_stage_seconds Tempo de parede por etapa do rerun (percentis da janela movel).',
+            '# TYPE dashboard_stage_seconds summary',
+        ]
+        for stage, item in resumo.items():
+            for p in PERCENTILES:
+                linhas.append(f'dashboard_stage_seconds{{stage="{stage}",quantile="{p / 100}"}} {item[f"p{p}_s"]:.6f}')
+            linhas.append(f'dashboard_stage_seconds_sum{{stage="{stage}"}} {item["sum_s"]:.6f}')
+            linhas.append(f'dashboard_stage_seconds_count{{stage="{stage}"}} {item["count"]}')
+        com_memoria = {stage: item for stage, item in resumo.items() if 'peak_bytes_max' in item}
+        if com_memoria:
+            linhas += [
+                '# HELP dashboard_stage_peak_bytes Pico de memoria alocada por etapa (tracemalloc).',
+                '# TYPE dashboard_stage_peak_bytes gauge',
+            ]
+            for stage, item in com_memoria.items():
+                for p in PERCENTILES:
+                    linhas.append(f'dashboard_stage_peak_bytes{{stage="{stage}",quantile="{p / 100}"}} '
+                                  f'{item[f"peak_bytes_p{p}"]:.0f}')
+        return '\n'.join(linhas) + '\n'
+
+    def export(self, directory=METRICS_DIR):
+        """Grava ``stages.json`` e ``stages.prom`` em ``directory`` (troca atômica)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        conteudos = {
+            'stages.json': json.dumps(self.to_json(), ensure_ascii=False, indent=2),
+            'stages.prom': self.to_prometheus(),
+        }
+        for nome, texto in conteudos.items():
+            tmp = directory / f'{nome}.{threading.get_ident()}.tmp'
+            tmp.write_text(texto, encoding='utf-8')
+            os.replace(tmp, directory / nome)
+        self._ultima_exportacao = time.monotonic()
+
+    def maybe_export(self, directory=METRICS_DIR, interval=EXPORT_INTERVAL):
+        """Exporta se a última exportação tiver mais de ``interval`` segundos."""
+        with self._lock:
+            if time.monotonic() - self._ultima_exportacao < interval:
+                return
+            self._ultima_exportacao = time.monotonic()
+        self.export(directory)
+
+
+class RerunTimer:
+    """Cronômetro de um rerun: cada ``lap`` registra a etapa desde a marca anterior."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._inicio = self._ultimo = time.perf_counter()
+        self._memoria = _memory_mark()
+
+    def lap(self, stage):
+        agora = time.perf_counter()
+        self.metrics.record(stage, agora - self._ultimo, _peak_since(self._memoria))
+        self._ultimo = time.perf_counter()
+        self._memoria = _memory_mark()
+
+    def finish(self, stage='rerun'):
+        """Registra o tempo total do rerun (sem memória: as etapas já a cobrem)."""
+        self.metrics.record(stage, time.perf_counter() - self._inicio)
@@ -0,0 +1,62 @@
+"""Montagem de rótulos e descrições dos gráficos, coluna a coluna.
+
+As funções recebem Series inteiras. A quebra de linha dos nomes de tendência
+é calculada uma vez por nome distinto e guardada em um dicionário que vive
+junto com o snapshot (``TrendMetadata.label_cache``).
+"""
+import numpy as np
+import pandas as pd
+
+
+# Quebra de texto para caber nas caixas
+def quebrar_texto(texto, max_chars=20):
+    palavras = str(texto).split()
+    linhas = []
+    linha_atual = []
+    tam_atual = 0
+
+    for palavra in palavras:
+        if tam_atual + len(palavra) + 1 <= max_chars:
+            linha_atual.append(palavra)
+            tam_atual += len(palavra) + 1
+        else:
+            if linha_atual:
+                linhas.append(' '.join(linha_atual))
+            linha_atual = [palavra]
+            tam_atual = len(palavra)
+
+    if linha_atual:
+        linhas.append(' '.join(linha_atual))
+
+    return '<br>'.join(linhas)
+
+
+def wrap_labels(names, cache=None, max_chars=20):
+    """``quebrar_texto`` aplicado a uma Series, uma vez por nome distinto."""
+    cache = {} if cache is None else cache
+    mapa = {}
+    for nome in pd.unique(names):
+        if (nome, max_chars) not in cache:
+            cache[(nome, max_chars)] = quebrar_texto(nome, max_chars)
+        mapa[nome] = cache[(nome, max_chars)]
+    return names.map(mapa).astype(object)
+
+
+def engagement_labels(names, engajamento, cache=None):
+    """Rótulo do treemap: nome quebrado + engajamento em milhões ("(1.2MM)")."""
+    milhoes = np.char.mod('%.1f', np.asarray(engajamento, dtype=float) / 1_000_000)
+    return wrap_labels(names, cache) + '<br>(' + milhoes + 'MM)'
+
+
+def truncate_labels(names, max_chars=40, suffix='...'):
+    """Corta nomes maiores que ``max_chars`` e acrescenta ``suffix``."""
+    texto = names.astype(str)
+    longo = texto.str.len() > max_chars
+    return texto.where(~longo, texto.str.slice(0, max_chars) + suffix)
+
+
+def fill_descriptions(descricoes, padrao):
+    """Troca descrições vazias (NaN ou o texto 'nan') por ``padrao``."""
+    descricoes = descricoes.astype(object)
+    vazia = descricoes.isna() | (descricoes.astype(str) == 'nan')
+    return descricoes.where(~vazia, padrao)
@@ -0,0 +1,142 @@
+"""Recarga da base em segundo plano, com troca atômica do ``engine.Dataset``.
+
+Uma thread verifica a origem (Excel, pasta ou glob) a cada ``interval``
+segundos com ``snapshot.ensure_snapshot``: sem mudança nos arquivos é só um
+``stat``. Quando a versão muda (planilha nova ou lote incremental aplicado),
+o snapshot novo é gravado e o ``Dataset`` (cubo, índices, sketches) é
+montado nessa thread, fora do caminho das requisições; enquanto isso as
+sessões continuam respondendo com o ``Dataset`` publicado.
+
+A troca é a atribuição de uma referência: cada rerun pega o ``Dataset`` uma
+vez no início e enxerga uma versão inteira, nunca uma mistura. Na memória
+ficam no máximo duas versões, a publicada e a que está sendo montada; a
+anterior deixa de ser referenciada na troca (reruns em andamento terminam
+nela e a soltam).
+
+Com ``TRENDS_SHARED=1`` (vários processos do app, ver shared.py) a thread
+não monta nada: lê o manifest e se conecta ao ``Dataset`` que o carregador
+publicou para a versão. Enquanto a versão nova não é publicada, segue na
+atual; só sem nenhuma versão publicada o processo monta a sua.
+"""
+import os
+import threading
+import time
+
+import engine
+from shared import attach_dataset
+from snapshot import DEFAULT_SOURCE, SNAPSHOT_DIR, ensure_snapshot, read_manifest
+
+# Intervalo entre duas verificações da origem, em segundos
+REFRESH_INTERVAL = float(os.environ.get('TRENDS_REFRESH_SECONDS', 30))
+# Processos do app conectados ao Dataset publicado por shared.py
+SHARED_MODE = os.environ.get('TRENDS_SHARED') == '1'
+
+
+class DatasetRefresher:
+    """Guarda o ``Dataset`` publicado e o substitui quando a origem muda.
+
+    ``on_swap(versao_antiga, versao_nova)`` é chamado depois de cada troca
+    (ex.: para descartar resultados em cache da versão antiga).
+    """
+
+    def __init__(self, source=DEFAULT_SOURCE, snapshot_dir=SNAPSHOT_DIR, interval=REFRESH_INTERVAL,
+                 on_swap=None, shared=SHARED_MODE):
+        self.source = source
+        self.snapshot_dir = snapshot_dir
+        self.interval = interval
+        self.shared = shared
+        # Dataset atual vem do arquivo publicado (e não de uma carga própria)
+        self.attached = False
+        self.on_swap = on_swap
+        self._dataset = None
+        # Uma carga por vez: a primeira (pedida por uma sessão) ou a da thread
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.loaded_at = None
+        self.last_check = None
+        self.last_error = None
+        self.refreshing = False
+        self.swaps = 0
+
+    def current(self):
+        """``Dataset`` publicado.
+
+        Só a primeira chamada espera (não há versão anterior para servir);
+        sessões simultâneas nesse momento esperam a mesma carga em vez de
+        carregar cada uma a sua.
+        """
+        ds = self._dataset
+        if ds is None:
+            self.check()
+            ds = self._dataset
+        return ds
+
+    def check(self):
+        """Verifica a origem e publica uma versão nova, se houver. Devolve se trocou."""
+        with self._load_lock:
+            self.last_check = time.time()
+            # No modo compartilhado o snapshot é do carregador; o processo só o lê
+            manifest = read_manifest(self.snapshot_dir) if self.shared else None
+            if manifest is None:
+                manifest = ensure_snapshot(self.source, self.snapshot_dir)
+            anterior = self._dataset
+            # Uma cópia própria (montada antes da publicação) é trocada pela
+            # publicada assim que ela aparece, mesmo na mesma versão
+            if (anterior is not None and anterior.version == manifest['version']
+                    and (self.attached or not self.shared)):
+                return False
+            self.refreshing = True
+            try:
+                novo = attach_dataset(manifest['version'], self.snapshot_dir) if self.shared else None
+                conectado = novo is not None
+                if novo is None:
+                    if anterior is not None and self.shared:
+                        # Versão nova ainda não publicada pelo carregador
+                        return False
+                    novo = engine.load_dataset(self.snapshot_dir, manifest)
+            finally:
+                self.refreshing = False
+            self._dataset = novo
+            self.attached = conectado
+            self.loaded_at = time.time()
+        if anterior is not None and anterior.version != novo.version:
+            self.swaps += 1
+            if self.on_swap is not None:
+                self.on_swap(anterior.version, novo.version)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+                self.last_error = None
+            except Exception as e:
+                # A versão publicada continua valendo; tenta de novo no próximo ciclo
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def start(self):
+        """Inicia a verificação periódica em uma thread daemon (uma só por objeto)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='trends-refresher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def status(self):
+        ds = self._dataset
+        return {
+            'version': ds.version if ds is not None else None,
+            'shared': self.shared,
+            'attached': self.attached,
+            'loaded_at': self.loaded_at,
+            'last_check': self.last_check,
+            'refreshing': self.refreshing,
+            'swaps': self.swaps,
+            'last_error': self.last_error,
+        }
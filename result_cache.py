@@ -0,0 +1,134 @@
+"""Cache de resultados compartilhado entre sessões, limitado por memória.
+
+As páginas guardam aqui o que calculam para um estado de filtros (agregados
+e figuras Plotly). A chave é a versão do snapshot mais a tupla normalizada dos
+filtros, então qualquer analista que repetir um estado já visto (em especial
+o padrão "tudo selecionado") recebe o resultado pronto. A remoção é LRU,
+respeitando um teto de bytes e de entradas.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 512
+# Itens de um array de objetos (textos) usados para estimar o tamanho médio
+SAMPLE_SIZE = 100
+
+
+def normalize_filters(filters):
+    """Tupla ordenada e hashável de ``filters`` ({nome: valores ou None})."""
+    return tuple(
+        (nome, None if valores is None else tuple(sorted({str(v) for v in valores})))
+        for nome, valores in sorted(filters.items())
+    )
+
+
+def make_key(versao, secao, filters):
+    return (versao, secao, normalize_filters(filters))
+
+
+def estimate_size(value):
+    """Tamanho aproximado em bytes de um resultado guardado no cache."""
+    # Sem o plotly carregado não há figura: o import fica com quem monta figuras
+    plotly_base = sys.modules.get('plotly.basedatatypes')
+    if plotly_base is not None and isinstance(value, plotly_base.BaseFigure):
+        # Propriedades guardadas na figura (os arrays das traces entram pelo
+        # nbytes), sem serializá-la
+        return sys.getsizeof(value) + estimate_size(value._data) + estimate_size(value._layout)
+    if isinstance(value, np.ndarray):
+        if value.dtype == object and value.size:
+            amostra = value.ravel()[:SAMPLE_SIZE]
+            return value.nbytes + value.size * sum(sys.getsizeof(v) for v in amostra) // len(amostra)
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Versões já descartadas: um cálculo que termina depois da troca não volta ao cache
+        self._discarded = set()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes or key[0] in self._discarded:
+                return value
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, removido) = self._entries.popitem(last=False)
+                self.bytes -= removido
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Devolve o valor de ``key``, calculando com ``compute()`` na ausência.
+
+        O cálculo roda fora do lock: duas sessões pedindo a mesma chave ao
+        mesmo tempo podem calcular em dobro, mas nunca bloqueiam as demais.
+        """
+        sentinela = object()
+        value = self.get(key, sentinela)
+        if value is sentinela:
+            value = self.put(key, compute())
+        return value
+
+    def discard_version(self, versao):
+        """Remove os resultados de uma versão do snapshot (ex.: depois de uma troca).
+
+        A versão fica marcada: ``put`` de um cálculo dela ainda em andamento
+        devolve o valor sem guardá-lo.
+        """
+        with self._lock:
+            self._discarded.add(versao)
+            for key in [key for key in self._entries if key[0] == versao]:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,219 @@
+"""Busca textual nos vídeos, influenciadores e tendências.
+
+O índice invertido é montado uma vez por snapshot (junto com o ``Dataset``)
+sobre o texto já normalizado: minúsculas, sem acentos e sem palavras
+vazias, então "câmera" encontra "Camera" e "CÂMERAS" não precisa de
+``str.contains`` em cada rerun. Cada consulta soma as listas de postings dos
+termos (BM25) e devolve as linhas dos vídeos, que entram na cascata de
+filtros como qualquer outra seleção.
+
+Os documentos são:
+
+- vídeos: ``Desc`` e ``sumario`` (indexados por texto distinto, não por linha);
+- influenciadores: o ``nickName``, somado à melhor nota entre seus vídeos
+  (um acerto no nome traz todos os vídeos do influenciador);
+- tendências: nome e descrição de cada MacroTrend e MicroTrend (um acerto
+  traz os vídeos da tendência, pelas postings do ``FilterIndex``).
+"""
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+VIDEO_TEXT_COLS = ['Desc', 'sumario']
+TREND_LEVELS = ('MacroTrends', 'MicroTrends')
+MIN_TOKEN_LEN = 2
+STOPWORDS = frozenset('''
+    a o as os um uma uns umas de da do das dos em na no nas nos ao aos e ou
+    para pra por pelo pela pelos pelas com sem que se sua seu suas seus sobre
+    mais muito como entre ja nao sim isso esse essa este esta the and of to in
+'''.split())
+# Peso de um acerto no nome do influenciador frente à nota dos vídeos dele
+NAME_WEIGHT = 2.0
+# Peso de um acerto no nome/descrição da tendência para os vídeos dela
+TREND_WEIGHT = 1.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Consultas memorizadas por snapshot (as mais antigas saem primeiro)
+MEMO_SIZE = 256
+
+_TOKEN = re.compile(r'\w+')
+
+
+def fold(texto):
+    """Minúsculas sem acentos (``'Câmera'`` -> ``'camera'``)."""
+    decomposto = unicodedata.normalize('NFKD', str(texto).casefold())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenize(texto):
+    """Termos de ``texto`` como entram no índice (e na consulta)."""
+    if not isinstance(texto, str):
+        return []
+    return [t for t in _TOKEN.findall(fold(texto)) if len(t) >= MIN_TOKEN_LEN and t not in STOPWORDS]
+
+
+class InvertedIndex:
+    """Postings (documento, frequência) por termo, com os termos em ordem
+    alfabética para expandir prefixos."""
+
+    def __init__(self, textos):
+        vocab = {}
+        docs, termos, tamanhos = [], [], []
+        for i, texto in enumerate(textos):
+            tokens = tokenize(texto)
+            tamanhos.append(len(tokens))
+            for token in tokens:
+                termos.append(vocab.setdefault(token, len(vocab)))
+                docs.append(i)
+        # Renumera os termos em ordem alfabética: prefixo vira intervalo contíguo
+        self.terms = sorted(vocab)
+        nova_ordem = np.empty(len(vocab), dtype=np.int64)
+        nova_ordem[[vocab[t] for t in self.terms]] = np.arange(len(vocab))
+        n_termos = max(len(vocab), 1)
+        pares = nova_ordem[np.asarray(termos, dtype=np.int64)] * len(textos) + np.asarray(docs, dtype=np.int64)
+        pares, frequencias = np.unique(pares, return_counts=True)
+
+        self.n_docs = len(textos)
+        self._docs = (pares % max(self.n_docs, 1)).astype(np.int32)
+        self._tf = frequencias.astype(np.float32)
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(pares // max(self.n_docs, 1),
+                                                                   minlength=n_termos))])
+        tamanhos = np.asarray(tamanhos, dtype=np.float32)
+        media = tamanhos.mean() if len(tamanhos) and tamanhos.mean() > 0 else 1.0
+        # Parte da normalização do BM25 que só depende do documento
+        self._norma = BM25_K1 * (1 - BM25_B + BM25_B * tamanhos / media)
+
+    def _term_range(self, termo, prefixo):
+        inicio = bisect.bisect_left(self.terms, termo)
+        if not prefixo:
+            fim = inicio + 1 if inicio < len(self.terms) and self.terms[inicio] == termo else inicio
+        else:
+            fim = bisect.bisect_left(self.terms, termo + '￿', lo=inicio)
+        return inicio, fim
+
+    def score(self, termos, prefix_last=True):
+        """``(docs, notas)`` dos documentos que têm todos os ``termos``.
+
+        O último termo vale como prefixo (consulta ainda sendo digitada) e
+        pode casar com vários termos do índice; cada um conta pela sua nota.
+        """
+        if not termos or not self.n_docs:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        notas = np.zeros(self.n_docs, dtype=np.float32)
+        acertos = np.zeros(self.n_docs, dtype=np.int32)
+        for i, termo in enumerate(termos):
+            inicio, fim = self._term_range(termo, prefix_last and i == len(termos) - 1)
+            a, b = self._offsets[inicio], self._offsets[fim]
+            if a == b:
+                return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+            docs, tf = self._docs[a:b], self._tf[a:b]
+            # IDF de cada termo expandido, pelo tamanho da sua lista
+            df = np.repeat(np.diff(self._offsets[inicio:fim + 1]), np.diff(self._offsets[inicio:fim + 1]))
+            idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+            notas += np.bincount(docs, weights=idf * tf * (BM25_K1 + 1) / (tf + self._norma[docs]),
+                                 minlength=self.n_docs).astype(np.float32)
+            presente = np.zeros(self.n_docs, dtype=bool)
+            presente[docs] = True
+            acertos += presente
+        docs = np.flatnonzero(acertos == len(termos)).astype(np.int32)
+        return docs, notas[docs]
+
+
+class SearchIndex:
+    """Índices de busca de um snapshot: vídeos, influenciadores e tendências."""
+
+    def __init__(self, df, trend_meta, index):
+        self.n_rows = len(df)
+        # Um documento por combinação distinta de textos; as linhas apontam para ele
+        codes = np.zeros(self.n_rows, dtype=np.int64)
+        for col in VIDEO_TEXT_COLS:
+            if col in df.columns:
+                col_codes, valores = pd.factorize(df[col])
+                codes = codes * (len(valores) + 1) + col_codes + 1
+        codes = pd.factorize(codes)[0]
+        n_docs = codes.max() + 1 if len(codes) else 0
+        primeiras = np.full(n_docs, -1, dtype=np.int64)
+        primeiras[codes[::-1]] = np.arange(self.n_rows)[::-1]
+        textos = df[[col for col in VIDEO_TEXT_COLS if col in df.columns]].iloc[primeiras]
+        self.videos = InvertedIndex([' '.join(str(v) for v in linha if isinstance(v, str))
+                                     for linha in textos.itertuples(index=False)])
+        self._row_order = np.argsort(codes, kind='stable').astype(np.int32)
+        self._row_offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_docs))])
+
+        self._filter_index = index
+        self._nick_codes = index.codes['nickName']
+        self.nick_names = index.categories['nickName']
+        self.names = InvertedIndex(list(self.nick_names.astype(str)))
+
+        self.trends = pd.DataFrame(
+            [(level, trend) for level in TREND_LEVELS for trend in trend_meta.table[level].dropna().unique()],
+            columns=['level', 'trend'])
+        self.trends_index = InvertedIndex([
+            f"{trend} {trend_meta.description(level, trend) or ''}"
+            for level, trend in self.trends.itertuples(index=False)])
+        self._memo = {}
+
+    def _rows_of(self, textos):
+        partes = [self._row_order[self._row_offsets[t]:self._row_offsets[t + 1]] for t in textos]
+        return np.concatenate(partes) if partes else np.empty(0, dtype=np.int32)
+
+    def search(self, query):
+        """Resultado da busca ``query`` (memorizado por consulta normalizada).
+
+        Devolve um dict com ``rows`` (posições dos vídeos encontrados, em
+        ordem crescente), ``row_scores`` (nota de cada uma), ``influencers``
+        (DataFrame ``nickName``/``score``/``videos``) e ``trends``
+        (``level``/``trend``/``score``), esses dois em ordem de relevância.
+        """
+        termos = tokenize(query)
+        chave = tuple(termos)
+        if chave in self._memo:
+            return self._memo[chave]
+
+        textos, notas_texto = self.videos.score(termos)
+        notas_video = np.zeros(self.n_rows, dtype=np.float32)
+        notas_video[self._rows_of(textos)] = np.repeat(notas_texto, np.diff(self._row_offsets)[textos])
+
+        # Influenciador: melhor vídeo + acerto no nome; quem casa pelo nome
+        # traz todos os seus vídeos para o resultado
+        n_nicks = len(self.nick_names) + 1
+        bonus = np.zeros(n_nicks, dtype=np.float32)
+        nomes, notas_nome = self.names.score(termos)
+        bonus[nomes + 1] = NAME_WEIGHT * notas_nome
+        melhor = np.zeros(n_nicks, dtype=np.float32)
+        np.maximum.at(melhor, self._nick_codes, notas_video)
+        melhor += bonus
+        melhor[0] = 0
+        notas_linha = notas_video + bonus[self._nick_codes]
+
+        # Tendência: os vídeos de cada tendência encontrada ganham a nota dela
+        # (a maior, se estiverem em mais de uma)
+        docs, notas_tendencia = self.trends_index.score(termos)
+        notas_trend = np.zeros(self.n_rows, dtype=np.float32)
+        for (level, trend), nota in zip(self.trends.iloc[docs].itertuples(index=False), notas_tendencia):
+            linhas = self._filter_index.postings(level, trend)
+            notas_trend[linhas] = np.maximum(notas_trend[linhas], TREND_WEIGHT * nota)
+        notas_linha += notas_trend
+        rows = np.flatnonzero(notas_linha > 0).astype(np.int32)
+        notas_linha = notas_linha[rows]
+        videos = np.bincount(self._nick_codes[rows], minlength=n_nicks)
+        achados = np.flatnonzero(melhor > 0)
+        achados = achados[np.argsort(-melhor[achados], kind='stable')]
+        influencers = pd.DataFrame({'nickName': self.nick_names.take(achados - 1),
+                                    'score': melhor[achados], 'videos': videos[achados]})
+
+        ordem = np.argsort(-notas_tendencia, kind='stable')
+        trends = self.trends.iloc[docs[ordem]].assign(score=notas_tendencia[ordem]).reset_index(drop=True)
+
+        resultado = {'rows': rows, 'row_scores': notas_linha, 'influencers': influencers, 'trends': trends}
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.pop(next(iter(self._memo)), None)
+        self._memo[chave] = resultado
+        return resultado
+
+    def rows(self, query):
+        """Posições (ordenadas) dos vídeos que casam com ``query``."""
+        return self.search(query)['rows']
@@ -0,0 +1,156 @@
+"""``engine.Dataset`` publicado num arquivo mapeado em memória, compartilhado
+entre os processos do app.
+
+Com vários processos do Streamlit atrás de um balanceador, cada um montava o
+seu ``Dataset``: a base compacta, o cubo, os índices e os sketches ocupavam
+a memória de cada processo e cada processo novo levava segundos para ficar
+pronto. Aqui um processo carregador monta o ``Dataset`` uma vez e o grava em
+``dataset-<versão>.bin`` na pasta do snapshot: os arrays (colunas numéricas,
+códigos das categorias, posições dos índices, cubo, registros dos sketches)
+ficam alinhados no arquivo e o restante do objeto vai num cabeçalho em pickle
+(protocolo 5, com os arrays fora da serialização).
+
+Os processos do app mapeiam o arquivo só para leitura: os arrays apontam
+direto para as páginas do arquivo, que o sistema operacional guarda uma vez
+para todos os processos, e ficar pronto custa só o unpickle do cabeçalho.
+O arquivo é pickle: só leia de uma pasta de snapshot confiável.
+
+Uso pela linha de comando::
+
+    python shared.py                          # publica a versão atual da base
+    python shared.py --watch                  # e republica a cada mudança
+    TRENDS_SHARED=1 streamlit run app.py      # cada processo do app só se conecta
+"""
+import argparse
+import mmap
+import os
+import pickle
+import struct
+import time
+from pathlib import Path
+
+import engine
+from snapshot import DEFAULT_SOURCE, SNAPSHOT_DIR, ensure_snapshot
+
+SHARED_MAGIC = b'TRENDSDS1'
+# Alinhamento de cada array no arquivo (linha de cache; exigido pelo numpy para tipos maiores)
+SHARED_ALIGN = 64
+# Versões publicadas mantidas em disco: a atual e a anterior (processos ainda na troca)
+SHARED_KEEP = 2
+WATCH_INTERVAL = 30.0
+
+
+def shared_path(version, snapshot_dir=SNAPSHOT_DIR):
+    return Path(snapshot_dir) / f'dataset-{version[:12]}.bin'
+
+
+def publish_dataset(ds, snapshot_dir=SNAPSHOT_DIR):
+    """Grava ``ds`` em ``shared_path(ds.version)`` e devolve o caminho.
+
+    Layout: ``SHARED_MAGIC``, os arrays alinhados, o cabeçalho (pickle com a
+    posição de cada array e o pickle do ``Dataset``) e, nos últimos 8 bytes,
+    a posição do cabeçalho. A troca é atômica: um processo nunca mapeia um
+    arquivo pela metade.
+    """
+    buffers = []
+    corpo = pickle.dumps(ds, protocol=5, buffer_callback=buffers.append)
+    path = shared_path(ds.version, snapshot_dir)
+    tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(SHARED_MAGIC)
+        posicoes = []
+        for buffer in buffers:
+            view = buffer.raw()
+            f.seek(_align(f.tell()))
+            posicoes.append((f.tell(), view.nbytes))
+            f.write(view)
+        inicio_cabecalho = f.tell()
+        f.write(pickle.dumps({'version': ds.version, 'buffers': posicoes, 'body': corpo}))
+        f.write(struct.pack('<Q', inicio_cabecalho))
+    os.replace(tmp, path)
+    _remove_old(path, snapshot_dir)
+    return path
+
+
+def _align(posicao):
+    return posicao + (-posicao) % SHARED_ALIGN
+
+
+def _remove_old(atual, snapshot_dir):
+    """Apaga as versões publicadas além das ``SHARED_KEEP`` mais recentes (melhor esforço)."""
+    publicados = sorted(Path(snapshot_dir).glob('dataset-*.bin'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in publicados[SHARED_KEEP:]:
+        if path != atual:
+            try:
+                path.unlink()
+            except OSError:
+                # Ainda mapeado por outro processo (Windows); sai na próxima publicação
+                pass
+
+
+def attach_dataset(version, snapshot_dir=SNAPSHOT_DIR):
+    """``Dataset`` publicado da ``version`` (``None`` se ainda não foi publicado).
+
+    Os arrays ficam somente leitura, apontando para o arquivo mapeado.
+    """
+    path = shared_path(version, snapshot_dir)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapa[:len(SHARED_MAGIC)] != SHARED_MAGIC:
+        raise ValueError(f"{path.name} não é um dataset publicado por shared.py")
+    inicio, = struct.unpack_from('<Q', mapa, len(mapa) - 8)
+    cabecalho = pickle.loads(mapa[inicio:len(mapa) - 8])
+    memoria = memoryview(mapa)
+    # Cada array mantém o mapa vivo enquanto for referenciado
+    ds = pickle.loads(cabecalho['body'], buffers=[memoria[p:p + n] for p, n in cabecalho['buffers']])
+    if ds.version != version:
+        raise ValueError(f"{path.name} traz a versão {ds.version[:12]}, esperada {version[:12]}")
+    return ds
+
+
+def publish_current(source=DEFAULT_SOURCE, snapshot_dir=SNAPSHOT_DIR):
+    """Garante o snapshot de ``source`` e publica o ``Dataset`` dele, se ainda não publicado.
+
+    Devolve ``(manifest, caminho ou None)``; ``None`` quando a versão já estava publicada.
+    """
+    manifest = ensure_snapshot(source, snapshot_dir)
+    if shared_path(manifest['version'], snapshot_dir).exists():
+        return manifest, None
+    ds = engine.load_dataset(snapshot_dir, manifest)
+    return manifest, publish_dataset(ds, snapshot_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publica o dataset do app para os processos do Streamlit.")
+    parser.add_argument('--source', default=str(DEFAULT_SOURCE), help="Excel de origem, pasta ou glob")
+    parser.add_argument('--snapshot-dir', default=str(SNAPSHOT_DIR), help="Pasta do snapshot")
+    parser.add_argument('--watch', action='store_true', help="Continua verificando a base e republica a cada mudança")
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL, help="Segundos entre verificações (--watch)")
+    args = parser.parse_args(argv)
+
+    while True:
+        inicio = time.perf_counter()
+        try:
+            manifest, path = publish_current(args.source, args.snapshot_dir)
+        except Exception as e:
+            if not args.watch:
+                raise
+            # No modo --watch a versão publicada continua valendo
+            print(f"Falha ao publicar: {type(e).__name__}: {e}")
+        else:
+            if path is not None:
+                print(f"Dataset {manifest['version'][:12]} | {manifest['rows']} linhas | "
+                      f"{path.stat().st_size / 2**20:.1f} MB | {time.perf_counter() - inicio:.2f}s -> {path}")
+            elif not args.watch:
+                print(f"Dataset {manifest['version'][:12]} já publicado")
+        if not args.watch:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
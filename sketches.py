@@ -0,0 +1,119 @@
+"""Contagens de distintos aproximadas (HyperLogLog) por partição.
+
+Influenciadores e vídeos distintos de uma seleção não saem do cubo: somar
+os distintos de cada célula conta duas vezes quem aparece em mais de uma.
+Contar exato exige passar pelas linhas selecionadas (O(linhas)).
+
+Aqui cada partição (origem, MacroTrends, MicroTrends) guarda um sketch
+HyperLogLog de cada coluna de ``DISTINCT_COLS``: ``2**precision`` registros
+de 1 byte com o maior "número de zeros à esquerda" dos hashes dos valores
+que caíram em cada registro. Sketches se unem pelo máximo registro a
+registro, então qualquer seleção de partições é respondida em
+O(partições x registros), sem tocar nas linhas. Com a precisão padrão (11)
+o erro relativo típico é de ~2,3%.
+"""
+import numpy as np
+import pandas as pd
+
+PARTITION_DIMS = ['origem', 'MacroTrends', 'MicroTrends']
+# Coluna -> nome da contagem de distintos. O vídeo é identificado pelo link:
+# ``video_id`` é um número de ordem que se repete na planilha
+DISTINCT_COLS = {'nickName': 'influenciadores', 'link': 'videos'}
+HLL_PRECISION = 11
+
+
+def _hash_codes(serie):
+    """Códigos (0 = nulo) e hash de 64 bits de cada código de ``serie``.
+
+    O hash é calculado uma vez por valor distinto, não por linha.
+    """
+    codes, valores = pd.factorize(serie, use_na_sentinel=True)
+    hashes = np.zeros(len(valores) + 1, dtype=np.uint64)
+    valores = np.asarray(valores)
+    # Números são hasheados direto; textos e categorias passam por object
+    hashes[1:] = pd.util.hash_array(valores if valores.dtype.kind in 'iufb' else valores.astype(object))
+    return codes.astype(np.int64) + 1, hashes
+
+
+def _bit_length(valores):
+    """``int.bit_length`` de cada elemento de um array ``uint64`` (exato)."""
+    alto = (valores >> np.uint64(32)).astype(np.float64)
+    baixo = (valores & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    # Até 2**32 o float64 é exato; frexp devolve o expoente = bit_length
+    return np.where(alto > 0, 32 + np.frexp(alto)[1], np.frexp(baixo)[1])
+
+
+def hll_registers(groups, hashes, n_groups, precision=HLL_PRECISION):
+    """Registros HyperLogLog (``n_groups`` x ``2**precision``, uint8) dos ``hashes``.
+
+    ``groups`` diz a qual sketch cada hash pertence.
+    """
+    m = 1 << precision
+    registro = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    resto = hashes & np.uint64((1 << (64 - precision)) - 1)
+    # Posição do primeiro bit 1 nos bits restantes (1 = bit mais alto)
+    rank = ((64 - precision) - _bit_length(resto) + 1).astype(np.uint8)
+    registros = np.zeros(n_groups * m, dtype=np.uint8)
+    np.maximum.at(registros, np.asarray(groups, dtype=np.int64) * m + registro, rank)
+    return registros.reshape(n_groups, m)
+
+
+def hll_estimate(registros):
+    """Estimativa de distintos de um sketch (registros já unidos)."""
+    m = len(registros)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimativa = alpha * m * m / np.ldexp(1.0, -registros.astype(np.int64)).sum()
+    vazios = int((registros == 0).sum())
+    # Correção para poucos valores: contagem linear dos registros vazios
+    if estimativa <= 2.5 * m and vazios:
+        estimativa = m * np.log(m / vazios)
+    return float(estimativa)
+
+
+class DistinctSketches:
+    """Sketches HyperLogLog de ``DISTINCT_COLS`` por partição de ``PARTITION_DIMS``.
+
+    Também guarda os códigos por linha de cada coluna, para a contagem exata
+    sobre uma seleção de linhas (``exact``).
+    """
+
+    def __init__(self, df, precision=HLL_PRECISION):
+        self.precision = precision
+        # Partição de cada linha: códigos das dimensões combinados num inteiro
+        combinado = np.zeros(len(df), dtype=np.int64)
+        for dim in PARTITION_DIMS:
+            dim_codes, valores = pd.factorize(df[dim])
+            combinado = combinado * (len(valores) + 1) + dim_codes + 1
+        self.row_partition = pd.factorize(combinado)[0]
+        n_partes = self.row_partition.max(initial=-1) + 1
+        primeiras = np.full(n_partes, -1, dtype=np.int64)
+        primeiras[self.row_partition[::-1]] = np.arange(len(df))[::-1]
+        self.partitions = df[PARTITION_DIMS].iloc[primeiras].reset_index(drop=True)
+        self.codes = {}
+        self.registers = {}
+        for col in DISTINCT_COLS:
+            codes, hashes = _hash_codes(df[col])
+            self.codes[col] = codes
+            validos = codes > 0
+            self.registers[col] = hll_registers(self.row_partition[validos], hashes[codes[validos]],
+                                                len(self.partitions), precision)
+
+    def partition_mask(self, filters=None):
+        """Partições que atendem ``filters`` ({dimensão de partição: valores ou None})."""
+        mask = np.ones(len(self.partitions), dtype=bool)
+        for dim, valores in (filters or {}).items():
+            if valores is not None:
+                mask &= self.partitions[dim].isin(valores).to_numpy()
+        return mask
+
+    def estimate(self, col, mask):
+        """Distintos aproximados de ``col`` na união das partições de ``mask``."""
+        if not mask.any():
+            return 0.0
+        return hll_estimate(self.registers[col][mask].max(axis=0))
+
+    def exact(self, col, rows):
+        """Distintos exatos de ``col`` nas linhas ``rows`` (nulos não contam)."""
+        presentes = np.zeros(self.codes[col].max(initial=0) + 1, dtype=bool)
+        presentes[self.codes[col][rows]] = True
+        return int(presentes[1:].sum())
@@ -0,0 +1,625 @@
+"""Ingestão da base de tendências em um snapshot colunar (Arrow IPC).
+
+O Excel é lido uma única vez pelo openpyxl e convertido para um arquivo Arrow
+tipado, acompanhado de um ``manifest.json`` com o hash do arquivo de origem.
+O app carrega esse snapshot via memory-map e só volta a ler o Excel quando o
+hash da origem muda.
+
+A origem também pode ser uma pasta ou um glob de planilhas: cada aba de cada
+arquivo é lida em paralelo num pool de processos, validada contra
+``EXPECTED_COLS`` e concatenada numa base só, com a coluna ``source``
+indicando de onde veio cada linha.
+
+Lotes novos (CSV/Parquet) entram por ``--append``: as linhas são casadas pela
+chave (``DEFAULT_KEY``), as alteradas são atualizadas na mesma
+posição, as novas vão para o fim, e o cubo de agregação gravado junto com o
+snapshot é ajustado só pelo delta do lote.
+
+Uso pela linha de comando::
+
+    python snapshot.py                      # gera/atualiza o snapshot
+    python snapshot.py --force              # força a releitura do Excel
+    python snapshot.py --source outra_base.xlsx
+    python snapshot.py --source exports/ --workers 4   # todas as planilhas da pasta
+    python snapshot.py --source "exports/2026-*.xlsx"
+    python snapshot.py --append novos.csv   # upsert de um lote pela chave
+"""
+import argparse
+import glob
+import hashlib
+import multiprocessing
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from aggregates import CUBE_DIMS, build_cube, update_cube
+
+BASE_DIR = Path(__file__).resolve().parent
+EXCEL_PATH = BASE_DIR / 'Samsung_base_reclassificada_COM_descricao.xlsx'
+# Arquivo, pasta ou glob de planilhas usado pelo app
+DEFAULT_SOURCE = os.environ.get('TRENDS_SOURCE') or EXCEL_PATH
+EXCEL_SUFFIXES = ('.xlsx', '.xlsm', '.xls')
+SNAPSHOT_DIR = BASE_DIR / '.snapshot'
+MANIFEST_FILE = 'manifest.json'
+# Muda quando o conteúdo gravado muda de formato; força a releitura do Excel
+SNAPSHOT_SCHEMA = 6
+
+# Categorias removidas na ingestão (valem também para os lotes incrementais)
+EXCLUDED_MACROS = ['Outros/Sem Categoria']
+# Chave das linhas nos lotes: na planilha ``video_id`` é um número de ordem que
+# se repete, e o mesmo link aparece em linhas com textos diferentes
+DEFAULT_KEY = ['video_id', 'link', 'Desc']
+# Tolerância relativa ao comparar floats de um lote com o snapshot
+FLOAT_RTOL = 1e-9
+
+# Colunas que toda aba precisa ter (colunas a mais são descartadas)
+EXPECTED_COLS = ['video_id', 'Tags', 'Trends', 'sumario', 'engajamento', 'viralPotential',
+                 'audienceSizes', 'socialPowers', 'mediaPowers', 'followers', 'brands',
+                 'sentimental', 'MacroTrends', 'MicroTrends', 'Desc', 'nickName', 'origem',
+                 'link', 'comentarios', 'shares', 'likes', 'Descricao Macrotrends',
+                 'Descricao Microtrends']
+SOURCE_COL = 'source'
+
+NUMERIC_COLS = ['engajamento', 'followers', 'audienceSizes', 'socialPowers',
+                'mediaPowers', 'likes', 'shares', 'comentarios']
+
+# Modo compacto: colunas de filtro viram categóricas (comparação por código)
+# e as descrições longas saem para tabelas laterais indexadas pela tendência
+CATEGORY_COLS = ['MacroTrends', 'MicroTrends', 'origem', 'nickName']
+DESCRIPTION_COLS = {'MacroTrends': 'Descricao Macrotrends',
+                    'MicroTrends': 'Descricao Microtrends'}
+# Outras colunas de texto viram categóricas se repetirem bastante
+CATEGORY_MAX_RATIO = 0.5
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _apply_types(df):
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    # Colunas de texto com valores mistos (ex.: números soltos) não viram Arrow
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def clean_frame(df):
+    """Remove as linhas em ``EXCLUDED_MACROS`` ou sem valor em alguma dimensão do cubo.
+
+    O cubo agrupa por ``CUBE_DIMS`` e descartaria essas linhas de qualquer
+    forma; tirá-las aqui mantém os totais do cubo iguais à contagem de linhas.
+    """
+    df = df[df[CUBE_DIMS].notna().all(axis=1) & ~df['MacroTrends'].isin(EXCLUDED_MACROS)]
+    return df.reset_index(drop=True)
+
+
+def resolve_sources(source):
+    """Planilhas de ``source`` (arquivo, pasta ou glob), em ordem de nome."""
+    path = Path(source)
+    if path.is_dir():
+        arquivos = [p for p in path.iterdir() if p.suffix.lower() in EXCEL_SUFFIXES]
+    elif glob.has_magic(str(source)):
+        arquivos = [Path(p) for p in glob.glob(str(source))]
+    else:
+        return [path]
+    # '~$arquivo.xlsx' é o arquivo de trava do Excel aberto
+    arquivos = sorted(p for p in arquivos if p.is_file() and not p.name.startswith('~$'))
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhuma planilha encontrada em {source}")
+    return arquivos
+
+
+def _sheet_names(path):
+    return pd.ExcelFile(path).sheet_names
+
+
+def _parse_sheet(path, sheet, label):
+    """Lê e tipa uma aba (roda nos processos do pool); devolve ``(df, tempos)``."""
+    inicio = time.perf_counter()
+    df = pd.read_excel(path, sheet_name=sheet)
+    tempos = {'file': str(Path(path).resolve()), 'sheet': sheet, 'rows': len(df), 'pid': os.getpid()}
+    if len(df.columns) == 0:
+        # Aba vazia (ex.: rascunho): não entra na base
+        return None, dict(tempos, seconds=time.perf_counter() - inicio, skipped=True)
+    faltando = [col for col in EXPECTED_COLS if col not in df.columns]
+    if faltando:
+        raise ValueError(f"{Path(path).name} [{sheet}]: colunas ausentes: {', '.join(faltando)}")
+    extras = [str(col) for col in df.columns if col not in EXPECTED_COLS]
+    df = _apply_types(df[EXPECTED_COLS].copy())
+    df[SOURCE_COL] = label
+    tempos.update(seconds=time.perf_counter() - inicio, extra_columns=extras)
+    return df, tempos
+
+
+def _run_tasks(fn, args, max_workers):
+    workers = min(max_workers or os.cpu_count() or 1, len(args))
+    if workers <= 1:
+        return [fn(*a) for a in args]
+    # spawn: não herda as threads do servidor do Streamlit
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as pool:
+        return list(pool.map(fn, *zip(*args)))
+
+
+def parse_sources(source=DEFAULT_SOURCE, max_workers=None):
+    """Lê todas as abas das planilhas de ``source`` em paralelo.
+
+    Cada aba precisa ter as colunas de ``EXPECTED_COLS``; a primeira que não
+    tiver interrompe a leitura com ``ValueError``. Devolve ``(df, tempos)``:
+    a base tipada e limpa, com a coluna ``source`` (``arquivo`` ou
+    ``arquivo:aba`` quando o arquivo tem mais de uma aba), e o tempo de
+    leitura de cada aba. ``source`` também aceita a lista de arquivos já
+    resolvida; ``max_workers=1`` lê tudo no processo atual.
+    """
+    arquivos = [Path(p) for p in source] if isinstance(source, list) else resolve_sources(source)
+    abas = _run_tasks(_sheet_names, [(path,) for path in arquivos], max_workers)
+    tarefas = [(path, sheet, path.name if len(nomes) == 1 else f'{path.name}:{sheet}')
+               for path, nomes in zip(arquivos, abas) for sheet in nomes]
+    resultados = _run_tasks(_parse_sheet, tarefas, max_workers)
+    partes = [df for df, _ in resultados if df is not None]
+    if not partes:
+        raise ValueError(f"Nenhuma aba com dados em {source}")
+    df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    return clean_frame(df), [tempos for _, tempos in resultados]
+
+
+def parse_excel(path=EXCEL_PATH):
+    """Lê o Excel, aplica a tipagem das colunas numéricas e a limpeza."""
+    return parse_sources(path, max_workers=1)[0]
+
+
+def read_batch(path):
+    """Lê um lote incremental em CSV ou Parquet com a mesma tipagem do Excel."""
+    path = Path(path)
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        df = pd.read_parquet(path)
+    elif path.suffix.lower() == '.csv':
+        # 'round_trip' devolve exatamente o float que foi escrito no CSV
+        df = pd.read_csv(path, float_precision='round_trip')
+    else:
+        raise ValueError(f"Formato de lote não suportado: {path.suffix} (use CSV ou Parquet)")
+    return _apply_types(df)
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    path = Path(snapshot_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_atomic(path, write):
+    tmp = path.with_name(path.name + '.tmp')
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_arrow(df, path):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    def write_table(tmp):
+        # Sem compressão: o arquivo precisa ser mapeável em memória sem cópia
+        with pa.OSFile(str(tmp), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    _write_atomic(path, write_table)
+
+
+def _write_files(df, cube, version, snapshot_dir):
+    """Grava snapshot e cubo com nomes por versão e devolve os nomes.
+
+    Um arquivo já mapeado por um processo do app nunca é sobrescrito: a
+    versão nova ganha arquivos novos e o manifest passa a apontar para eles.
+    """
+    snapshot_file = f'trends-{version[:12]}.arrow'
+    cube_file = f'cube-{version[:12]}.arrow'
+    _write_arrow(df, Path(snapshot_dir) / snapshot_file)
+    _write_arrow(cube.astype({dim: 'category' for dim in CUBE_DIMS}), Path(snapshot_dir) / cube_file)
+    return snapshot_file, cube_file
+
+
+def _remove_stale(manifest, snapshot_dir):
+    """Apaga os arquivos de versões anteriores (melhor esforço)."""
+    atuais = {manifest['file'], manifest.get('cube_file')}
+    for path in Path(snapshot_dir).glob('*.arrow'):
+        if path.name not in atuais:
+            try:
+                path.unlink()
+            except OSError:
+                # Ainda mapeado por outro processo (Windows); sai na próxima troca
+                pass
+
+
+def _stat_files(arquivos):
+    return [{'path': str(Path(p).resolve()), 'size': Path(p).stat().st_size,
+             'mtime': Path(p).stat().st_mtime} for p in arquivos]
+
+
+def _hash_files(arquivos):
+    """Hash de cada arquivo e o hash combinado (nome + conteúdo, na ordem)."""
+    hashes = [file_sha256(p) for p in arquivos]
+    if len(hashes) == 1:
+        return hashes, hashes[0]
+    combinado = hashlib.sha256()
+    for path, h in zip(arquivos, hashes):
+        combinado.update(f'{Path(path).name}:{h}\n'.encode())
+    return hashes, combinado.hexdigest()
+
+
+def write_snapshot(df, source, snapshot_dir=SNAPSHOT_DIR, source_hash=None, files=None):
+    """Grava ``df`` (e o cubo dele) como snapshot Arrow e devolve o manifest gerado.
+
+    ``files`` é a lista de arquivos da origem com tamanho, mtime e hash (e o
+    tempo de leitura, quando vem de ``ensure_snapshot``); sem ela, é
+    calculada a partir de ``source``.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    df = compact_dtypes(df)
+    if files is None or source_hash is None:
+        arquivos = resolve_sources(source)
+        hashes, source_hash = _hash_files(arquivos)
+        files = [dict(info, sha256=h) for info, h in zip(_stat_files(arquivos), hashes)]
+
+    snapshot_file, cube_file = _write_files(df, build_cube(df), source_hash, snapshot_dir)
+
+    manifest = {
+        'schema': SNAPSHOT_SCHEMA,
+        'source': _source_label(source),
+        'source_sha256': source_hash,
+        'files': files,
+        # Igual ao hash da origem até o primeiro lote incremental
+        'version': source_hash,
+        'file': snapshot_file,
+        'cube_file': cube_file,
+        'format': 'arrow-ipc',
+        'rows': len(df),
+        'columns': {col: str(dtype) for col, dtype in df.dtypes.items()},
+        'batches': [],
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+    _write_manifest(manifest, snapshot_dir)
+    _remove_stale(manifest, snapshot_dir)
+    return manifest
+
+
+def _write_manifest(manifest, snapshot_dir):
+    def write(tmp):
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    _write_atomic(Path(snapshot_dir) / MANIFEST_FILE, write)
+
+
+def _same_source(manifest, source, snapshot_dir):
+    return (manifest is not None
+            and manifest.get('schema') == SNAPSHOT_SCHEMA
+            and (Path(snapshot_dir) / manifest['file']).exists()
+            and manifest['source'] == _source_label(source))
+
+
+def _source_label(source):
+    # Globs ficam como foram escritos; arquivos e pastas viram caminho absoluto
+    return str(source) if glob.has_magic(str(source)) else str(Path(source).resolve())
+
+
+def _file_timings(tempos):
+    """Tempo de leitura por arquivo a partir dos tempos por aba."""
+    por_arquivo = {}
+    for item in tempos:
+        info = por_arquivo.setdefault(item['file'], {'sheets': 0, 'rows': 0, 'parse_s': 0.0})
+        info['sheets'] += 1
+        info['rows'] += item['rows']
+        info['parse_s'] += item['seconds']
+    return por_arquivo
+
+
+def ensure_snapshot(source=DEFAULT_SOURCE, snapshot_dir=SNAPSHOT_DIR, force=False, max_workers=None):
+    """Garante um snapshot atualizado para ``source`` e devolve seu manifest.
+
+    ``source`` é um Excel, uma pasta ou um glob de planilhas. Se nenhum
+    arquivo mudou de tamanho ou mtime (e nenhum entrou ou saiu), o hash é
+    dispensado; caso contrário o hash decide (um ``touch`` no Excel não força
+    uma nova leitura). Uma origem nova gera o snapshot do zero e descarta os
+    lotes incrementais anteriores.
+    """
+    manifest = read_manifest(snapshot_dir)
+    same_source = not force and _same_source(manifest, source, snapshot_dir)
+    arquivos = resolve_sources(source)
+    stats = _stat_files(arquivos)
+    anteriores = manifest['files'] if same_source else []
+    if same_source and [(f['path'], f['size'], f['mtime']) for f in anteriores] \
+            == [(f['path'], f['size'], f['mtime']) for f in stats]:
+        return manifest
+    hashes, source_hash = _hash_files(arquivos)
+    if same_source and manifest['source_sha256'] == source_hash:
+        manifest['files'] = [dict(antigo, **novo) for antigo, novo in zip(anteriores, stats)]
+        _write_manifest(manifest, snapshot_dir)
+        return manifest
+    df, tempos = parse_sources(arquivos, max_workers)
+    por_arquivo = _file_timings(tempos)
+    files = [dict(info, sha256=h, **por_arquivo.get(info['path'], {}))
+             for info, h in zip(stats, hashes)]
+    return write_snapshot(df, source, snapshot_dir, source_hash, files)
+
+
+def load_snapshot(snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """Carrega o snapshot Arrow mapeado em memória, já nos tipos compactos.
+
+    As colunas numéricas sem nulos e os códigos das categóricas são expostos
+    ao pandas sem cópia (``split_blocks``), apontando direto para as páginas
+    do arquivo.
+    """
+    manifest = manifest or read_manifest(snapshot_dir)
+    return _read_arrow(Path(snapshot_dir) / manifest['file'])
+
+
+def _read_arrow(path):
+    source = pa.memory_map(str(path), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def load_stored_cube(snapshot_dir=SNAPSHOT_DIR, manifest=None):
+    """Cubo gravado junto com o snapshot (``None`` se não houver)."""
+    manifest = manifest or read_manifest(snapshot_dir)
+    if not manifest.get('cube_file'):
+        return None
+    path = Path(snapshot_dir) / manifest['cube_file']
+    return _read_arrow(path) if path.exists() else None
+
+
+def _same_values(a, b):
+    """Máscara das linhas de ``a`` e ``b`` (mesmas colunas) com valores iguais.
+
+    Floats são comparados com tolerância relativa ``FLOAT_RTOL``: um valor
+    que passou por texto (CSV, Excel) pode voltar com o último dígito
+    diferente sem ter mudado.
+    """
+    iguais = np.ones(len(a), dtype=bool)
+    for col in a.columns:
+        x, y = a[col].reset_index(drop=True), b[col].reset_index(drop=True)
+        if x.dtype.kind == 'f' and y.dtype.kind == 'f':
+            iguais &= np.isclose(x.to_numpy(), y.to_numpy(), rtol=FLOAT_RTOL, atol=0, equal_nan=True)
+        else:
+            iguais &= (x.eq(y) | (x.isna() & y.isna())).to_numpy()
+    return iguais
+
+
+def _widen_dtypes(df, batch):
+    """``df`` com tipos que comportam os valores de ``batch``.
+
+    Valores novos entram como categorias novas e os inteiros compactos
+    voltam a int64; a gravação compacta de novo. Floats ficam no tipo do
+    snapshot, e o lote é comparado nessa precisão.
+    """
+    tipos = {}
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            novos = pd.Index(batch[col].dropna().unique()).difference(serie.cat.categories)
+            if len(novos):
+                tipos[col] = pd.CategoricalDtype(serie.cat.categories.append(novos.astype(serie.cat.categories.dtype)))
+        elif serie.dtype.kind in 'iu' and serie.dtype != np.int64:
+            tipos[col] = 'int64'
+    return df.astype(tipos) if tipos else df
+
+
+def upsert_batch(df, batch, key=DEFAULT_KEY, source=None):
+    """Aplica o lote ``batch`` sobre ``df`` casando as linhas pela ``key``.
+
+    Linhas iguais às do snapshot são ignoradas, linhas com a chave já
+    existente e algum valor diferente são atualizadas na mesma posição e as
+    demais entram no fim. Dentro do lote vale a última ocorrência da chave;
+    colunas ausentes do lote mantêm o valor do snapshot nas atualizadas e
+    ficam vazias nas novas (exceto ``source``, que recebe ``source`` se dado).
+
+    Devolve ``(df_novo, relatorio, added_rows, removed)``: ``added_rows`` são
+    as posições das linhas novas ou atualizadas em ``df_novo`` e ``removed``
+    a versão anterior das atualizadas (posição na coluna ``_row``), que é o
+    que ``aggregates.update_cube`` precisa para o delta.
+    """
+    key = list(key)
+    faltando = [col for col in dict.fromkeys(key + CATEGORY_COLS) if col not in batch.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no lote: {', '.join(faltando)}")
+    recebidas = len(batch)
+    colunas = [col for col in df.columns if col in batch.columns]
+    batch = clean_frame(batch).drop_duplicates(key, keep='last')
+    batch = batch.reindex(columns=df.columns)
+    df = _widen_dtypes(df, batch)
+    for col in df.columns:
+        try:
+            batch[col] = batch[col].astype(df[col].dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Coluna '{col}' do lote incompatível com o snapshot: {e}") from e
+
+    chaves = pd.MultiIndex.from_frame(df[key])
+    chaves_lote = pd.MultiIndex.from_frame(batch[key])
+    repetidas = chaves.duplicated(keep=False)
+    ambiguas = chaves_lote.isin(chaves[repetidas])
+    if ambiguas.any():
+        raise ValueError(f"{int(ambiguas.sum())} chave(s) do lote aparecem mais de uma vez "
+                         f"no snapshot; escolha uma chave única (--key)")
+    unicas = np.flatnonzero(~repetidas)
+    achadas = chaves[unicas].get_indexer(chaves_lote)
+
+    existe = achadas >= 0
+    posicoes = unicas[achadas[existe]]
+    iguais = _same_values(df.iloc[posicoes][colunas], batch[existe][colunas])
+    atualizar = posicoes[~iguais]
+    novas = batch[~existe]
+    if source is not None and SOURCE_COL in df.columns and SOURCE_COL not in colunas:
+        novas = novas.assign(**{SOURCE_COL: source})
+
+    removed = df.iloc[atualizar].assign(_row=atualizar)
+    df_novo = df.copy(deep=False)
+    if len(atualizar):
+        alteradas = batch[existe][~iguais]
+        for col in colunas:
+            df_novo.iloc[atualizar, df.columns.get_loc(col)] = alteradas[col].to_numpy()
+    if len(novas):
+        df_novo = pd.concat([df_novo, novas], ignore_index=True)
+    added_rows = np.concatenate([atualizar, np.arange(len(df), len(df_novo))])
+
+    relatorio = {
+        'received': recebidas,
+        'added': len(novas),
+        'updated': len(atualizar),
+        'skipped': recebidas - len(novas) - len(atualizar),
+    }
+    return df_novo, relatorio, added_rows, removed
+
+
+def append_batch(path, key=DEFAULT_KEY, snapshot_dir=SNAPSHOT_DIR):
+    """Faz o upsert do lote em ``path`` no snapshot atual e devolve o relatório.
+
+    O cubo gravado é atualizado pelo delta do lote; o Excel não é relido e
+    o histórico não é reagregado. Sem mudanças, nada é regravado.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None or manifest.get('schema') != SNAPSHOT_SCHEMA:
+        raise RuntimeError("Snapshot inexistente ou desatualizado; rode `python snapshot.py` antes.")
+    df = load_snapshot(snapshot_dir, manifest)
+    cube = load_stored_cube(snapshot_dir, manifest)
+    if cube is None:
+        cube = build_cube(df)
+
+    df_novo, relatorio, added_rows, removed = upsert_batch(df, read_batch(path), key, source=Path(path).name)
+    if not relatorio['added'] and not relatorio['updated']:
+        return manifest, relatorio
+    df_novo = compact_dtypes(df_novo)
+    cube = update_cube(cube, df_novo, added_rows, removed)
+
+    batch_hash = file_sha256(path)
+    version = hashlib.sha256((manifest['version'] + batch_hash).encode()).hexdigest()
+    snapshot_file, cube_file = _write_files(df_novo, cube, version, snapshot_dir)
+    manifest = dict(
+        manifest,
+        version=version,
+        file=snapshot_file,
+        cube_file=cube_file,
+        rows=len(df_novo),
+        batches=manifest['batches'] + [{
+            'file': str(Path(path).resolve()),
+            'sha256': batch_hash,
+            'key': key,
+            **relatorio,
+            'applied_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }],
+    )
+    _write_manifest(manifest, snapshot_dir)
+    _remove_stale(manifest, snapshot_dir)
+    return manifest, relatorio
+
+
+def _is_repetitive_text(serie):
+    return (pd.api.types.is_string_dtype(serie)
+            and serie.nunique() <= CATEGORY_MAX_RATIO * len(serie))
+
+
+def compact_dtypes(df):
+    """``df`` com os tipos compactos em que o snapshot é gravado.
+
+    Colunas de filtro, descrições e textos repetitivos viram categóricas
+    (dicionário no Arrow); ``NUMERIC_COLS`` vão para o menor inteiro que
+    comporta os valores, ou float32. Colunas já categóricas ficam como estão.
+    """
+    compacto = {}
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            pass
+        elif col in NUMERIC_COLS:
+            # A tentativa de int32 em floats fora da faixa só gera aviso do numpy
+            with np.errstate(invalid='ignore'):
+                serie = pd.to_numeric(serie, downcast='integer')
+            if serie.dtype.kind == 'f':
+                serie = serie.astype('float32')
+        elif (col in CATEGORY_COLS or col in DESCRIPTION_COLS.values()
+              or _is_repetitive_text(serie)):
+            serie = serie.astype('category')
+        compacto[col] = serie
+    return pd.DataFrame(compacto, index=df.index)
+
+
+def split_descriptions(df):
+    """Tira as descrições de ``df`` para tabelas laterais indexadas pela tendência.
+
+    Devolve ``(df_sem_descricoes, descricoes)``, onde ``descricoes`` mapeia
+    ``'MacroTrends'``/``'MicroTrends'`` para uma Series ``tendência -> descrição``
+    (primeira descrição não vazia de cada tendência).
+    """
+    descricoes = {}
+    for key, desc_col in DESCRIPTION_COLS.items():
+        if desc_col not in df.columns:
+            continue
+        tabela = df[[key, desc_col]].dropna().drop_duplicates(key).astype(object)
+        descricoes[key] = tabela.set_index(key)[desc_col]
+        df = df.drop(columns=desc_col)
+    return df, descricoes
+
+
+def compact_frame(df):
+    """Versão compacta de ``df`` para manter em memória no app (a mesma gravada
+    no snapshot), como ``(df_compacto, descricoes)`` (ver ``split_descriptions``)."""
+    return split_descriptions(compact_dtypes(df))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o snapshot colunar da base de tendências.")
+    parser.add_argument('--source', default=str(DEFAULT_SOURCE),
+                        help="Excel de origem, pasta ou glob de planilhas")
+    parser.add_argument('--snapshot-dir', default=str(SNAPSHOT_DIR), help="Pasta de saída do snapshot")
+    parser.add_argument('--force', action='store_true', help="Relê o Excel mesmo sem mudança de hash")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos na leitura das planilhas (padrão: um por núcleo)")
+    parser.add_argument('--append', metavar='ARQUIVO', help="Lote CSV/Parquet para upsert no snapshot")
+    parser.add_argument('--key', nargs='+', default=DEFAULT_KEY, help="Coluna(s) que identificam a linha no lote")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.append:
+        ensure_snapshot(args.source, args.snapshot_dir, max_workers=args.workers)
+        try:
+            manifest, relatorio = append_batch(args.append, args.key, args.snapshot_dir)
+        except (OSError, RuntimeError, ValueError) as e:
+            # Lote inválido (chave repetida, colunas ou formato): o snapshot não muda
+            print(f"Lote {Path(args.append).name} não aplicado: {e}", file=sys.stderr)
+            return 1
+        print(f"Lote {Path(args.append).name}: {relatorio['added']} novas | "
+              f"{relatorio['updated']} atualizadas | {relatorio['skipped']} ignoradas | "
+              f"{time.perf_counter() - inicio:.2f}s -> versão {manifest['version'][:12]}")
+        return 0
+    manifest = ensure_snapshot(args.source, args.snapshot_dir, force=args.force, max_workers=args.workers)
+    # Tempo de leitura de cada arquivo na geração do snapshot
+    for info in manifest['files']:
+        if 'parse_s' in info:
+            print(f"  {Path(info['path']).name}: {info['sheets']} aba(s) | "
+                  f"{info['rows']} linhas | {info['parse_s']:.2f}s")
+    print(f"Snapshot {manifest['version'][:12]} | {manifest['rows']} linhas | "
+          f"{time.perf_counter() - inicio:.2f}s -> {Path(args.snapshot_dir) / manifest['file']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Fixtures dos testes: uma base sintética pequena com o esquema do Excel e o
+``Dataset`` montado a partir dela pelo mesmo caminho do app (snapshot Arrow →
+``engine.load_dataset``)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import engine  # noqa: E402
+from snapshot import clean_frame, write_snapshot  # noqa: E402
+
+ORIGENS = [' Tiktok ', ' Youtube ', ' Instagram ']
+SENTIMENTOS = [' positivo ', 'Positivo', ' neutro ', ' negativo ', None]
+TAGS = ['câmera', 'Câmera ', 'bateria', 'tela', '"tela, curva"', 'durabilidade', 'Galaxy', '5G']
+
+
+def make_frame(n_rows=2000, seed=1):
+    """Base sintética de ``n_rows`` vídeos com as colunas (e as grafias irregulares) do Excel."""
+    rng = np.random.default_rng(seed)
+    n_influencers = max(50, n_rows // 5)
+    macro = rng.integers(0, 8, n_rows)
+    micro = macro * 4 + rng.integers(0, 4, n_rows)
+    # Poucos influenciadores concentram os vídeos; vários têm um vídeo só
+    influencer = rng.zipf(1.3, n_rows) % n_influencers
+    origem_influencer = rng.integers(0, len(ORIGENS), n_influencers)
+    followers_influencer = rng.lognormal(11, 2, n_influencers).astype(np.int64)
+    engajamento = rng.lognormal(9, 2, n_rows).astype(np.int64)
+    texto = rng.integers(0, max(n_rows // 2, 1), n_rows)
+    tags = [', '.join(rng.choice(TAGS, rng.integers(0, 4), replace=False)) or None for _ in range(n_rows)]
+    return pd.DataFrame({
+        'video_id': np.arange(n_rows, dtype=np.int64),
+        'Tags': tags,
+        'Trends': [f'trend {t % 30}, Trend {(t + 1) % 30} ' for t in texto],
+        'sumario': [f'Resumo sintético {t}' for t in texto],
+        'engajamento': engajamento,
+        'viralPotential': rng.lognormal(9, 1.5, n_rows),
+        'audienceSizes': (followers_influencer[influencer] * 1.2).astype(np.int64),
+        'socialPowers': engajamento / np.maximum(followers_influencer[influencer], 1),
+        'mediaPowers': rng.lognormal(13, 2, n_rows),
+        'followers': followers_influencer[influencer],
+        'brands': [f'Marca {b}' if b % 5 else f' marca {b} ' for b in rng.integers(0, 20, n_rows)],
+        'sentimental': np.array(SENTIMENTOS, dtype=object)[rng.integers(0, len(SENTIMENTOS), n_rows)],
+        'MacroTrends': [f'MacroTrend {m + 1:02d}' for m in macro],
+        'MicroTrends': [f'MicroTrend {m // 4 + 1:02d}.{m % 4 + 1}' for m in micro],
+        'Desc': [f'Texto sintético {t}' for t in texto],
+        'nickName': [f' perfil_{i} ' for i in influencer],
+        'origem': np.array(ORIGENS, dtype=object)[origem_influencer[influencer]],
+        'link': [f'https://example.com/video/{i}' for i in range(n_rows)],
+        'comentarios': (engajamento * rng.uniform(0, 0.05, n_rows)).astype(np.int64),
+        'shares': (engajamento * rng.uniform(0, 0.1, n_rows)).astype(np.int64),
+        'likes': (engajamento * rng.uniform(0, 0.2, n_rows)).astype(np.int64),
+        'Descricao Macrotrends': [f'Descrição da MacroTrend {m + 1:02d}' for m in macro],
+        'Descricao Microtrends': [f'Descrição da MicroTrend {m // 4 + 1:02d}.{m % 4 + 1}' for m in micro],
+    })
+
+
+def make_snapshot(df, snapshot_dir):
+    """Grava ``df`` como snapshot em ``snapshot_dir`` e devolve a pasta."""
+    write_snapshot(clean_frame(df), 'sintetico', snapshot_dir, source_hash='teste', files=[])
+    return snapshot_dir
+
+
+@pytest.fixture(scope='session')
+def raw_frame():
+    return make_frame()
+
+
+@pytest.fixture(scope='session')
+def snapshot_dir(raw_frame, tmp_path_factory):
+    return make_snapshot(raw_frame, tmp_path_factory.mktemp('snapshot'))
+
+
+@pytest.fixture(scope='session')
+def dataset(snapshot_dir):
+    return engine.load_dataset(snapshot_dir)
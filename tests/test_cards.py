@@ -0,0 +1,37 @@
+"""Cards HTML montados coluna a coluna (cards.py) contra a formatação por linha."""
+import pandas as pd
+
+from cards import format_nums, influencer_cards_html, macro_cards_html
+
+
+def format_num(num):
+    # Formatação original do app, valor a valor
+    if num >= 1_000_000: return f"{num/1_000_000:.1f}M"
+    if num >= 1_000: return f"{num/1_000:.1f}K"
+    return f"{int(num)}"
+
+
+def test_format_nums_matches_scalar():
+    valores = [0, 7, 999, 1000, 1234, 999_999, 1_000_000, 2_345_678, 12.7]
+    assert list(format_nums(valores)) == [format_num(v) for v in valores]
+
+
+def test_macro_cards():
+    macros = pd.DataFrame({'MacroTrends': ['Câmera', 'Bateria'], 'engajamento': [1_500_000, 900],
+                           'Descricao Macrotrends': ['Fotos', None]})
+    html = macro_cards_html(macros)
+    assert html.count('class="macro-card"') == 2
+    assert '<h4>Câmera</h4><span class="macro-badge">1.5M views</span></div><p>Fotos</p>' in html
+    assert '900 views</span></div><p>nan</p>' in html
+    assert macro_cards_html(macros.iloc[:0]) == ''
+
+
+def test_influencer_cards():
+    ranking = pd.DataFrame({'link': ['https://x/1'], 'engajamento': [2500], 'followers_max': [10],
+                            'audienceSizes': [3_000_000], 'videos': [4], 'Desc': ['d' * 400]},
+                           index=pd.Index([' perfil_1 '], name='nickName'))
+    html = influencer_cards_html(ranking)
+    assert html.count('class="influencer-card"') == 1
+    assert '<b>2.5K</b>' in html and '<b>3.0M</b>' in html and '<b>4</b>' in html
+    assert 'd' * 300 + '...' in html and 'd' * 301 not in html
+    assert influencer_cards_html(ranking.iloc[:0]) == ''
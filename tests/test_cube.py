@@ -0,0 +1,35 @@
+"""Cubo de agregação (aggregates.build_cube / rollup) contra groupby nas linhas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from aggregates import CUBE_DIMS, build_cube, rollup
+from conftest import make_snapshot
+
+
+@pytest.mark.parametrize('by', CUBE_DIMS)
+def test_rollup_matches_groupby(dataset, by):
+    esperado = dataset.df.groupby(by, observed=True).agg(
+        videos=('video_id', 'count'), engajamento=('engajamento', 'sum'),
+        followers_max=('followers', 'max'))
+    resultado = rollup(dataset.cube, by, None, ['videos', 'engajamento', 'followers_max'])
+    pd.testing.assert_frame_equal(resultado.sort_index(), esperado.sort_index(), check_dtype=False)
+
+
+def test_first_row_is_first_video(dataset):
+    cube = build_cube(dataset.df)
+    primeiras = dataset.df.reset_index(drop=True).groupby(CUBE_DIMS, observed=True).cumcount() == 0
+    assert sorted(cube['first_row']) == list(np.flatnonzero(primeiras))
+
+
+def test_rows_without_dimension_are_dropped(raw_frame, tmp_path):
+    df = raw_frame.copy()
+    df.loc[[0, 1], 'nickName'] = np.nan
+    df.loc[2, 'origem'] = np.nan
+    df.loc[3, 'MicroTrends'] = np.nan
+    ds = engine.load_dataset(make_snapshot(df, tmp_path))
+    assert len(ds.df) == len(df) - 4
+    assert engine.kpis(ds)['videos'] == len(ds.df)
+    filtros = {'origem': [ds.df['origem'].iloc[0]]}
+    assert 0 < engine.kpis(ds, filtros)['videos'] == len(engine.select_rows(ds, filtros))
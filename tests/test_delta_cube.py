@@ -0,0 +1,78 @@
+"""Atualização do cubo por delta (aggregates.update_cube) contra a reconstrução completa."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import CUBE_DIMS, build_cube, update_cube
+from snapshot import load_snapshot, upsert_batch
+
+
+def _sorted(cube):
+    cube = cube.astype({dim: str for dim in CUBE_DIMS})
+    return cube.sort_values(CUBE_DIMS).reset_index(drop=True)
+
+
+def assert_same_cube(cube, df):
+    pd.testing.assert_frame_equal(_sorted(cube), _sorted(build_cube(df)), check_dtype=False)
+
+
+@pytest.fixture
+def frame(snapshot_dir):
+    return load_snapshot(snapshot_dir)
+
+
+def _upsert(df, batch):
+    df_novo, relatorio, added_rows, removed = upsert_batch(df, batch)
+    return df_novo, relatorio, update_cube(build_cube(df), df_novo, added_rows, removed)
+
+
+def _group_rows(frame, n_min):
+    """Posições das linhas de uma célula do cubo com pelo menos ``n_min`` linhas."""
+    chaves = frame[CUBE_DIMS].astype(str).agg('|'.join, axis=1)
+    contagem = chaves.value_counts()
+    return np.flatnonzero(chaves == contagem.index[contagem.to_numpy() >= n_min][0])
+
+
+def test_unsorted_update_to_new_group(frame):
+    # As duas primeiras linhas de uma célula, fora de ordem no lote, movidas
+    # para um influenciador novo: a primeira linha da célula passa a ser a terceira
+    primeira, segunda = _group_rows(frame, 3)[:2]
+    batch = frame.iloc[[segunda, primeira]].copy()
+    batch['nickName'] = 'perfil_novo'
+    df_novo, relatorio, cube = _upsert(frame, batch)
+    assert relatorio['updated'] == 2
+    assert_same_cube(cube, df_novo)
+
+
+def test_random_upsert(frame):
+    rng = np.random.default_rng(3)
+    atualizadas = frame.iloc[rng.permutation(len(frame))[:200]].copy()
+    atualizadas['engajamento'] = atualizadas['engajamento'] * 2
+    atualizadas.loc[atualizadas.index[::3], 'MicroTrends'] = frame['MicroTrends'].iloc[0]
+    # Fora da faixa do tipo compacto do snapshot, como pode vir num lote
+    atualizadas['followers'] = atualizadas['followers'].astype('int64')
+    atualizadas.loc[atualizadas.index[::5], 'followers'] = 10 ** 12
+    novas = frame.iloc[rng.permutation(len(frame))[:50]].copy()
+    novas['video_id'] = np.arange(len(novas)) + 10 ** 9
+    batch = pd.concat([novas, atualizadas])
+    df_novo, relatorio, cube = _upsert(frame, batch)
+    assert relatorio['added'] == 50 and relatorio['updated'] == 200
+    assert_same_cube(cube, df_novo)
+
+
+def test_single_row_group_removed(frame):
+    # Um grupo de uma linha só some do cubo quando a linha muda de grupo
+    chaves = frame[CUBE_DIMS].astype(str).agg('|'.join, axis=1)
+    contagem = chaves.value_counts()
+    posicao = int(np.flatnonzero(chaves == contagem.index[contagem.to_numpy() == 1][0])[0])
+    batch = frame.iloc[[posicao]].copy()
+    batch['nickName'] = 'perfil_novo'
+    df_novo, _, cube = _upsert(frame, batch)
+    assert len(cube) == len(build_cube(frame))
+    assert_same_cube(cube, df_novo)
+
+
+def test_empty_batch(frame):
+    df_novo, relatorio, cube = _upsert(frame, frame.iloc[:0])
+    assert relatorio['added'] == relatorio['updated'] == 0
+    assert_same_cube(cube, df_novo)
@@ -0,0 +1,79 @@
+"""Drill-down da página 1 (drill.DrillPath) contra filtros nas linhas, e o
+caminho percorrido no app (streamlit.testing)."""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import engine
+from drill import DrillPath
+from snapshot import EXCEL_PATH
+
+APP = Path(__file__).resolve().parent.parent / 'app.py'
+
+
+def test_levels_match_row_filters(dataset):
+    df = dataset.df
+    macro = df['MacroTrends'].iloc[0]
+    micro = df.loc[df['MacroTrends'] == macro, 'MicroTrends'].iloc[0]
+    caminho = engine.drill_path(dataset, None, (('MacroTrends', macro), ('MicroTrends', micro)))
+    assert caminho.depth == 2 and caminho.dim == 'nickName'
+    linhas = df[(df['MacroTrends'] == macro) & (df['MicroTrends'] == micro)]
+    esperado = linhas.groupby('nickName', observed=True)['engajamento'].sum()
+    resultado = caminho.rollup('nickName')['engajamento']
+    np.testing.assert_allclose(resultado.sort_index(), esperado.sort_index())
+    caminho.up()
+    assert caminho.path == (('MacroTrends', macro),) and caminho.dim == 'MicroTrends'
+
+
+def test_path_is_replayed_on_a_new_root(dataset):
+    # A sessão guarda só o caminho: passos inválidos na raiz nova são ignorados
+    macro = dataset.df['MacroTrends'].iloc[0]
+    caminho = engine.drill_path(dataset, None, (('MacroTrends', macro), ('MicroTrends', 'inexistente')))
+    assert caminho.path == (('MacroTrends', macro),)
+    assert not caminho.drill('MacroTrends', macro)
+    assert engine.drill_path(dataset, {'MacroTrends': []}, caminho.path).depth == 0
+
+
+def test_rollups_are_requested_by_selection(dataset):
+    # Cada nível pede seu roll-up pelos filtros do caminho, o que permite guardá-lo num cache
+    pedidos = {}
+
+    def rollup(filtros, by):
+        chave = (tuple(sorted((dim, tuple(v)) for dim, v in filtros.items())), by)
+        if chave not in pedidos:
+            pedidos[chave] = engine.drill_rollup(dataset, filtros, by)
+        return pedidos[chave]
+
+    macro = dataset.df['MacroTrends'].iloc[0]
+    caminho = DrillPath(rollup, (('MacroTrends', macro),))
+    DrillPath(rollup, caminho.path).rollup('MicroTrends')
+    assert set(pedidos) == {((), 'MacroTrends'), ((('MacroTrends', (macro,)),), 'MicroTrends')}
+
+
+@pytest.mark.skipif(not EXCEL_PATH.exists(), reason='planilha do app ausente')
+def test_app_walks_down_and_up():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=120).run()
+
+    def descer():
+        caixa = at.selectbox(key=f'p1_drill_sel_{len(at.session_state["p1_drill"][1])}')
+        caixa.set_value(caixa.options[0]).run()
+        assert not at.exception
+        return at.session_state['p1_drill'][1]
+
+    assert not at.exception and at.session_state['p1_drill'][1] == ()
+    caminho = descer()
+    assert [dim for dim, _ in caminho] == ['MacroTrends']
+    caminho = descer()
+    assert [dim for dim, _ in caminho] == ['MacroTrends', 'MicroTrends']
+    caminho = descer()
+    assert [dim for dim, _ in caminho] == ['MacroTrends', 'MicroTrends', 'nickName']
+    assert 'Influenciador Selecionado' in [s.value for s in at.subheader]
+    # O caminho de botões volta um nível e depois ao início
+    at.button(key='p1_drill_2').click().run()
+    assert at.session_state['p1_drill'][1] == caminho[:2]
+    at.button(key='p1_drill_0').click().run()
+    assert at.session_state['p1_drill'][1] == ()
+    assert at.selectbox(key='p1_drill_sel_0').value is None
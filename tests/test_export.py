@@ -0,0 +1,52 @@
+"""Exportação de relatórios estáticos (export.export_reports) e o reaproveitamento
+de uma exportação sem mudanças."""
+import json
+
+import pytest
+
+import export
+
+
+@pytest.fixture
+def presets():
+    return [{'name': 'geral', 'title': 'Visão geral', 'filters': {}},
+            {'name': 'macro', 'filters': {'MacroTrends': ['MacroTrend 01']}}]
+
+
+def _export(snapshot_dir, out_dir, presets, **kwargs):
+    return export.export_reports(presets, out_dir, snapshot_dir, max_workers=1, plotlyjs='cdn', **kwargs)
+
+
+def test_export_and_skip(snapshot_dir, tmp_path, presets):
+    manifest = _export(snapshot_dir, tmp_path, presets)
+    assert not manifest['skipped']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['export.json', 'geral.html', 'index.html', 'macro.html']
+    assert 'Visão geral' in (tmp_path / 'index.html').read_text(encoding='utf-8')
+
+    # Mesma versão e mesmos presets: nada é regerado
+    geral = (tmp_path / 'geral.html').stat().st_mtime_ns
+    assert _export(snapshot_dir, tmp_path, presets)['skipped']
+    assert (tmp_path / 'geral.html').stat().st_mtime_ns == geral
+    assert not _export(snapshot_dir, tmp_path, presets, force=True)['skipped']
+
+
+def test_changes_regenerate(snapshot_dir, tmp_path, presets):
+    _export(snapshot_dir, tmp_path, presets)
+    # Arquivo apagado ou presets diferentes regeram; relatórios de presets removidos saem
+    (tmp_path / 'macro.html').unlink()
+    assert not _export(snapshot_dir, tmp_path, presets)['skipped']
+    manifest = _export(snapshot_dir, tmp_path, presets[:1])
+    assert not manifest['skipped'] and [r['name'] for r in manifest['reports']] == ['geral']
+    assert not (tmp_path / 'macro.html').exists()
+    assert json.loads((tmp_path / export.EXPORT_MANIFEST).read_text(encoding='utf-8'))['reports'][0]['file'] == 'geral.html'
+
+
+def test_load_presets(tmp_path):
+    assert export.load_presets() == export.DEFAULT_PRESETS
+    path = tmp_path / 'presets.json'
+    path.write_text(json.dumps([{'name': 'ok', 'filters': {'origem': 'Tiktok'}}]), encoding='utf-8')
+    assert export.preset_filters(export.load_presets(path)[0]) == {'origem': ['Tiktok']}
+    for invalido in ([{'name': '../fora'}], [{'name': 'a'}, {'name': 'a'}], [{'name': 'b', 'filters': {'x': 1}}]):
+        path.write_text(json.dumps(invalido), encoding='utf-8')
+        with pytest.raises(ValueError):
+            export.load_presets(path)
@@ -0,0 +1,89 @@
+"""Facetas (indexes.FacetIndex / engine.facet_counts) contra explode + groupby no pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from indexes import FACET_COLS, FacetIndex, split_values
+
+
+def _pairs(df, col):
+    """Pares (linha, valor normalizado) de ``col``, um por linha e valor."""
+    valores = df[col].astype(object).map(lambda t: split_values(t, FACET_COLS[col]))
+    pares = valores.explode().dropna().rename('valor').rename_axis('linha').reset_index()
+    pares['chave'] = pares['valor'].map(lambda v: ' '.join(v.split()).casefold())
+    return pares.drop_duplicates(['linha', 'chave'])
+
+
+def _counts(df, col, rows=None):
+    pares = _pairs(df, col)
+    if rows is not None:
+        pares = pares[pares['linha'].isin(rows)]
+    return pares.groupby('chave').size()
+
+
+def _keys(serie):
+    return serie.set_axis([' '.join(v.split()).casefold() for v in serie.index])
+
+
+def test_split_values():
+    assert split_values(' smartphone,"durabilidade","tela de 6,75 pol" ') == \
+        ['smartphone', 'durabilidade', 'tela de 6,75 pol']
+    assert split_values('Samsung.', multi=False) == ['Samsung']
+    assert split_values(np.nan) == []
+
+
+def test_spellings_are_merged():
+    df = pd.DataFrame({
+        'Tags': ['Câmera, bateria', ' câmera ,Bateria,bateria', None, '"tela, curva"'],
+        'brands': ['Samsung', 'samsung ', 'SAMSUNG', 'Apple'],
+    })
+    facets = FacetIndex(df)
+    assert facets.columns == ['Tags', 'brands']
+    contagem = facets.counts('Tags')
+    assert contagem.to_dict() == {'bateria': 2, 'Câmera': 2, 'tela, curva': 1}
+    assert facets.counts('brands').to_dict() == {'Samsung': 3, 'Apple': 1}
+    np.testing.assert_array_equal(facets.postings('brands', 'samsung'), [0, 1, 2])
+    np.testing.assert_array_equal(facets.select({'Tags': ['BATERIA'], 'brands': ['Samsung']}), [0, 1])
+    np.testing.assert_array_equal(facets.row_values('brands') >= 0, [True] * 4)
+
+
+@pytest.mark.parametrize('col', list(FACET_COLS))
+def test_counts_match_pandas(dataset, col):
+    df = dataset.df
+    pd.testing.assert_series_equal(_keys(engine.facet_counts(dataset, col)).sort_index(),
+                                   _counts(df, col).sort_index(), check_names=False, check_dtype=False)
+    filtros = {'MacroTrends': [df['MacroTrends'].iloc[0]]}
+    rows = np.flatnonzero(df['MacroTrends'].isin(filtros['MacroTrends']))
+    pd.testing.assert_series_equal(_keys(engine.facet_counts(dataset, col, filtros)).sort_index(),
+                                   _counts(df, col, rows).sort_index(), check_names=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('col', list(FACET_COLS))
+def test_select_matches_pandas(dataset, col):
+    pares = _pairs(dataset.df, col)
+    for valor in pares['valor'].unique()[:10]:
+        chave = ' '.join(valor.split()).casefold()
+        esperado = np.sort(pares.loc[pares['chave'] == chave, 'linha'].to_numpy())
+        np.testing.assert_array_equal(engine.select_rows(dataset, {col: [valor]}), esperado)
+        np.testing.assert_array_equal(dataset.facets.postings(col, valor), esperado)
+
+
+def test_top_facets_match_pandas(dataset):
+    df = dataset.df
+    top = engine.top_facets(dataset, 'brands', None, 'MicroTrends', k=3, n=5)
+    pares = _pairs(df, 'brands')
+    pares['MicroTrends'] = df['MicroTrends'].to_numpy()[pares['linha']]
+    grupos = df['MicroTrends'].value_counts()
+    for micro, linhas in top.groupby('MicroTrends', observed=True, sort=False):
+        esperado = pares[pares['MicroTrends'] == micro].groupby('chave').size().nlargest(3, keep='all')
+        assert list(linhas['videos']) == list(esperado.to_numpy()[:len(linhas)])
+        np.testing.assert_allclose(linhas['percentual'], (linhas['videos'] / grupos[micro] * 100).round(1))
+    assert top['MicroTrends'].nunique() == 5
+
+
+def test_empty_selection(dataset):
+    assert engine.facet_counts(dataset, 'Tags', {'MicroTrends': []}).empty
+    assert engine.top_facets(dataset, 'Tags', {'MicroTrends': []}).empty
+    assert engine.sentiment_split(dataset, {'MicroTrends': []}).empty
+    assert len(engine.select_rows(dataset, {'brands': ['inexistente']})) == 0
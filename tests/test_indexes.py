@@ -0,0 +1,64 @@
+"""Índice de filtros (indexes.FilterIndex) contra máscaras do pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from indexes import INDEX_COLS, FilterIndex
+from snapshot import compact_frame
+
+
+@pytest.fixture(scope='module')
+def frame(raw_frame):
+    return compact_frame(raw_frame)[0]
+
+
+@pytest.fixture(scope='module')
+def index(frame):
+    return FilterIndex(frame)
+
+
+def _mask(df, filters):
+    mask = np.ones(len(df), dtype=bool)
+    for col, valores in filters.items():
+        if valores is not None:
+            mask &= df[col].isin(valores).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize('col', INDEX_COLS)
+def test_postings_match_pandas(frame, index, col):
+    for valor in frame[col].unique()[:20]:
+        np.testing.assert_array_equal(index.postings(col, valor), np.flatnonzero(frame[col] == valor))
+    assert len(index.postings(col, 'inexistente')) == 0
+
+
+def test_select_matches_pandas(frame, index):
+    df = frame
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        filtros = {col: list(rng.choice(df[col].unique(), rng.integers(1, 4), replace=False))
+                   if rng.random() < 0.6 else None for col in INDEX_COLS}
+        np.testing.assert_array_equal(index.select(filtros), _mask(df, filtros))
+
+
+def test_select_edge_cases(frame, index):
+    df = frame
+    np.testing.assert_array_equal(index.select({}), np.arange(len(df)))
+    np.testing.assert_array_equal(index.select({'origem': None}), np.arange(len(df)))
+    assert len(index.select({'MicroTrends': []})) == 0
+    assert len(index.select({'nickName': ['inexistente']})) == 0
+    # Refinando uma seleção anterior
+    origem = df['origem'].iloc[0]
+    macro = df['MacroTrends'].iloc[0]
+    rows = index.select({'origem': [origem]})
+    np.testing.assert_array_equal(index.select({'MacroTrends': [macro]}, rows),
+                                  _mask(df, {'origem': [origem], 'MacroTrends': [macro]}))
+
+
+def test_single_row_value_and_nulls():
+    df = pd.DataFrame({'origem': ['a', 'b', None, 'a'], 'MacroTrends': ['x', 'x', 'y', None]})
+    index = FilterIndex(df, ['origem', 'MacroTrends'])
+    np.testing.assert_array_equal(index.postings('origem', 'b'), [1])
+    np.testing.assert_array_equal(index.select({'origem': ['a'], 'MacroTrends': ['x']}), [0])
+    assert index.options('origem') == ['a', 'b']
+    assert index.options('MacroTrends', np.array([2, 3])) == ['y']
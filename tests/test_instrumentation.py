@@ -0,0 +1,47 @@
+"""Métricas por etapa do rerun (instrumentation.StageMetrics / RerunTimer)."""
+import json
+
+import numpy as np
+import pytest
+
+from instrumentation import PERCENTILES, RerunTimer, StageMetrics
+
+
+def test_percentiles_over_window():
+    metrics = StageMetrics(window=100)
+    for i in range(150):
+        metrics.record('p1.agregados', i / 1000, peak_bytes=i)
+    item = metrics.summary()['p1.agregados']
+    janela = np.arange(50, 150) / 1000
+    assert item['count'] == 150 and item['window'] == 100
+    assert item['sum_s'] == pytest.approx(sum(range(150)) / 1000)
+    assert item['last_s'] == item['max_s'] == pytest.approx(0.149)
+    for p in PERCENTILES:
+        assert item[f'p{p}_s'] == pytest.approx(np.percentile(janela, p))
+    assert item['peak_bytes_max'] == 149
+
+
+def test_stage_without_memory_and_reset():
+    metrics = StageMetrics()
+    metrics.record('rerun', 0.5)
+    assert 'peak_bytes_max' not in metrics.summary()['rerun']
+    metrics.reset()
+    assert metrics.summary() == {}
+
+
+def test_export(tmp_path):
+    metrics = StageMetrics()
+    timer = RerunTimer(metrics)
+    timer.lap('p1.filtros')
+    timer.finish()
+    metrics.export(tmp_path)
+    dados = json.loads((tmp_path / 'stages.json').read_text(encoding='utf-8'))
+    assert set(dados['stages']) == {'p1.filtros', 'rerun'}
+    prom = (tmp_path / 'stages.prom').read_text(encoding='utf-8')
+    assert 'dashboard_stage_seconds_count{stage="rerun"} 1' in prom
+    assert 'dashboard_stage_seconds{stage="p1.filtros",quantile="0.99"}' in prom
+    assert not list(tmp_path.glob('*.tmp'))
+    # Exportação automática respeita o intervalo mínimo
+    (tmp_path / 'stages.json').unlink()
+    metrics.maybe_export(tmp_path, interval=3600)
+    assert not (tmp_path / 'stages.json').exists()
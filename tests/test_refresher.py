@@ -0,0 +1,23 @@
+"""Troca de versão em segundo plano (refresher.DatasetRefresher)."""
+from refresher import DatasetRefresher
+from snapshot import append_batch, load_snapshot
+
+
+def test_batch_swaps_dataset(raw_frame, tmp_path):
+    origem = tmp_path / 'base.xlsx'
+    raw_frame.iloc[:300].to_excel(origem, index=False)
+    trocas = []
+    refresher = DatasetRefresher(origem, tmp_path / 'snapshot', on_swap=lambda a, b: trocas.append((a, b)),
+                                 shared=False)
+    anterior = refresher.current()
+    assert not refresher.check()
+
+    lote = load_snapshot(tmp_path / 'snapshot').iloc[:3].drop(columns=['source'])
+    lote['video_id'] += 10 ** 9
+    lote.to_csv(tmp_path / 'lote.csv', index=False)
+    append_batch(tmp_path / 'lote.csv', snapshot_dir=tmp_path / 'snapshot')
+
+    assert refresher.check()
+    novo = refresher.current()
+    assert len(novo.df) == len(anterior.df) + 3
+    assert trocas == [(anterior.version, novo.version)]
@@ -0,0 +1,64 @@
+"""Cache de resultados (result_cache.ResultCache) e troca de versão."""
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+import result_cache
+from result_cache import ResultCache, estimate_size, make_key
+
+
+def test_discard_version():
+    cache = ResultCache()
+    cache.put(make_key('v1', 'secao', {}), 1)
+    cache.put(make_key('v2', 'secao', {}), 2)
+    cache.discard_version('v1')
+    assert cache.get(make_key('v1', 'secao', {})) is None
+    assert cache.get(make_key('v2', 'secao', {})) == 2
+    assert cache.stats()['entries'] == 1
+
+
+def test_put_after_discard_is_dropped():
+    # Um cálculo da versão antiga que termina depois da troca não volta ao cache
+    cache = ResultCache()
+    chave = make_key('v1', 'secao', {'origem': ['TikTok']})
+    calculando, trocou = threading.Event(), threading.Event()
+
+    def calcular():
+        calculando.set()
+        trocou.wait(5)
+        return 'resultado'
+
+    resultados = []
+    worker = threading.Thread(target=lambda: resultados.append(cache.get_or_compute(chave, calcular)))
+    worker.start()
+    calculando.wait(5)
+    cache.discard_version('v1')
+    trocou.set()
+    worker.join(5)
+    assert resultados == ['resultado']
+    assert cache.get(chave) is None
+    assert cache.stats()['entries'] == 0 and cache.bytes == 0
+
+
+def test_import_does_not_load_plotly():
+    # Processo limpo: o plotly só entra com quem monta figuras
+    codigo = 'import sys, result_cache; print("plotly" in sys.modules)'
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=Path(result_cache.__file__).parent,
+                           capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == 'False'
+
+
+def test_figure_size_from_trace_arrays(monkeypatch):
+    # A estimativa vem dos arrays guardados na figura, sem gerar o JSON
+    monkeypatch.setattr(pio, 'to_json', lambda *a, **k: pytest.fail('figura serializada'))
+    x = np.arange(10**5, dtype=np.float64)
+    textos = np.array([f'perfil_{i}' for i in range(len(x))], dtype=object)
+    pequena = estimate_size(go.Figure(go.Scatter(x=x[:10], y=x[:10])))
+    grande = estimate_size(go.Figure(go.Scatter(x=x, y=x, text=textos)))
+    assert 2 * x.nbytes + textos.nbytes < grande - pequena < 2 * x.nbytes + 100 * textos.nbytes
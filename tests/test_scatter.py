@@ -0,0 +1,72 @@
+"""Gráfico Social vs Media Power: pontos por influenciador, grade de densidade
+e escolha do modo pelo teto de pontos."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from aggregates import density_grid, influencer_points
+
+
+def test_influencer_points_match_pandas(dataset):
+    df = dataset.df
+    pontos = influencer_points(dataset.cube).set_index('nickName').sort_index()
+    esperado = df.groupby('nickName', observed=True).agg(
+        socialPowers=('socialPowers', 'mean'), mediaPowers=('mediaPowers', 'mean'),
+        audienceSizes=('audienceSizes', 'max'), videos=('video_id', 'size')).sort_index()
+    pd.testing.assert_frame_equal(pontos[esperado.columns], esperado, check_dtype=False, rtol=1e-5,
+                                  check_index_type=False, check_names=False)
+    # Cor: a MicroTrend com mais vídeos do influenciador
+    contagem = df.groupby(['nickName', 'MicroTrends'], observed=True).size()
+    maximos = contagem.groupby(level='nickName', observed=True).max()
+    for nick, micro in pontos['MicroTrends'].items():
+        assert contagem[(nick, micro)] == maximos[nick]
+
+
+def test_density_grid_counts_every_video(dataset):
+    df = dataset.df
+    centros_x, centros_y, contagens = density_grid(df, bins=20)
+    assert contagens.shape == (20, 20) and len(centros_x) == len(centros_y) == 20
+    assert np.nansum(contagens) == len(df)
+    assert not (contagens == 0).any()
+    esperado, _, _ = np.histogram2d(df['socialPowers'], df['mediaPowers'], bins=20)
+    np.testing.assert_array_equal(np.nan_to_num(contagens), esperado.T)
+
+
+@pytest.mark.parametrize('max_points, modo', [(10**6, "Pontos (exato)"), (1000, "Por influenciador"),
+                                              (10, "Densidade")])
+def test_automatic_mode_follows_point_cap(dataset, max_points, modo):
+    n_videos, n_influenciadores = len(dataset.df), dataset.df['nickName'].nunique()
+    assert 10 < n_influenciadores <= 1000 < n_videos
+    efetivo, dados, total = engine.scatter_data(dataset, None, "Automático", max_points=max_points)
+    assert (efetivo, total) == (modo, n_videos)
+    if modo == "Pontos (exato)":
+        assert len(dados) == n_videos
+    elif modo == "Por influenciador":
+        assert len(dados) == n_influenciadores
+    else:
+        assert np.nansum(dados[2]) == n_videos
+
+
+def test_scatter_filtered_and_empty(dataset):
+    macro = dataset.df['MacroTrends'].iloc[0]
+    filtros = {'MacroTrends': [macro]}
+    _, pontos, n_videos = engine.scatter_data(dataset, filtros, "Por influenciador")
+    linhas = dataset.df[dataset.df['MacroTrends'] == macro]
+    assert n_videos == len(linhas) and len(pontos) == linhas['nickName'].nunique()
+    modo, dados, n_videos = engine.scatter_data(dataset, {'MicroTrends': []})
+    assert (modo, len(dados), n_videos) == ("Pontos (exato)", 0, 0)
+
+
+def test_point_cap_from_environment():
+    # O limite é lido na importação do engine, então a checagem roda em outro processo
+    ambiente = dict(os.environ, TRENDS_SCATTER_MAX_POINTS='12345')
+    saida = subprocess.run([sys.executable, '-c', 'import engine; print(engine.SCATTER_MAX_POINTS)'],
+                           cwd=Path(engine.__file__).parent, env=ambiente, capture_output=True, text=True,
+                           check=True)
+    assert saida.stdout.strip() == '12345'
@@ -0,0 +1,76 @@
+"""Busca textual (search.SearchIndex / engine.search) contra varreduras no pandas."""
+import numpy as np
+import pytest
+
+import engine
+from search import BM25_B, BM25_K1, TREND_WEIGHT, InvertedIndex, fold, tokenize
+
+
+def _matches(textos, termos):
+    """Textos com todos os ``termos`` (o último como prefixo), como no índice."""
+    def casa(texto):
+        tokens = set(tokenize(texto))
+        return (all(t in tokens for t in termos[:-1])
+                and any(token.startswith(termos[-1]) for token in tokens))
+    return textos.map(casa).to_numpy(dtype=bool)
+
+
+def test_tokenize():
+    assert fold('CÂMERA') == 'camera'
+    assert tokenize('A câmera do Galaxy, 5G!') == ['camera', 'galaxy', '5g']
+    assert tokenize(None) == []
+
+
+def test_bm25_scores():
+    textos = ['bateria bateria camera', 'camera', 'tela grande e bonita', '']
+    index = InvertedIndex(textos)
+    docs, notas = index.score(['camera'], prefix_last=False)
+    np.testing.assert_array_equal(docs, [0, 1])
+    tamanhos = np.array([3, 1, 3, 0])
+    idf = np.log1p((4 - 2 + 0.5) / (2 + 0.5))
+    esperado = idf * (BM25_K1 + 1) / (1 + BM25_K1 * (1 - BM25_B + BM25_B * tamanhos[:2] / tamanhos.mean()))
+    np.testing.assert_allclose(notas, esperado, rtol=1e-6)
+    # Prefixo no último termo; termo ausente zera a consulta
+    np.testing.assert_array_equal(index.score(['bat'])[0], [0])
+    assert len(index.score(['camera', 'inexistente'])[0]) == 0
+    assert len(index.score([])[0]) == 0
+
+
+@pytest.mark.parametrize('consulta', ['sintético 12', 'Texto 7', 'perfil_1', 'sumário inexistente'])
+def test_rows_match_pandas(dataset, consulta):
+    df = dataset.df
+    termos = tokenize(consulta)
+    textos = df['Desc'].astype(str) + ' ' + df['sumario'].astype(str)
+    por_nome = _matches(df['nickName'].astype(str), termos)
+    esperado = np.flatnonzero(_matches(textos, termos) | por_nome)
+    np.testing.assert_array_equal(dataset.search.rows(consulta), esperado)
+    # Dentro de uma seleção
+    origem = df['origem'].iloc[0]
+    np.testing.assert_array_equal(engine.select_rows(dataset, {'origem': [origem], engine.SEARCH_KEY: [consulta]}),
+                                  esperado[df['origem'].to_numpy()[esperado] == origem])
+
+
+def test_influencers_and_trends(dataset):
+    df = dataset.df
+    nick = df['nickName'].value_counts().index[0]
+    resultado = engine.search(dataset, nick.strip())
+    assert resultado['influencers']['nickName'].iloc[0] == nick
+    assert resultado['influencers']['videos'].iloc[0] == (df['nickName'] == nick).sum()
+    macro = df['MacroTrends'].iloc[0]
+    tendencias = dataset.search.search(macro)['trends']
+    assert (tendencias['level'].iloc[0], tendencias['trend'].iloc[0]) == ('MacroTrends', macro)
+
+
+def test_trend_match_brings_its_videos(dataset):
+    df = dataset.df
+    # Só a tendência tem "macrotrend" no texto: o resultado são os vídeos dela
+    resultado = dataset.search.search('MacroTrend 03')
+    esperado = np.flatnonzero(df['MacroTrends'].to_numpy() == 'MacroTrend 03')
+    assert len(esperado) and len(resultado['trends']) == 1
+    np.testing.assert_array_equal(resultado['rows'], esperado)
+    np.testing.assert_allclose(resultado['row_scores'], TREND_WEIGHT * resultado['trends']['score'].iloc[0])
+
+def test_empty_selection(dataset):
+    resultado = engine.search(dataset, 'texto', {'MicroTrends': []})
+    assert len(resultado['rows']) == 0
+    assert resultado['influencers'].empty and resultado['trends'].empty
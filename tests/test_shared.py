@@ -0,0 +1,45 @@
+"""Dataset publicado em arquivo mapeado (shared.py) e a conexão dos processos do app."""
+import copy
+
+import numpy as np
+import pandas as pd
+
+import engine
+from refresher import DatasetRefresher
+from shared import SHARED_KEEP, attach_dataset, publish_dataset, shared_path
+
+
+def test_attach_matches_loaded(dataset, snapshot_dir):
+    assert attach_dataset(dataset.version, snapshot_dir) is None
+    path = publish_dataset(dataset, snapshot_dir)
+    assert path == shared_path(dataset.version, snapshot_dir)
+    ds = attach_dataset(dataset.version, snapshot_dir)
+    pd.testing.assert_frame_equal(ds.df, dataset.df)
+    pd.testing.assert_frame_equal(ds.cube, dataset.cube)
+    # Os arrays apontam para o arquivo, só leitura
+    assert not ds.index.codes['nickName'].flags.writeable
+    filtros = {'MacroTrends': [dataset.df['MacroTrends'].iloc[0]]}
+    np.testing.assert_array_equal(engine.select_rows(ds, filtros), engine.select_rows(dataset, filtros))
+    pd.testing.assert_frame_equal(engine.top_microtrends(ds, filtros), engine.top_microtrends(dataset, filtros))
+
+
+def test_keeps_recent_versions(dataset, tmp_path):
+    ds = copy.copy(dataset)
+    for i in range(SHARED_KEEP + 2):
+        ds.version = f'{i:012d}'
+        publish_dataset(ds, tmp_path)
+    assert len(list(tmp_path.glob('dataset-*.bin'))) == SHARED_KEEP
+
+
+def test_refresher_attaches_published(raw_frame, tmp_path):
+    origem = tmp_path / 'base.xlsx'
+    raw_frame.iloc[:200].to_excel(origem, index=False)
+    snapshot_dir = tmp_path / 'snapshot'
+    refresher = DatasetRefresher(origem, snapshot_dir, shared=True)
+    # Nada publicado: o processo monta a sua cópia
+    propria = refresher.current()
+    assert not refresher.attached
+    publish_dataset(engine.load_dataset(snapshot_dir), snapshot_dir)
+    assert refresher.check() and refresher.attached
+    assert refresher.current() is not propria and refresher.current().version == propria.version
+    assert not refresher.check()
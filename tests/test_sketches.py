@@ -0,0 +1,97 @@
+"""Distintos por HyperLogLog (sketches.DistinctSketches / engine.distinct_counts) contra nunique."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from conftest import make_snapshot
+from sketches import DISTINCT_COLS, DistinctSketches, _bit_length, hll_estimate, hll_registers
+
+# Erro relativo típico de ~2,3% na precisão padrão; a tolerância cobre ~4 desvios
+TOLERANCIA = 0.1
+
+
+def _nunique(df, rows):
+    sel = df.iloc[rows]
+    esperado = sel.groupby('origem', observed=True)[list(DISTINCT_COLS)].nunique()
+    esperado.loc['Total'] = sel[list(DISTINCT_COLS)].nunique()
+    return esperado.rename(columns=DISTINCT_COLS)
+
+
+def test_bit_length():
+    valores = [0, 1, 2, 3, 2**31, 2**32 - 1, 2**32, 2**53 + 1, 2**63, 2**64 - 1]
+    valores += np.random.default_rng(0).integers(0, 2**63, 100, dtype=np.uint64).tolist()
+    np.testing.assert_array_equal(_bit_length(np.array(valores, dtype=np.uint64)),
+                                  [int(v).bit_length() for v in valores])
+
+
+@pytest.mark.parametrize('n', [1, 10, 1000, 200_000])
+def test_estimate_close_to_exact(n):
+    hashes = pd.util.hash_array(np.arange(n, dtype=np.int64))
+    # Repetir valores não muda o sketch
+    hashes = np.concatenate([hashes, hashes[: n // 2]])
+    registros = hll_registers(np.zeros(len(hashes), dtype=np.int64), hashes, 1)[0]
+    assert hll_estimate(registros) == pytest.approx(n, rel=TOLERANCIA, abs=1)
+    assert hll_estimate(np.zeros_like(registros)) == 0
+
+
+def test_union_of_partitions():
+    hashes = pd.util.hash_array(np.arange(30_000, dtype=np.int64))
+    grupos = np.arange(len(hashes)) % 3
+    registros = hll_registers(grupos, hashes, 3)
+    assert hll_estimate(registros.max(axis=0)) == pytest.approx(30_000, rel=TOLERANCIA)
+    assert hll_estimate(registros[0]) == pytest.approx(10_000, rel=TOLERANCIA)
+
+
+@pytest.mark.parametrize('filters', [None, 'macro', 'origem', 'nick'])
+def test_distinct_counts_match_nunique(dataset, filters):
+    df = dataset.df
+    filters = {'macro': {'MacroTrends': [df['MacroTrends'].iloc[0]]},
+               'origem': {'origem': [df['origem'].iloc[0]]},
+               'nick': {'nickName': [df['nickName'].iloc[0]]}}.get(filters)
+    esperado = _nunique(df, engine.select_rows(dataset, filters))
+
+    exatas, aproximado = engine.distinct_counts(dataset, filters, exact=True)
+    assert not aproximado
+    pd.testing.assert_frame_equal(exatas.sort_index(), esperado.sort_index(), check_dtype=False,
+                                  check_index_type=False, check_names=False)
+
+    estimadas, aproximado = engine.distinct_counts(dataset, filters)
+    # Com filtro de influenciador não há partição que responda: a contagem é exata
+    assert aproximado == ('nickName' not in (filters or {}))
+    assert sorted(estimadas.index) == sorted(esperado.index)
+    np.testing.assert_allclose(estimadas.loc[esperado.index].to_numpy(), esperado.to_numpy(),
+                               rtol=TOLERANCIA, atol=1)
+
+
+def test_single_row_partition():
+    df = pd.DataFrame({'origem': ['a', 'a', 'a', 'b'], 'MacroTrends': ['x'] * 4,
+                       'MicroTrends': ['m', 'm', 'n', 'm'], 'nickName': ['p1', 'p2', 'p1', None],
+                       'link': ['v1', 'v2', 'v3', 'v4']})
+    sketches = DistinctSketches(df)
+    assert len(sketches.partitions) == 3
+    for origem, esperado in (('a', {'nickName': 2, 'link': 3}), ('b', {'nickName': 0, 'link': 1})):
+        mask = sketches.partition_mask({'origem': [origem]})
+        for col, n in esperado.items():
+            assert sketches.estimate(col, mask) == pytest.approx(n, abs=0.5)
+            assert sketches.exact(col, np.flatnonzero(df['origem'] == origem)) == n
+    assert sketches.estimate('link', sketches.partition_mask({'origem': []})) == 0
+
+
+def test_videos_counted_by_link(raw_frame, tmp_path):
+    # Na planilha, video_id é um número de ordem que se repete, e o mesmo vídeo
+    # (link) aparece em mais de uma MicroTrend
+    df = raw_frame.iloc[:600].copy()
+    df['video_id'] = np.arange(len(df)) % 40
+    df.loc[300:, 'link'] = df['link'].iloc[:300].to_numpy()
+    ds = engine.load_dataset(make_snapshot(df, tmp_path))
+    exatas, _ = engine.distinct_counts(ds, None, exact=True)
+    assert exatas.loc['Total', 'videos'] == 300
+    estimadas, aproximado = engine.distinct_counts(ds, None)
+    assert aproximado and estimadas.loc['Total', 'videos'] == pytest.approx(300, rel=TOLERANCIA)
+
+
+def test_empty_selection(dataset):
+    for exata in (False, True):
+        contagens, _ = engine.distinct_counts(dataset, {'MicroTrends': []}, exact=exata)
+        assert list(contagens.index) == ['Total'] and not contagens.to_numpy().any()
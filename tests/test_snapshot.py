@@ -0,0 +1,73 @@
+"""Leitura das planilhas (snapshot.parse_sources) e a base compacta (snapshot.compact_frame)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from snapshot import (CATEGORY_COLS, DESCRIPTION_COLS, EXPECTED_COLS, NUMERIC_COLS, SOURCE_COL,
+                      clean_frame, compact_frame, load_snapshot, parse_sources, split_descriptions)
+
+
+def test_compact_dtypes_and_values(raw_frame):
+    df = clean_frame(raw_frame)
+    compacto, descricoes = compact_frame(df)
+    assert not set(DESCRIPTION_COLS.values()) & set(compacto.columns)
+    for col in CATEGORY_COLS:
+        assert isinstance(compacto[col].dtype, pd.CategoricalDtype)
+    for col in NUMERIC_COLS:
+        assert compacto[col].dtype.itemsize <= 4 or compacto[col].dtype.kind in 'iu'
+        np.testing.assert_allclose(compacto[col].to_numpy(float), df[col].to_numpy(float), rtol=1e-6)
+    # Inteiros cabem no menor tipo possível sem perder valores
+    assert compacto['engajamento'].dtype.itemsize < df['engajamento'].dtype.itemsize
+    for col in compacto.columns.difference(NUMERIC_COLS):
+        pd.testing.assert_series_equal(compacto[col].astype(object), df[col].astype(object), check_names=False)
+    original = df.drop(columns=list(DESCRIPTION_COLS.values()))
+    assert compacto.memory_usage(deep=True).sum() < original.memory_usage(deep=True).sum()
+
+    macro = df['MacroTrends'].iloc[0]
+    assert descricoes['MacroTrends'][macro] == df.loc[df['MacroTrends'] == macro, 'Descricao Macrotrends'].iloc[0]
+
+
+def test_snapshot_loads_compact_without_copy(raw_frame, snapshot_dir):
+    # O snapshot já é gravado nos tipos compactos: a carga não converte nada e
+    # as colunas numéricas apontam para o arquivo mapeado (somente leitura)
+    gravado = load_snapshot(snapshot_dir)
+    compacto, descricoes = compact_frame(clean_frame(raw_frame))
+    df, descricoes_gravadas = split_descriptions(gravado)
+    pd.testing.assert_frame_equal(df, compacto)
+    assert df.dtypes.to_dict() == compacto.dtypes.to_dict()
+    for col in NUMERIC_COLS:
+        assert not np.asarray(gravado[col].array).flags.writeable
+    for col in DESCRIPTION_COLS.values():
+        assert isinstance(gravado[col].dtype, pd.CategoricalDtype)
+    for key in DESCRIPTION_COLS:
+        pd.testing.assert_series_equal(descricoes_gravadas[key], descricoes[key])
+
+
+def test_parse_sources_folder(raw_frame, tmp_path):
+    partes = [raw_frame.iloc[:100], raw_frame.iloc[100:150], raw_frame.iloc[150:300]]
+    partes[0].to_excel(tmp_path / 'a.xlsx', index=False)
+    with pd.ExcelWriter(tmp_path / 'b.xlsx') as writer:
+        partes[1].assign(extra=1).to_excel(writer, sheet_name='jan', index=False)
+        pd.DataFrame().to_excel(writer, sheet_name='rascunho', index=False)
+        partes[2].to_excel(writer, sheet_name='fev', index=False)
+    (tmp_path / '~$a.xlsx').write_bytes(b'')
+    (tmp_path / 'notas.txt').write_text('fora', encoding='utf-8')
+
+    df, tempos = parse_sources(tmp_path, max_workers=1)
+    assert list(df.columns) == EXPECTED_COLS + [SOURCE_COL]
+    assert df[SOURCE_COL].value_counts().to_dict() == {
+        'a.xlsx': len(clean_frame(partes[0])), 'b.xlsx:jan': len(clean_frame(partes[1])),
+        'b.xlsx:fev': len(clean_frame(partes[2]))}
+    assert [(t['sheet'], t.get('skipped', False)) for t in tempos] == [
+        ('Sheet1', False), ('jan', False), ('rascunho', True), ('fev', False)]
+    assert tempos[1]['extra_columns'] == ['extra']
+    por_glob, _ = parse_sources(tmp_path / '*.xlsx', max_workers=2)
+    pd.testing.assert_frame_equal(por_glob, df)
+
+
+def test_parse_sources_missing_column(raw_frame, tmp_path):
+    raw_frame.iloc[:10].drop(columns='nickName').to_excel(tmp_path / 'ruim.xlsx', index=False)
+    with pytest.raises(ValueError, match='nickName'):
+        parse_sources(tmp_path, max_workers=1)
+    with pytest.raises(FileNotFoundError):
+        parse_sources(tmp_path / 'nada-*.xlsx')
@@ -0,0 +1,64 @@
+"""Top-K por ``np.partition`` (aggregates.top_k_positions / engine.top_k) contra pandas."""
+import numpy as np
+import pytest
+
+import engine
+import export
+from aggregates import top_k_positions
+
+
+def _pandas_top(df, by, col, agg, k):
+    return df.groupby(by, observed=True)[col].agg(agg).nlargest(k)
+
+
+@pytest.mark.parametrize('k', [0, 1, 3, 10, 50])
+def test_top_k_positions_matches_argsort(k):
+    valores = np.random.default_rng(0).integers(0, 20, 30).astype(float)
+    valores[[2, 7]] = np.nan
+    pos = top_k_positions(valores, k)
+    esperado = np.sort(valores[~np.isnan(valores)])[::-1][:k]
+    np.testing.assert_array_equal(valores[pos], esperado)
+
+
+@pytest.mark.parametrize('filters', [None, {'origem': ['TikTok']}, {'MacroTrends': ['MacroTrend 03']}])
+def test_top_microtrends_matches_pandas(dataset, filters):
+    df = dataset.df
+    if filters:
+        (col, valores), = filters.items()
+        df = df[df[col].isin(valores)]
+    esperado = _pandas_top(df, 'MicroTrends', 'engajamento', 'sum', 15)
+    micros = engine.top_microtrends(dataset, filters, 15)
+    assert list(micros['MicroTrends']) == list(esperado.index)
+    np.testing.assert_allclose(micros['engajamento'], esperado.to_numpy())
+
+
+@pytest.mark.parametrize('metric', list(engine.RANK_METRICS))
+def test_influencer_ranking_matches_pandas(dataset, metric):
+    col, agg = {'followers_max': ('followers', 'max'), 'engajamento': ('engajamento', 'sum'),
+                'audienceSizes': ('audienceSizes', 'sum'), 'videos': ('video_id', 'size')}[metric]
+    esperado = _pandas_top(dataset.df, 'nickName', col, agg, 10)
+    ranking = engine.influencer_ranking(dataset, None, 10, metric)
+    np.testing.assert_allclose(ranking[metric], esperado.to_numpy())
+
+
+def test_single_row_group(dataset):
+    # Influenciador com um só vídeo: o ranking filtrado nele tem a linha do vídeo
+    contagem = dataset.df['nickName'].value_counts()
+    nick = contagem.index[contagem.to_numpy() == 1][0]
+    linha = dataset.df[dataset.df['nickName'] == nick].iloc[0]
+    ranking = engine.influencer_ranking(dataset, {'nickName': [nick]}, 10, 'engajamento')
+    assert list(ranking.index) == [nick]
+    assert ranking['videos'].iloc[0] == 1
+    assert ranking['engajamento'].iloc[0] == linha['engajamento']
+    assert ranking['link'].iloc[0] == linha['link']
+
+
+@pytest.mark.parametrize('metric', list(engine.RANK_METRICS))
+def test_empty_selection(dataset, metric):
+    assert engine.top_microtrends(dataset, {'MicroTrends': []}, 15).empty
+    assert engine.influencer_ranking(dataset, {'MicroTrends': []}, 10, metric).empty
+
+
+def test_export_empty_preset(dataset):
+    html = export.render_report(dataset, {'name': 'vazio', 'filters': {'nickName': ['ninguém']}}, False)
+    assert '<html' in html.lower()
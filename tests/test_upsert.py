@@ -0,0 +1,55 @@
+"""Lotes incrementais (snapshot.read_batch / upsert_batch) contra o snapshot."""
+import numpy as np
+import pandas as pd
+
+import snapshot
+from snapshot import load_snapshot, read_batch, upsert_batch
+
+
+def test_csv_round_trip_is_skipped(snapshot_dir, tmp_path):
+    df = load_snapshot(snapshot_dir)
+    path = tmp_path / 'lote.csv'
+    df.iloc[:300].to_csv(path, index=False)
+    df_novo, relatorio, added_rows, removed = upsert_batch(df, read_batch(path))
+    assert relatorio['added'] == relatorio['updated'] == 0
+    assert relatorio['skipped'] == 300
+    assert len(added_rows) == 0 and len(df_novo) == len(df)
+
+
+def test_float_change_is_updated(snapshot_dir):
+    df = load_snapshot(snapshot_dir)
+    batch = df.iloc[:10].copy()
+    batch['mediaPowers'] = batch['mediaPowers'] * 1.001
+    df_novo, relatorio, added_rows, _ = upsert_batch(df, batch)
+    assert relatorio['updated'] == 10
+    np.testing.assert_array_equal(np.sort(added_rows), np.arange(10))
+
+
+def _repeated_ids(raw_frame, tmp_path):
+    """Planilha como a real: ``video_id`` é um número de ordem que se repete, e
+    o mesmo link aparece em linhas com textos diferentes. Devolve ``(df, argumentos)``."""
+    df = raw_frame.iloc[:400].copy()
+    df['video_id'] = np.arange(len(df)) % 40
+    df.loc[200:, 'link'] = df['link'].iloc[:200].to_numpy()
+    df.to_excel(tmp_path / 'base.xlsx', index=False)
+    return df, ['--source', str(tmp_path / 'base.xlsx'), '--snapshot-dir', str(tmp_path / 'snapshot')]
+
+
+def test_default_key_with_repeated_ids(raw_frame, tmp_path):
+    df, argumentos = _repeated_ids(raw_frame, tmp_path)
+    lote = df.iloc[190:210].copy()
+    lote['engajamento'] += 1
+    novas = df.iloc[:3].assign(Desc='Texto novo')
+    pd.concat([lote, novas]).to_csv(tmp_path / 'lote.csv', index=False)
+    assert snapshot.main(argumentos + ['--append', str(tmp_path / 'lote.csv')]) == 0
+    aplicado = snapshot.read_manifest(tmp_path / 'snapshot')['batches'][0]
+    assert (aplicado['updated'], aplicado['added']) == (20, 3)
+
+
+def test_ambiguous_key_exits_with_message(raw_frame, tmp_path, capsys):
+    df, argumentos = _repeated_ids(raw_frame, tmp_path)
+    df.iloc[:5].to_csv(tmp_path / 'lote.csv', index=False)
+    codigo = snapshot.main(argumentos + ['--append', str(tmp_path / 'lote.csv'), '--key', 'video_id'])
+    erro = capsys.readouterr().err
+    assert codigo == 1 and len(erro.strip().splitlines()) == 1 and '--key' in erro
+    assert snapshot.read_manifest(tmp_path / 'snapshot')['batches'] == []